@@ -0,0 +1,118 @@
+"""Аутентификация по JWT без чтения пользователя из базы.
+
+issue_token добавляет в токен роль, флаги и версию токенов
+пользователя. На безопасных запросах ClaimsJWTAuthentication собирает
+пользователя из утверждений токена, а версию сверяет с кешем в памяти
+процесса (JWT_VERSION_CACHE_SECONDS), база читается только при промахе.
+Запросы на запись получают пользователя из базы. Смена роли увеличивает
+token_version, и выданные раньше токены перестают приниматься.
+"""
+import time
+
+from django.conf import settings
+from django.db.models import F
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import User
+
+VERSION_CLAIM = 'ver'
+CLAIMS = ('username', 'role', 'is_staff', 'is_superuser')
+
+# id пользователя -> (версия токенов или None, момент устаревания).
+versions = {}
+
+
+def issue_token(user):
+    token = AccessToken.for_user(user)
+    for claim in CLAIMS:
+        token[claim] = getattr(user, claim)
+    token[VERSION_CLAIM] = user.token_version
+    return token
+
+
+def remember_version(user_id, version):
+    versions[user_id] = (
+        version,
+        time.monotonic() + settings.JWT_VERSION_CACHE_SECONDS,
+    )
+
+
+def get_version(user_id):
+    """Текущая версия токенов активного пользователя или None."""
+    cached = versions.get(user_id)
+    if cached is not None and cached[1] > time.monotonic():
+        return cached[0]
+    version = User.objects.filter(
+        pk=user_id,
+        is_active=True,
+    ).values_list('token_version', flat=True).first()
+    remember_version(user_id, version)
+    return version
+
+
+def revoke_tokens(user):
+    """Отзывает все выданные пользователю токены.
+
+    Другие процессы заметят отзыв, когда устареет их кеш версий.
+    """
+    User.objects.filter(pk=user.pk).update(
+        token_version=F('token_version') + 1,
+    )
+    versions.pop(user.pk, None)
+
+
+class ClaimsUser(TokenUser):
+    """Пользователь, восстановленный из утверждений токена."""
+
+    @cached_property
+    def role(self):
+        return self.token.get('role', User.USER)
+
+    @property
+    def is_admin(self):
+        return self.role == User.ADMIN or self.is_superuser or self.is_staff
+
+    @property
+    def is_moderator(self):
+        return self.role == User.MODERATOR
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication, читающая пользователя из базы только при записи.
+
+    Токены без версии, выпущенные до появления утверждений, проверяются
+    по базе, как в JWTAuthentication.
+    """
+
+    def authenticate(self, request):
+        self.safe = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        if not self.safe:
+            user = super().get_user(validated_token)
+            remember_version(user.pk, user.token_version)
+            self.check_version(validated_token, user.token_version)
+            return user
+        version = get_version(validated_token[api_settings.USER_ID_CLAIM])
+        if version is None:
+            raise AuthenticationFailed(
+                'Пользователь не найден или неактивен.',
+                code='user_not_found',
+            )
+        self.check_version(validated_token, version)
+        return ClaimsUser(validated_token)
+
+    def check_version(self, validated_token, version):
+        if validated_token[VERSION_CLAIM] != version:
+            raise AuthenticationFailed(
+                'Токен отозван.',
+                code='token_revoked',
+            )
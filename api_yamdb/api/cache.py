@@ -0,0 +1,131 @@
+"""Кеш сериализованных ответов для справочных эндпоинтов.
+
+Ключ строится из пути и нормализованных параметров запроса и включает
+поколение пространства имён. Запись в связанные модели меняет поколение,
+после чего старые ключи больше не читаются и вытесняются по таймауту.
+Хранилище задаётся настройкой CACHES (locmem, файлы, Redis и т.п.).
+"""
+import hashlib
+import time
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+RESPONSE_NAMESPACES = ('categories', 'genres', 'titles', 'leaderboards')
+NAMESPACES = RESPONSE_NAMESPACES + ('search',)
+HIT, MISS = 'hit', 'miss'
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def generation_key(namespace):
+    return f'api:{namespace}:generation'
+
+
+def stats_key(namespace, outcome):
+    return f'api:{namespace}:{outcome}'
+
+
+def new_generation():
+    return f'{time.time():.6f}-{uuid4().hex[:8]}'
+
+
+def generation_time(generation):
+    """Момент последнего сброса, закодированный в поколении."""
+    return float(generation.split('-')[0])
+
+
+def get_generation(namespace):
+    cache = get_cache()
+    generation = cache.get(generation_key(namespace))
+    if generation is None:
+        generation = new_generation()
+        cache.add(generation_key(namespace), generation, timeout=None)
+        return cache.get(generation_key(namespace), generation)
+    return generation
+
+
+def invalidate(*namespaces):
+    """Сбрасывает закешированные ответы указанных пространств имён."""
+    cache = get_cache()
+    for namespace in namespaces or NAMESPACES:
+        cache.set(generation_key(namespace), new_generation(), timeout=None)
+
+
+def request_fingerprint(request):
+    """Хеш пути и параметров без учёта их порядка и пустых значений."""
+    params = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+        if value != ''
+    )
+    return hashlib.sha256(f'{request.path}?{params}'.encode()).hexdigest()
+
+
+def build_key(namespace, request):
+    return (
+        f'api:{namespace}:{get_generation(namespace)}:'
+        f'{request_fingerprint(request)}'
+    )
+
+
+def count(namespace, outcome):
+    cache = get_cache()
+    key = stats_key(namespace, outcome)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def get_stats():
+    cache = get_cache()
+    return {
+        namespace: {
+            outcome: cache.get(stats_key(namespace, outcome), 0)
+            for outcome in (HIT, MISS)
+        }
+        for namespace in RESPONSE_NAMESPACES
+    }
+
+
+class CachedResponseMixin:
+    """Кеширует ответы list и retrieve в пространстве cache_namespace."""
+
+    cache_namespace = None
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve,
+            request,
+            *args,
+            **kwargs,
+        )
+
+    def can_cache(self):
+        return True
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        cache = get_cache()
+        key = build_key(self.cache_namespace, request)
+        data = cache.get(key)
+        if data is not None:
+            count(self.cache_namespace, HIT)
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        count(self.cache_namespace, MISS)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200 and self.can_cache():
+            cache.set(key, response.data, settings.API_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,63 @@
+"""Условные GET-запросы: ETag и Last-Modified без сериализации тела.
+
+Валидаторы строятся из поколений кеша (их меняют сигналы при записи)
+и из количества строк и последней даты в базе: даты публикации отзывов
+и комментариев родителя, даты изменения произведений. Агрегат замечает
+записи других процессов, поколения — остальные изменения, сделанные
+через API (справочники категорий и жанров внутри ответа).
+"""
+import hashlib
+
+from api.cache import generation_time, get_generation, request_fingerprint
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+class ConditionalGetMixin:
+    """Отвечает 304 на list и retrieve до обращения к сериализатору.
+
+    Наследник реализует get_validator_parts(), возвращающий пару
+    (значимые для ETag части, список временных меток).
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list,
+            request,
+            *args,
+            **kwargs,
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve,
+            request,
+            *args,
+            **kwargs,
+        )
+
+    def get_generation_parts(self, *namespaces):
+        generations = [get_generation(namespace) for namespace in namespaces]
+        return generations, [generation_time(item) for item in generations]
+
+    def get_validators(self, request):
+        parts, timestamps = self.get_validator_parts()
+        raw = ':'.join(
+            [request_fingerprint(request)] + [str(part) for part in parts]
+        )
+        etag = quote_etag(hashlib.sha256(raw.encode()).hexdigest())
+        return etag, int(max(timestamps))
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=last_modified,
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
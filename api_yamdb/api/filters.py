@@ -1,25 +1,75 @@
+from django.db.models import Count
 from django_filters import rest_framework as filters
-from reviews.models import Title
+from reviews.models import Genre, GenreTitle, Title
+
+EXACT, FUZZY = 'exact', 'fuzzy'
+ANY, ALL = 'any', 'all'
+
+
+def split_values(value):
+    return [part.strip() for part in value.split(',') if part.strip()]
 
 
 class TitleFilter(filters.FilterSet):
-    category = filters.CharFilter(
-        field_name='category__slug',
-        lookup_expr='icontains',
+    """Фильтры произведений.
+
+    По умолчанию category, genre и year сравниваются точно и по индексам,
+    несколько слагов передаются через запятую. match=fuzzy возвращает
+    прежний поиск подстроки по этим полям.
+    """
+
+    match = filters.ChoiceFilter(
+        choices=((EXACT, 'Точное совпадение'), (FUZZY, 'Подстрока')),
+        method='filter_mode',
     )
-    genre = filters.CharFilter(
-        field_name='genre__slug',
-        lookup_expr='icontains',
+    category = filters.CharFilter(method='filter_category')
+    genre = filters.CharFilter(method='filter_genre')
+    genre_mode = filters.ChoiceFilter(
+        choices=((ANY, 'Любой из жанров'), (ALL, 'Все жанры')),
+        method='filter_mode',
     )
     name = filters.CharFilter(
         field_name='name',
         lookup_expr='icontains',
     )
-    year = filters.NumberFilter(
-        field_name='year',
-        lookup_expr='icontains',
-    )
+    year = filters.NumberFilter(method='filter_year')
+    year_min = filters.NumberFilter(field_name='year', lookup_expr='gte')
+    year_max = filters.NumberFilter(field_name='year', lookup_expr='lte')
 
     class Meta:
         model = Title
         fields = '__all__'
+
+    @property
+    def is_fuzzy(self):
+        return self.form.cleaned_data.get('match') == FUZZY
+
+    def filter_mode(self, queryset, name, value):
+        return queryset
+
+    def filter_category(self, queryset, name, value):
+        if self.is_fuzzy:
+            return queryset.filter(category__slug__icontains=value)
+        return queryset.filter(category__slug__in=split_values(value))
+
+    def filter_year(self, queryset, name, value):
+        if self.is_fuzzy:
+            return queryset.filter(year__icontains=value)
+        return queryset.filter(year=value)
+
+    def filter_genre(self, queryset, name, value):
+        if self.is_fuzzy:
+            return queryset.filter(genre__slug__icontains=value)
+        genre_ids = list(
+            Genre.objects.filter(
+                slug__in=split_values(value),
+            ).values_list('id', flat=True)
+        )
+        links = GenreTitle.objects.filter(genre_id__in=genre_ids)
+        if self.form.cleaned_data.get('genre_mode') == ALL:
+            if len(genre_ids) < len(set(split_values(value))):
+                return queryset.none()
+            links = links.values('title_id').annotate(
+                genres=Count('genre_id', distinct=True),
+            ).filter(genres=len(genre_ids))
+        return queryset.filter(pk__in=links.values('title_id'))
@@ -0,0 +1,96 @@
+"""Материализованные рейтинги произведений.
+
+Главная страница читает готовые позиции из LeaderboardEntry по индексу
+(board, scope, position), поэтому стоимость запроса зависит только от
+размера страницы. Пересчёт выполняет команда refresh_leaderboards,
+которую запускают по расписанию и после импорта CSV.
+"""
+from datetime import timedelta
+
+from api.cache import invalidate
+from api.models import LeaderboardEntry
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+from reviews.models import Category, Genre, GenreTitle, Review, Title
+
+ALL = 'all'
+CATEGORY, GENRE = 'category', 'genre'
+
+
+def scope_key(kind=None, pk=None):
+    if kind is None:
+        return ALL
+    return f'{kind}:{pk}'
+
+
+def get_scopes():
+    """Пары (срез, произведения среза)."""
+    yield ALL, Title.objects.all()
+    for pk in Category.objects.values_list('pk', flat=True):
+        yield scope_key(CATEGORY, pk), Title.objects.filter(category_id=pk)
+    for pk in Genre.objects.values_list('pk', flat=True):
+        yield scope_key(GENRE, pk), Title.objects.filter(
+            pk__in=GenreTitle.objects.filter(genre_id=pk).values('title_id'),
+        )
+
+
+def top_rated(titles, size, since):
+    return titles.filter(
+        rating__isnull=False,
+    ).order_by(
+        '-rating',
+        '-reviews_count',
+        '-id',
+    ).values_list('id', 'rating')[:size]
+
+
+def trending(titles, size, since):
+    """Больше всего отзывов с момента since."""
+    return Review.objects.filter(
+        pub_date__gte=since,
+        title__in=titles,
+    ).order_by().values('title').annotate(
+        total=Count('id'),
+    ).order_by(
+        '-total',
+        '-title',
+    ).values_list('title', 'total')[:size]
+
+
+BUILDERS = {
+    LeaderboardEntry.TOP: top_rated,
+    LeaderboardEntry.TRENDING: trending,
+}
+
+
+def refresh(boards=None, size=None, window=None):
+    """Пересчитывает рейтинги и возвращает число записанных позиций."""
+    boards = boards or list(BUILDERS)
+    size = size or settings.LEADERBOARD_SIZE
+    now = timezone.now()
+    since = now - timedelta(
+        hours=window or settings.LEADERBOARD_TRENDING_HOURS,
+    )
+    entries = [
+        LeaderboardEntry(
+            board=board,
+            scope=scope,
+            position=position,
+            title_id=title_id,
+            score=score,
+            refreshed=now,
+        )
+        for scope, titles in get_scopes()
+        for board in boards
+        for position, (title_id, score) in enumerate(
+            BUILDERS[board](titles, size, since),
+            start=1,
+        )
+    ]
+    with transaction.atomic():
+        LeaderboardEntry.objects.filter(board__in=boards).delete()
+        LeaderboardEntry.objects.bulk_create(entries, batch_size=1000)
+        transaction.on_commit(lambda: invalidate('leaderboards'))
+    return len(entries)
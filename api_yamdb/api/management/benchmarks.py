@@ -0,0 +1,39 @@
+"""Общие части команд benchmark_*.
+
+Режимы, которые меняют настройки на этапе импорта (вид view, движок
+базы), прогоняются в отдельных процессах manage.py с нужным окружением;
+дочерний процесс печатает итог последней строкой в JSON.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management import CommandError
+
+
+def run_subprocess(command, arguments, env):
+    result = subprocess.run(
+        [sys.executable, str(settings.BASE_DIR / 'manage.py'), command]
+        + arguments,
+        env=dict(os.environ, **env),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode:
+        raise CommandError(result.stderr)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarize(latencies, elapsed, errors=0):
+    """Пропускная способность и перцентили задержки в мс."""
+    latencies = sorted(latency * 1000 for latency in latencies)
+    return {
+        'errors': errors,
+        'rps': len(latencies) / elapsed,
+        'mean': statistics.mean(latencies),
+        'p50': statistics.median(latencies),
+        'p95': latencies[max(int(len(latencies) * 0.95) - 1, 0)],
+    }
@@ -0,0 +1,326 @@
+import json
+import random
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+from api.management.benchmarks import summarize
+from api.management.commands.load import STAGES
+from api.management.synthetic import SCALES, build, seed, write_csv
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management import BaseCommand, CommandError, call_command
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import Genre, Review, Title, User
+
+SCENARIOS = (
+    'load',
+    'titles_list',
+    'reviews_list',
+    'comments_list',
+    'review_create',
+    'signup',
+    'token',
+)
+TITLE_FILTERS = (
+    '',
+    'ordering=-rating',
+    'ordering=name',
+    'year_min=1990&year_max=2000',
+    'category=category-1',
+    'genre={genre}',
+    'genre={genre},{other}&genre_mode=all',
+)
+TOLERANCE = 20
+
+
+def compare(report, baseline, tolerance):
+    """Сценарии, ставшие медленнее допуска или с большим числом запросов."""
+    regressions = []
+    for scale, current in report['scales'].items():
+        previous = baseline.get('scales', {}).get(scale, {})
+        for name, result in current['scenarios'].items():
+            before = previous.get('scenarios', {}).get(name)
+            if before is None:
+                continue
+            for metric in ('p95', 'seconds'):
+                if metric in result and result[metric] > before[metric] * (
+                    1 + tolerance / 100
+                ):
+                    regressions.append(
+                        f'{scale}/{name}: {metric} {before[metric]:.2f} '
+                        f'→ {result[metric]:.2f}'
+                    )
+            if result.get('queries', 0) > before.get('queries', 0):
+                regressions.append(
+                    f'{scale}/{name}: запросов к базе '
+                    f'{before["queries"]:.1f} → {result["queries"]:.1f}'
+                )
+    return regressions
+
+
+class Command(BaseCommand):
+    help = (
+        "Задержка, число SQL-запросов и пропускная способность основных "
+        "эндпоинтов и команды load на синтетических каталогах. Данные "
+        "создаются во временной базе, итог — отчёт в JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales',
+            nargs='+',
+            choices=list(SCALES),
+            default=['small'],
+            help='Размеры каталога.',
+        )
+        parser.add_argument(
+            '--scenarios',
+            nargs='+',
+            choices=SCENARIOS,
+            default=list(SCENARIOS),
+            help='Измеряемые сценарии.',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=50,
+            help='Количество запросов на каждый сценарий.',
+        )
+        parser.add_argument(
+            '--output',
+            type=Path,
+            help='Файл для отчёта в JSON.',
+        )
+        parser.add_argument(
+            '--baseline',
+            type=Path,
+            help='Прошлый отчёт: команда завершится ошибкой при регрессии.',
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=TOLERANCE,
+            help='Допустимый рост задержки относительно baseline, %%.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def measure(self, client, requests, expected):
+        """Прогоняет запросы одним клиентом по очереди."""
+        latencies, queries, errors = [], 0, 0
+        started = time.perf_counter()
+        for method, path, data in requests:
+            with CaptureQueriesContext(connection) as context:
+                request_started = time.perf_counter()
+                response = getattr(client, method)(path, data)
+                latencies.append(time.perf_counter() - request_started)
+            queries += len(context.captured_queries)
+            errors += response.status_code != expected
+        result = summarize(latencies, time.perf_counter() - started, errors)
+        result['queries'] = queries / len(latencies)
+        return result
+
+    def run_load(self, catalogue):
+        filenames = {stage.name: stage.filename for stage in STAGES}
+        with tempfile.TemporaryDirectory() as directory:
+            write_csv(catalogue, Path(directory), filenames)
+            started = time.perf_counter()
+            with redirect_stdout(StringIO()):
+                call_command('load', data_dir=Path(directory), restart=True)
+            seconds = time.perf_counter() - started
+        rows = sum(len(objects) for objects in catalogue.values())
+        return {
+            'seconds': seconds,
+            'rows': rows,
+            'rows_per_second': rows / seconds,
+        }
+
+    def requests_titles_list(self, count, rng):
+        slugs = list(Genre.objects.values_list('slug', flat=True))
+        filters = (
+            TITLE_FILTERS[index % len(TITLE_FILTERS)].format(
+                genre=rng.choice(slugs),
+                other=rng.choice(slugs),
+            )
+            for index in range(count)
+        )
+        return [
+            ('get', f'/api/v1/titles/?{query}&nocache={index}', None)
+            for index, query in enumerate(filters)
+        ]
+
+    def requests_reviews_list(self, count, rng):
+        title_ids = list(Title.objects.values_list('id', flat=True))
+        return [
+            (
+                'get',
+                f'/api/v1/titles/{rng.choice(title_ids)}/reviews/'
+                f'?nocache={index}',
+                None,
+            )
+            for index in range(count)
+        ]
+
+    def requests_comments_list(self, count, rng):
+        reviews = list(Review.objects.values_list('title_id', 'id'))
+        return [
+            (
+                'get',
+                '/api/v1/titles/{}/reviews/{}/comments/'.format(
+                    *rng.choice(reviews),
+                ) + f'?nocache={index}',
+                None,
+            )
+            for index in range(count)
+        ]
+
+    def requests_review_create(self, count, rng):
+        return [
+            (
+                'post',
+                f'/api/v1/titles/{title_id}/reviews/',
+                {'text': 'Отзыв для замера', 'score': rng.randint(1, 10)},
+            )
+            for title_id in Title.objects.values_list('id', flat=True)[:count]
+        ]
+
+    def requests_signup(self, count, rng):
+        return [
+            (
+                'post',
+                '/api/v1/auth/signup/',
+                {
+                    'username': f'signup{index}',
+                    'email': f'signup{index}@yamdb.fake',
+                },
+            )
+            for index in range(count)
+        ]
+
+    def requests_token(self, count, rng):
+        users = User.objects.filter(username__startswith='user')[:count]
+        return [
+            (
+                'post',
+                '/api/v1/auth/token/',
+                {
+                    'username': user.username,
+                    'confirmation_code': default_token_generator.make_token(
+                        user,
+                    ),
+                },
+            )
+            for user in users
+        ]
+
+    def get_client(self, name):
+        if name != 'review_create':
+            return Client()
+        writer = User.objects.create(
+            username='benchmark_writer',
+            email='benchmark_writer@yamdb.fake',
+        )
+        return Client(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(writer)}',
+        )
+
+    def run_scale(self, scale, scenarios, count, rng):
+        """Замеры на одном каталоге; база должна быть пустой."""
+        catalogue = build(scale, rng)
+        results = {}
+        if 'load' in scenarios:
+            results['load'] = self.run_load(catalogue)
+        else:
+            seed(catalogue)
+        expected = {'review_create': 201}
+        for name in scenarios:
+            if name == 'load':
+                continue
+            results[name] = self.measure(
+                self.get_client(name),
+                getattr(self, f'requests_{name}')(count, rng),
+                expected.get(name, 200),
+            )
+        return results
+
+    def write_report(self, report, options):
+        self.stdout.write(
+            f'База: {report["database"]}, {report["requests"]} запросов '
+            'на сценарий, задержка в мс'
+        )
+        for scale, current in report['scales'].items():
+            self.stdout.write(f'{scale}:')
+            for name, result in current['scenarios'].items():
+                if name == 'load':
+                    self.stdout.write(
+                        f'{name:>15}: {result["seconds"]:.2f} с, '
+                        f'{result["rows_per_second"]:.0f} строк/с'
+                    )
+                    continue
+                self.stdout.write(
+                    f'{name:>15}: среднее {result["mean"]:.2f}, '
+                    f'p95 {result["p95"]:.2f}, {result["rps"]:.1f} '
+                    f'запросов/с, SQL {result["queries"]:.1f}, '
+                    f'ошибок {result["errors"]}'
+                )
+        if options['output']:
+            options['output'].write_text(
+                json.dumps(report, ensure_ascii=False, indent=2),
+                encoding='utf-8',
+            )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        report = {
+            'created': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'requests': options['requests'],
+            'seed': options['seed'],
+            'scales': {},
+        }
+        # Временная база: данные замеров не попадают в рабочую.
+        old_name = connection.creation.create_test_db(
+            verbosity=0,
+            autoclobber=True,
+            serialize=False,
+        )
+        try:
+            # Лимиты частоты отключены: замеряется сама обработка запросов.
+            with override_settings(
+                DATABASE_REPLICAS=[],
+                PROFILING_SAMPLE_RATE=0,
+                REST_FRAMEWORK={
+                    **settings.REST_FRAMEWORK,
+                    'DEFAULT_THROTTLE_RATES': {},
+                },
+            ):
+                for scale in options['scales']:
+                    report['scales'][scale] = {
+                        'size': SCALES[scale]._asdict(),
+                        'scenarios': self.run_scale(
+                            SCALES[scale],
+                            options['scenarios'],
+                            options['requests'],
+                            rng,
+                        ),
+                    }
+                    call_command('flush', interactive=False, verbosity=0)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        self.write_report(report, options)
+        if options['baseline']:
+            regressions = compare(
+                report,
+                json.loads(options['baseline'].read_text(encoding='utf-8')),
+                options['tolerance'],
+            )
+            if regressions:
+                raise CommandError(
+                    'Регрессии производительности:\n' + '\n'.join(regressions)
+                )
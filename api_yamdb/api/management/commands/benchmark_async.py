@@ -0,0 +1,146 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from api.management.benchmarks import run_subprocess, summarize
+from django.core.management import BaseCommand
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client
+
+WSGI, ASGI = 'wsgi', 'asgi'
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнение пропускной способности синхронного (WSGI) и "
+        "асинхронного (ASGI) пути чтения при медленной базе"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default='/api/v1/titles/',
+            help='Адрес эндпоинта для чтения.',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Количество запросов на каждый режим.',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=32,
+            help='Одновременных клиентов для ASGI.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help=(
+                'Параллельных запросов WSGI: синхронный воркер gunicorn '
+                'обслуживает один запрос за раз.'
+            ),
+        )
+        parser.add_argument(
+            '--delay',
+            type=float,
+            default=20,
+            help='Искусственная задержка каждого SQL-запроса, мс.',
+        )
+        parser.add_argument(
+            '--mode',
+            choices=(WSGI, ASGI),
+            help='Прогнать один режим в текущем процессе.',
+        )
+
+    def slow_down_queries(self, delay):
+        def wrapper(execute, sql, params, many, context):
+            time.sleep(delay)
+            return execute(sql, params, many, context)
+
+        def install(sender, connection, **kwargs):
+            connection.execute_wrappers.append(wrapper)
+
+        connection_created.connect(install, weak=False)
+
+    def urls(self, path, count):
+        separator = '&' if '?' in path else '?'
+        # Уникальный параметр обходит кеш ответов.
+        return [f'{path}{separator}nocache={index}' for index in range(count)]
+
+    def run_wsgi(self, urls, workers):
+        local = threading.local()
+
+        def fetch(url):
+            if not hasattr(local, 'client'):
+                local.client = Client()
+            started = time.perf_counter()
+            status = local.client.get(url).status_code
+            return status, time.perf_counter() - started
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(fetch, urls))
+
+    def run_asgi(self, urls, concurrency):
+        async def fetch(client, semaphore, url):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(url)
+                return response.status_code, time.perf_counter() - started
+
+        async def main():
+            client = AsyncClient()
+            semaphore = asyncio.Semaphore(concurrency)
+            return await asyncio.gather(
+                *(fetch(client, semaphore, url) for url in urls)
+            )
+
+        return asyncio.run(main())
+
+    def run_mode(self, options):
+        self.slow_down_queries(options['delay'] / 1000)
+        urls = self.urls(options['path'], options['requests'])
+        started = time.perf_counter()
+        if options['mode'] == WSGI:
+            results = self.run_wsgi(urls, options['workers'])
+        else:
+            results = self.run_asgi(urls, options['concurrency'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(json.dumps(summarize(
+            [latency for _, latency in results],
+            elapsed,
+            errors=sum(status != 200 for status, _ in results),
+        )))
+
+    def handle(self, *args, **options):
+        if options['mode']:
+            self.run_mode(options)
+            return
+        self.stdout.write(
+            f'{options["requests"]} запросов к {options["path"]}, '
+            f'задержка SQL {options["delay"]} мс; '
+            f'параллельных запросов WSGI: {options["workers"]}, '
+            f'ASGI: {options["concurrency"]}'
+        )
+        for mode in (WSGI, ASGI):
+            # Вид view (синхронный или корутина) выбирается при импорте
+            # urls, поэтому каждый режим идёт в своём процессе.
+            report = run_subprocess(
+                'benchmark_async',
+                [f'--mode={mode}'] + [
+                    f'--{name}={options[name]}'
+                    for name in (
+                        'path', 'requests', 'concurrency', 'workers', 'delay',
+                    )
+                ],
+                {'ASYNC_READ_VIEWS': 'true' if mode == ASGI else 'false'},
+            )
+            self.stdout.write(
+                f'{mode}: {report["rps"]:.1f} запросов/с, '
+                f'p50 {report["p50"]:.1f} мс, p95 {report["p95"]:.1f} мс, '
+                f'ошибок {report["errors"]}'
+            )
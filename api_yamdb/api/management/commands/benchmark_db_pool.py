@@ -0,0 +1,117 @@
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from api.management.benchmarks import run_subprocess, summarize
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+
+ENGINE = 'django.db.backends.postgresql'
+POOL_ENGINE = 'api_yamdb.postgresql_pool'
+MODES = {
+    'direct': {'DB_CONN_MAX_AGE': '0', 'DB_ENGINE': ENGINE},
+    'persistent': {'DB_CONN_MAX_AGE': '600', 'DB_ENGINE': ENGINE},
+    'pool': {'DB_CONN_MAX_AGE': '0', 'DB_ENGINE': POOL_ENGINE},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Задержка запросов без пула соединений, с постоянными "
+        "соединениями (CONN_MAX_AGE) и с пулом api_yamdb.postgresql_pool"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default='/api/v1/titles/',
+            help='Адрес эндпоинта для чтения.',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=300,
+            help='Количество запросов на каждый режим.',
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=1,
+            help='Потоков, одновременно выполняющих запросы.',
+        )
+        parser.add_argument(
+            '--mode',
+            choices=list(MODES),
+            help='Прогнать один режим в текущем процессе.',
+        )
+
+    def run_mode(self, options):
+        """Запросы через WSGIHandler, как под gunicorn.
+
+        В отличие от тестового клиента обработчик закрывает соединения
+        с базой в конце каждого запроса.
+        """
+        handler = WSGIHandler()
+        url = urlsplit(options['path'])
+        local = threading.local()
+
+        def start_response(status, headers):
+            local.status = int(status.split()[0])
+
+        def fetch(index):
+            environ = {
+                'REQUEST_METHOD': 'GET',
+                'PATH_INFO': url.path,
+                'QUERY_STRING': f'{url.query}&nocache={index}',
+                'SERVER_NAME': 'testserver',
+                'SERVER_PORT': '80',
+                'wsgi.input': BytesIO(),
+                'wsgi.errors': sys.stderr,
+                'wsgi.url_scheme': 'http',
+            }
+            started = time.perf_counter()
+            response = handler(environ, start_response)
+            b''.join(response)
+            response.close()
+            return local.status, time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            results = list(executor.map(fetch, range(options['requests'])))
+        self.stdout.write(json.dumps(summarize(
+            [latency for _, latency in results],
+            time.perf_counter() - started,
+            errors=sum(status != 200 for status, _ in results),
+        )))
+
+    def handle(self, *args, **options):
+        if options['mode']:
+            self.run_mode(options)
+            return
+        if connection.vendor != 'postgresql':
+            raise CommandError('Сравнение доступно только для PostgreSQL.')
+        self.stdout.write(
+            f'{options["requests"]} запросов к {options["path"]} '
+            f'в {options["threads"]} потоках, задержка в мс'
+        )
+        for mode, env in MODES.items():
+            report = run_subprocess(
+                'benchmark_db_pool',
+                [
+                    f'--mode={mode}',
+                    f'--path={options["path"]}',
+                    f'--requests={options["requests"]}',
+                    f'--threads={options["threads"]}',
+                ],
+                env,
+            )
+            self.stdout.write(
+                f'{mode:>10}: среднее {report["mean"]:.2f}, '
+                f'p50 {report["p50"]:.2f}, p95 {report["p95"]:.2f}, '
+                f'{report["rps"]:.1f} запросов/с, ошибок {report["errors"]}'
+            )
@@ -0,0 +1,100 @@
+import random
+import statistics
+import string
+import time
+
+from api.cache import invalidate
+from api.search import LocalSearchBackend, get_backend, search_titles
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+from reviews.models import Title
+
+SIZES = (10_000, 100_000, 1_000_000)
+VOCABULARY_SIZE = 5000
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнение задержки поиска icontains и полнотекстового поиска "
+        "на синтетических каталогах (данные откатываются)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=SIZES,
+            help='Размеры каталога в произведениях.',
+        )
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=20,
+            help='Количество запросов на каждый способ поиска.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def seed(self, size, vocabulary, rng):
+        titles = (
+            Title(
+                name=' '.join(rng.choices(vocabulary, k=3)),
+                description=' '.join(rng.choices(vocabulary, k=20)),
+                year=rng.randint(1900, 2020),
+            )
+            for _ in range(size)
+        )
+        Title.objects.bulk_create(titles, batch_size=BATCH_SIZE)
+        invalidate('search')
+
+    def measure(self, words, run):
+        timings = []
+        for word in words:
+            started = time.perf_counter()
+            run(word)
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    def benchmark(self, size, words, vocabulary, rng):
+        self.seed(size, vocabulary, rng)
+        results = {
+            'icontains': self.measure(
+                words,
+                lambda word: list(
+                    Title.objects.filter(name__icontains=word)[:10]
+                ),
+            ),
+        }
+        if isinstance(get_backend(), LocalSearchBackend):
+            started = time.perf_counter()
+            LocalSearchBackend.get_index()
+            results['index_build'] = (time.perf_counter() - started) * 1000
+        results['search'] = self.measure(
+            words,
+            lambda word: list(search_titles(Title.objects.all(), word)[:10]),
+        )
+        return results
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        vocabulary = [
+            ''.join(rng.choices(string.ascii_lowercase, k=7))
+            for _ in range(VOCABULARY_SIZE)
+        ]
+        words = rng.choices(vocabulary, k=options['queries'])
+        self.stdout.write(
+            f'База: {connection.vendor}, поиск: '
+            f'{type(get_backend()).__name__}, медиана в мс'
+        )
+        for size in options['sizes']:
+            with transaction.atomic():
+                results = self.benchmark(size, words, vocabulary, rng)
+                transaction.set_rollback(True)
+            invalidate('search')
+            self.stdout.write(
+                f'{size:>9}: '
+                + ', '.join(
+                    f'{name} {value:.2f}' for name, value in results.items()
+                )
+            )
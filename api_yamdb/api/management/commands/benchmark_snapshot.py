@@ -0,0 +1,147 @@
+import json
+import random
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+from api.management.commands.load import STAGES
+from api.management.snapshot import dump, restore
+from api.management.synthetic import SCALES, build, seed, write_csv
+from django.core.management import BaseCommand, call_command
+from django.db import connection
+from django.utils import timezone
+
+METHODS = ('restore', 'restore_compressed', 'load', 'loaddata')
+
+
+def size(*paths):
+    return sum(path.stat().st_size for path in paths)
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнение восстановления из снимка (restore) с командами load "
+        "и loaddata на синтетических каталогах во временной базе"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales',
+            nargs='+',
+            choices=list(SCALES),
+            default=['small'],
+            help='Размеры каталога.',
+        )
+        parser.add_argument(
+            '--methods',
+            nargs='+',
+            choices=METHODS,
+            default=list(METHODS),
+            help='Способы загрузки.',
+        )
+        parser.add_argument(
+            '--output',
+            type=Path,
+            help='Файл для отчёта в JSON.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def write_files(self, catalogue, directory):
+        """Один каталог во всех форматах; размеры файлов в байтах."""
+        with open(directory / 'snapshot.bin', 'wb') as file:
+            dump(file)
+        with open(directory / 'snapshot.bin.z', 'wb') as file:
+            dump(file, compress=True)
+        with redirect_stdout(StringIO()):
+            call_command(
+                'dumpdata',
+                'reviews',
+                output=str(directory / 'fixtures.json'),
+            )
+        filenames = {stage.name: stage.filename for stage in STAGES}
+        write_csv(catalogue, directory, filenames)
+        return {
+            'restore': size(directory / 'snapshot.bin'),
+            'restore_compressed': size(directory / 'snapshot.bin.z'),
+            'load': size(*(directory / name for name in filenames.values())),
+            'loaddata': size(directory / 'fixtures.json'),
+        }
+
+    def run_method(self, method, directory):
+        if method == 'load':
+            call_command('load', data_dir=directory, restart=True)
+        elif method == 'loaddata':
+            call_command('loaddata', str(directory / 'fixtures.json'))
+        else:
+            filename = (
+                'snapshot.bin.z' if method == 'restore_compressed'
+                else 'snapshot.bin'
+            )
+            with open(directory / filename, 'rb') as file:
+                restore(file)
+
+    def run_scale(self, scale, methods, rng):
+        """Замеры на одном каталоге; база должна быть пустой."""
+        catalogue = build(scale, rng)
+        seed(catalogue)
+        rows = sum(len(objects) for objects in catalogue.values())
+        results = {}
+        with tempfile.TemporaryDirectory() as directory:
+            directory = Path(directory)
+            sizes = self.write_files(catalogue, directory)
+            for method in methods:
+                call_command('flush', interactive=False, verbosity=0)
+                started = time.perf_counter()
+                with redirect_stdout(StringIO()):
+                    self.run_method(method, directory)
+                seconds = time.perf_counter() - started
+                results[method] = {
+                    'seconds': seconds,
+                    'rows_per_second': rows / seconds,
+                    'bytes': sizes[method],
+                }
+        call_command('flush', interactive=False, verbosity=0)
+        return {'rows': rows, 'methods': results}
+
+    def write_report(self, report, options):
+        self.stdout.write(f'База: {report["database"]}')
+        for scale, current in report['scales'].items():
+            self.stdout.write(f'{scale} ({current["rows"]} строк):')
+            for method, result in current['methods'].items():
+                self.stdout.write(
+                    f'{method:>18}: {result["seconds"]:.2f} с, '
+                    f'{result["rows_per_second"]:.0f} строк/с, '
+                    f'файл {result["bytes"] / 1024:.0f} КБ'
+                )
+        if options['output']:
+            options['output'].write_text(
+                json.dumps(report, ensure_ascii=False, indent=2),
+                encoding='utf-8',
+            )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        report = {
+            'created': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'seed': options['seed'],
+            'scales': {},
+        }
+        # Временная база: данные замеров не попадают в рабочую.
+        old_name = connection.creation.create_test_db(
+            verbosity=0,
+            autoclobber=True,
+            serialize=False,
+        )
+        try:
+            for scale in options['scales']:
+                report['scales'][scale] = self.run_scale(
+                    SCALES[scale],
+                    options['methods'],
+                    rng,
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        self.write_report(report, options)
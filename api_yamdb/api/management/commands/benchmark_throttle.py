@@ -0,0 +1,106 @@
+import time
+
+from api.management.benchmarks import summarize
+from api.throttling import (AuthIPThrottle, AuthUsernameThrottle, take_local,
+                            take_shared)
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+
+class Command(BaseCommand):
+    help = (
+        "Накладные расходы ограничения частоты: проверка ведра в общем "
+        "кеше и в памяти процесса, запрос к выдаче токена с проверкой "
+        "и без неё"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--checks',
+            type=int,
+            default=10000,
+            help='Количество проверок ведра на каждый способ.',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=300,
+            help='Количество запросов к выдаче токена на каждый режим.',
+        )
+
+    def time_calls(self, count, call):
+        started = time.perf_counter()
+        for index in range(count):
+            call(index)
+        return (time.perf_counter() - started) / count * 1e6
+
+    def build_request(self, index):
+        request = Request(
+            APIRequestFactory().post(
+                '/api/v1/auth/token/',
+                {'username': f'user{index}'},
+                format='json',
+                REMOTE_ADDR=f'10.{index // 65536 % 256}.'
+                            f'{index // 256 % 256}.{index % 256}',
+            ),
+            parsers=[JSONParser()],
+        )
+        # Тело разбирается заранее, замеряется только проверка вёдер.
+        request.data
+        return request
+
+    def token_requests(self, count, rates):
+        client = Client()
+        rest_framework = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': rates,
+        }
+        latencies = []
+        with override_settings(REST_FRAMEWORK=rest_framework):
+            started = time.perf_counter()
+            for index in range(count):
+                request_started = time.perf_counter()
+                client.post(
+                    '/api/v1/auth/token/',
+                    {'username': f'nobody{index}', 'confirmation_code': '1'},
+                    REMOTE_ADDR=f'10.0.{index // 256 % 256}.{index % 256}',
+                )
+                latencies.append(time.perf_counter() - request_started)
+        return summarize(latencies, time.perf_counter() - started)
+
+    def handle(self, *args, **options):
+        checks = options['checks']
+        self.stdout.write(f'Проверка ведра, мкс ({checks} разных ключей):')
+        for name, take in (('кеш', take_shared), ('процесс', take_local)):
+            cost = self.time_calls(
+                checks,
+                lambda index: take(f'benchmark:{index}', 5, 1, time.time()),
+            )
+            self.stdout.write(f'{name:>15}: {cost:.1f}')
+        requests = [self.build_request(index) for index in range(checks)]
+        throttles = (AuthIPThrottle(), AuthUsernameThrottle())
+        cost = self.time_calls(
+            checks,
+            lambda index: [
+                throttle.allow_request(requests[index], None)
+                for throttle in throttles
+            ],
+        )
+        self.stdout.write(f'{"адрес и имя":>15}: {cost:.1f}')
+        self.stdout.write(
+            f'POST /api/v1/auth/token/, {options["requests"]} запросов, мс:'
+        )
+        for name, rates in (
+            ('без лимитов', {}),
+            ('с лимитами', settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']),
+        ):
+            report = self.token_requests(options['requests'], rates)
+            self.stdout.write(
+                f'{name:>15}: среднее {report["mean"]:.2f}, '
+                f'p95 {report["p95"]:.2f}'
+            )
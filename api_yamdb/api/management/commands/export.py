@@ -0,0 +1,64 @@
+import time
+from pathlib import Path
+
+from api.export import DATASETS, FORMATS, export
+from django.core.management import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Потоковая выгрузка таблиц в csv (формат команды load) "
+        "или NDJSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--datasets',
+            nargs='+',
+            choices=list(DATASETS),
+            default=list(DATASETS),
+            help='Какие таблицы выгрузить.',
+        )
+        parser.add_argument(
+            '--output',
+            type=Path,
+            default=Path('.'),
+            help='Каталог для файлов.',
+        )
+        parser.add_argument(
+            '--format',
+            choices=list(FORMATS),
+            default='csv',
+            help='Формат файлов.',
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Сжимать файлы в gzip.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help='Строк в пачке курсора (по умолчанию EXPORT_CHUNK_SIZE).',
+        )
+
+    def handle(self, *args, **options):
+        options['output'].mkdir(parents=True, exist_ok=True)
+        for dataset in options['datasets']:
+            filename = f'{dataset}.{options["format"]}'
+            if options['gzip']:
+                filename += '.gz'
+            path = options['output'] / filename
+            started = time.monotonic()
+            with open(path, 'wb') as file:
+                for part in export(
+                    dataset,
+                    options['format'],
+                    compress=options['gzip'],
+                    chunk_size=options['chunk_size'],
+                ):
+                    file.write(part)
+            self.stdout.write(
+                f'{path}: {path.stat().st_size} байт '
+                f'за {time.monotonic() - started:.2f} с'
+            )
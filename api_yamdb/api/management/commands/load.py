@@ -1,200 +1,547 @@
 import logging
 import os
 import sys
-from csv import DictReader
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from itertools import islice
+from pathlib import Path
+from queue import Full, Queue
 
+from api.cache import invalidate
+from api.leaderboards import refresh as refresh_leaderboards
+from api.management import copy_engine
+from api.management.checkpoints import CsvSource, SharedCsvSource, sha256
 from django.conf import settings
 from django.core.management import BaseCommand
+from django.core.management.color import no_style
+from django.db import connection, transaction
 from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
                             Title, User)
 
 DATA_DIR = settings.BASE_DIR / 'static/data'
+BATCH_SIZE = 1000
+WORKERS = 4
+QUEUE_SIZE = 2
+QUEUE_TIMEOUT = 1
+# Ключ уникальности строки: по нему выбирается шард.
+SHARD_KEYS = {
+    'review': ('title_id', 'author'),
+    'comments': ('author', 'review_id'),
+}
+
+Stage = namedtuple(
+    'Stage',
+    ('name', 'model', 'filename', 'description', 'depends', 'sharded'),
+)
+STAGES = (
+    Stage('category', Category, 'category.csv', 'категорий', (), False),
+    Stage('users', User, 'users.csv', 'пользователей', (), False),
+    Stage('genre', Genre, 'genre.csv', 'жанров', (), False),
+    Stage('titles', Title, 'titles.csv', 'тайтлов', ('category',), False),
+    Stage(
+        'genre_title',
+        GenreTitle,
+        'genre_title.csv',
+        'жанров для тайтлов',
+        ('genre', 'titles'),
+        False,
+    ),
+    Stage(
+        'review',
+        Review,
+        'review.csv',
+        'отзывов',
+        ('titles', 'users'),
+        True,
+    ),
+    Stage(
+        'comments',
+        Comment,
+        'comments.csv',
+        'комментариев',
+        ('review', 'users'),
+        True,
+    ),
+)
+
+logger = logging.getLogger(__name__)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+
+@contextmanager
+def keep_dates(*models):
+    """Не даёт auto_now_add заменить даты из файла временем загрузки.
+
+    bulk_create вызывает pre_save полей, и pub_date из csv перезаписывается.
+    Флаг снимается на всю загрузку, а не на пачку: потоки этапов и шардов
+    пишут в одни и те же модели.
+    """
+    fields = [
+        field
+        for model in models
+        for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def ids(model):
+    return set(model.objects.values_list('id', flat=True))
+
+
+def shard_of(row, fields, count):
+    """Строки с одним ключом уникальности всегда попадают в один шард."""
+    return hash(tuple(int(row[field]) for field in fields)) % count
+
+
+def put(batches, writer, item):
+    """Кладёт пачку в очередь шарда; False, если писатель уже остановился."""
+    while not writer.done():
+        try:
+            batches.put(item, timeout=QUEUE_TIMEOUT)
+            return True
+        except Full:
+            pass
+    return False
 
 
 class Command(BaseCommand):
     help = "Загрузка данных из csv"
 
-    def fill_category(self):
-        if not os.path.exists(DATA_DIR / 'category.csv'):
-            raise FileNotFoundError(
-                f'Файл для загрузки категорий не найден в {DATA_DIR}\n'
-                'Проверьте, что файл category.csv существует.'
-            )
-        rows = DictReader(open(DATA_DIR / 'category.csv', encoding='utf-8'))
-        for row in rows:
-            if not Category.objects.filter(slug=row['slug']).exists():
-                category = Category(
-                    id=row['id'], name=row['name'], slug=row['slug']
-                )
-                Category.save(category)
-            else:
-                logging.error(f'Категория {row["slug"]} уже существует!')
-
-        logging.debug('Загрузка данных о категории прошла успешно!')
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--data-dir',
+            type=Path,
+            default=DATA_DIR,
+            help='Каталог с csv-файлами.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Количество записей в одной вставке bulk_create.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=WORKERS,
+            help='Количество параллельно загружаемых файлов.',
+        )
+        parser.add_argument(
+            '--shards',
+            type=int,
+            default=None,
+            help=(
+                'Сколько потоков пишут review.csv и comments.csv; файл '
+                'читается один раз (по умолчанию равно --workers).'
+            ),
+        )
+        parser.add_argument(
+            '--delta',
+            action='store_true',
+            help=(
+                'Если файл дописан с прошлой загрузки, применять только '
+                'новые строки.'
+            ),
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Игнорировать контрольные точки и читать файлы с начала.',
+        )
+        parser.add_argument(
+            '--copy',
+            action='store_true',
+            help=(
+                'Загружать через COPY FROM STDIN (только PostgreSQL, '
+                'на других базах используется bulk_create).'
+            ),
+        )
 
-    def fill_genre_title(self):
-        if not os.path.exists(DATA_DIR / 'titles.csv'):
+    def get_path(self, filename, description):
+        path = self.data_dir / filename
+        if not os.path.exists(path):
             raise FileNotFoundError(
-                f'Файл для загрузки жанров для тайтлов не найден в {DATA_DIR}.'
-                'Проверьте, что файл genre_title.csv существует.'
+                f'Файл для загрузки {description} не найден в '
+                f'{self.data_dir}\n'
+                f'Проверьте, что файл {filename} существует.'
             )
-        rows = DictReader(open(DATA_DIR / 'genre_title.csv', encoding='utf-8'))
-        for row in rows:
-            if Genre.objects.filter(id=row['genre_id']).exists():
-                genre = Genre.objects.get(id=row['genre_id'])
-                if Title.objects.filter(id=row['title_id']).exists():
-                    title = Title.objects.get(id=row['title_id'])
-                    genretitle = GenreTitle(
-                        id=row['id'],
-                        title_id=title,
-                        genre_id=genre,
-                    )
-                    GenreTitle.save(genretitle)
-                else:
-                    logging.error('Не найдено произведение!')
-            else:
-                logging.error('Не найден жанр!')
+        return path
 
-        logging.debug('Загрузка данных о жанрах для тайтлов прошла успешно!')
+    def save(self, model, instances, description, source):
+        """Пишет объекты пачками по batch_size.
 
-    def fill_genre(self):
-        if not os.path.exists(DATA_DIR / 'genre.csv'):
-            raise FileNotFoundError(
-                f'Файл для загрузки жанров не найден в {DATA_DIR}\n'
-                'Проверьте, что файл genre.csv существует.'
+        Каждая пачка фиксируется в своей транзакции вместе с контрольной
+        точкой, так что прерванная загрузка продолжится со следующей.
+        """
+        started = time.monotonic()
+        total = 0
+        for chunk in chunked(instances, self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(chunk, batch_size=self.batch_size)
+                source.commit()
+            total += len(chunk)
+            elapsed = time.monotonic() - started
+            logger.info(
+                f'Загружено {description}: {total} '
+                f'({total / max(elapsed, 1e-6):.0f} записей/с)'
             )
-        rows = DictReader(open(DATA_DIR / 'genre.csv', encoding='utf-8'))
+        source.commit(completed=True)
+        logger.debug(f'Загрузка {description} прошла успешно!')
+        return total
+
+    def fill_category(self, rows):
+        existing = set(Category.objects.values_list('slug', flat=True))
         for row in rows:
-            if not Genre.objects.filter(slug=row['slug']).exists():
-                genre = Genre(id=row['id'], name=row['name'], slug=row['slug'])
-                Genre.save(genre)
-            else:
-                logging.error(f'Жанр {row["slug"]} уже существует!')
+            if row['slug'] in existing:
+                logger.error(f'Категория {row["slug"]} уже существует!')
+                continue
+            existing.add(row['slug'])
+            yield Category(id=row['id'], name=row['name'], slug=row['slug'])
 
-        logging.debug('Загрузка данных о жанрах прошла успешно!')
+    def fill_genre(self, rows):
+        existing = set(Genre.objects.values_list('slug', flat=True))
+        for row in rows:
+            if row['slug'] in existing:
+                logger.error(f'Жанр {row["slug"]} уже существует!')
+                continue
+            existing.add(row['slug'])
+            yield Genre(id=row['id'], name=row['name'], slug=row['slug'])
 
-    def fill_titles(self):
-        if not os.path.exists(DATA_DIR / 'titles.csv'):
-            raise FileNotFoundError(
-                f'Файл для загрузки тайтлов не найден в {DATA_DIR}\n'
-                'Проверьте, что файл titles.csv существует.'
-            )
-        rows = DictReader(open(DATA_DIR / 'titles.csv', encoding='utf-8'))
+    def fill_users(self, rows):
+        usernames = set(User.objects.values_list('username', flat=True))
+        emails = set(User.objects.values_list('email', flat=True))
         for row in rows:
-            if not Title.objects.filter(
-                name=row['name'], year=row['year']
-            ).exists():
-                title = Title(
-                    id=row['id'],
-                    name=row['name'],
-                    year=row['year'],
-                    category_id=row['category'],
+            if row['username'] in usernames or row['email'] in emails:
+                logger.error(
+                    f'Пользователь {row["username"]} '
+                    f'c почтой {row["email"]} уже существует'
                 )
-                Title.save(title)
-            else:
-                logging.error(
+                continue
+            usernames.add(row['username'])
+            emails.add(row['email'])
+            yield User(
+                id=row['id'],
+                username=row['username'],
+                email=row['email'],
+                role=row['role'],
+                bio=row['bio'],
+                first_name=row['first_name'],
+                last_name=row['last_name'],
+            )
+
+    def fill_titles(self, rows):
+        existing = set(Title.objects.values_list('name', 'year'))
+        category_ids = ids(Category)
+        for row in rows:
+            key = (row['name'], int(row['year']))
+            if key in existing:
+                logger.error(
                     f'Фильм - {row["name"]} {row["year"]} '
                     f'года выпуска уже существует!'
                 )
+                continue
+            category_id = int(row['category']) if row['category'] else None
+            if category_id is not None and category_id not in category_ids:
+                logger.error(f'Не найдена категория {category_id}!')
+                continue
+            existing.add(key)
+            yield Title(
+                id=row['id'],
+                name=row['name'],
+                year=row['year'],
+                category_id=category_id,
+            )
 
-        logging.debug('Загрузка данных о тайтлах прошла успешно!')
+    def fill_genre_title(self, rows):
+        existing = set(
+            GenreTitle.objects.values_list('title_id_id', 'genre_id_id')
+        )
+        genre_ids, title_ids = ids(Genre), ids(Title)
+        for row in rows:
+            key = (int(row['title_id']), int(row['genre_id']))
+            if key[1] not in genre_ids:
+                logger.error('Не найден жанр!')
+                continue
+            if key[0] not in title_ids:
+                logger.error('Не найдено произведение!')
+                continue
+            if key in existing:
+                continue
+            existing.add(key)
+            yield GenreTitle(
+                id=row['id'],
+                title_id_id=key[0],
+                genre_id_id=key[1],
+            )
 
-    def fill_users(self):
-        if not os.path.exists(DATA_DIR / 'users.csv'):
-            raise FileNotFoundError(
-                f'Файл для загрузки пользователей не найден в {DATA_DIR}\n'
-                'Проверьте, что файл users.csv существует.'
+    def fill_review(self, rows):
+        existing = set(Review.objects.values_list('title_id', 'author_id'))
+        user_ids, title_ids = ids(User), ids(Title)
+        for row in rows:
+            key = (int(row['title_id']), int(row['author']))
+            if key[0] not in title_ids or key[1] not in user_ids:
+                logger.error(
+                    f'Отзыв {row["id"]}: не найдено произведение '
+                    f'{key[0]} или автор {key[1]}!'
+                )
+                continue
+            if key in existing:
+                logger.error(
+                    f'Отзыв на произведение {key[0]} '
+                    f'от автора {key[1]} уже существует!'
+                )
+                continue
+            existing.add(key)
+            yield Review(
+                id=row['id'],
+                title_id=key[0],
+                text=row['text'],
+                author_id=key[1],
+                score=row['score'],
+                pub_date=row['pub_date'],
             )
-        rows = DictReader(open(DATA_DIR / 'users.csv', encoding='utf-8'))
+
+    def fill_comments(self, rows):
+        existing = set(Comment.objects.values_list('author_id', 'review_id'))
+        user_ids, review_ids = ids(User), ids(Review)
         for row in rows:
-            if not User.objects.filter(
-                username=row['username'], email=row['email']
-            ).exists():
-                user = User(
-                    id=row['id'],
-                    username=row['username'],
-                    email=row['email'],
-                    role=row['role'],
-                    bio=row['bio'],
-                    first_name=row['first_name'],
-                    last_name=row['last_name'],
+            key = (int(row['author']), int(row['review_id']))
+            if key[0] not in user_ids or key[1] not in review_ids:
+                logger.error(
+                    f'Комментарий {row["id"]}: не найден автор '
+                    f'{key[0]} или отзыв {key[1]}!'
                 )
-                User.save(user)
-            else:
-                logging.error(
-                    f'Пользователь {row["username"]} '
-                    f'c почтой {row["email"]} уже существует'
+                continue
+            if key in existing:
+                logger.error(
+                    f'Комментарий пользователя {key[0]} '
+                    f'к отзыву {key[1]} уже добавлен!'
+                )
+                continue
+            existing.add(key)
+            yield Comment(
+                id=row['id'],
+                review_id=key[1],
+                text=row['text'],
+                author_id=key[0],
+                pub_date=row['pub_date'],
+            )
+
+    def save_shard(self, model, source, batches, description):
+        """Пишет пачки шарда из очереди вместе с его контрольной точкой."""
+        started = time.monotonic()
+        total = 0
+        try:
+            for instances, offset, prefix_hash, completed in iter(
+                batches.get, None,
+            ):
+                with transaction.atomic():
+                    model.objects.bulk_create(
+                        instances, batch_size=self.batch_size,
+                    )
+                    source.rows_read += len(instances)
+                    source.save_checkpoint(offset, prefix_hash, completed)
+                total += len(instances)
+                elapsed = time.monotonic() - started
+                logger.info(
+                    f'Загружено {description}: {total} '
+                    f'({total / max(elapsed, 1e-6):.0f} записей/с)'
                 )
+        finally:
+            connection.close()
+        logger.debug(f'Загрузка {description} прошла успешно!')
+        return total
 
-        logging.debug('Загрузка данных о пользователях прошла успешно!')
+    def dispatch(self, stage, reader, queues, writers):
+        """Раскладывает объекты по шардам пачками по batch_size."""
+        buffers = [[] for _ in queues]
+        fill = getattr(self, f'fill_{stage.name}')
+        for instance in fill(reader):
+            index = reader.shard
+            buffers[index].append(instance)
+            if len(buffers[index]) < self.batch_size:
+                continue
+            if not put(
+                queues[index],
+                writers[index],
+                (buffers[index], *reader.position(), False),
+            ):
+                writers[index].result()
+            buffers[index] = []
+        for index, instances in enumerate(buffers):
+            if not put(
+                queues[index],
+                writers[index],
+                (instances, *reader.position(), True),
+            ):
+                writers[index].result()
 
-    def fill_review(self):
-        if not os.path.exists(DATA_DIR / 'review.csv'):
-            raise FileNotFoundError(
-                f'Файл для загрузки отзывов не найден в {DATA_DIR}\n'
-                'Проверьте, что файл review.csv существует.'
-            )
-        rows = DictReader(open(DATA_DIR / 'review.csv', encoding='utf-8'))
-        for row in rows:
-            author = User.objects.get(id=row['author'])
-            title = Title.objects.get(id=row['title_id'])
-            if not Review.objects.filter(title=title, author=author).exists():
-                review = Review(
-                    id=row['id'],
-                    title=title,
-                    text=row['text'],
-                    author=author,
-                    score=row['score'],
-                    pub_date=row['pub_date'],
+    def run_shards(self, stage):
+        """Файл читается один раз, объекты пишут потоки шардов.
+
+        Проверка связей и дубликатов выполняется при чтении, шард строки
+        выбирается по ключу уникальности. У каждого шарда своя контрольная
+        точка: чтение возобновляется с самой ранней из них.
+        """
+        path = self.get_path(stage.filename, stage.description)
+        file_hash = sha256(path).hexdigest()
+        names = [
+            f'{stage.filename} [{index + 1}/{self.shards}]'
+            for index in range(self.shards)
+        ]
+        sources = [
+            self.get_source(stage, name, file_hash=file_hash)
+            for name in names
+        ]
+        fields = SHARD_KEYS[stage.name]
+        reader = SharedCsvSource(
+            sources,
+            lambda row: shard_of(row, fields, self.shards),
+        )
+        if reader.unchanged:
+            logger.info(f'Файл {stage.filename} не изменился, пропускаем.')
+            return 0
+        queues = [Queue(maxsize=QUEUE_SIZE) for _ in sources]
+        with ThreadPoolExecutor(max_workers=self.shards) as executor:
+            writers = [
+                executor.submit(
+                    self.save_shard,
+                    stage.model,
+                    source,
+                    batches,
+                    f'{stage.description} [{index + 1}/{self.shards}]',
+                )
+                for index, (source, batches) in enumerate(
+                    zip(sources, queues),
                 )
-                Review.save(review)
-            else:
-                logging.error(
-                    f'Отзыв на произведение {title.name} '
-                    f'от автора {author.username} уже существует!'
+            ]
+            try:
+                self.dispatch(stage, reader, queues, writers)
+            finally:
+                for batches, writer in zip(queues, writers):
+                    put(batches, writer, None)
+        return sum(writer.result() for writer in writers)
+
+    def run_stage(self, stage):
+        """Загрузка файла; поток закрывает своё соединение."""
+        try:
+            if stage.sharded and self.shards > 1:
+                return self.run_shards(stage)
+            source = self.get_source(stage, stage.filename)
+            if source.unchanged:
+                logger.info(
+                    f'Файл {stage.filename} не изменился, пропускаем.'
                 )
+                return 0
+            fill = getattr(self, f'fill_{stage.name}')
+            return self.save(
+                stage.model, fill(source), stage.description, source,
+            )
+        finally:
+            if self.workers > 1:
+                connection.close()
 
-        logging.debug('Загрузка данных об отзывах прошла успешно!')
+    def get_source(self, stage, name, file_hash=None):
+        return CsvSource(
+            self.get_path(stage.filename, stage.description),
+            name,
+            delta=self.delta,
+            restart=self.restart,
+            file_hash=file_hash,
+        )
 
-    def fill_comments(self):
-        if not os.path.exists(DATA_DIR / 'review.csv'):
-            raise FileNotFoundError(
-                f'Файл для загрузки комментариев не найден в {DATA_DIR}\n'
-                'Проверьте, что файл comments.csv существует.'
+    def run_pipeline(self):
+        """Запускает этапы, как только загружены все их зависимости."""
+        pending = list(STAGES)
+        done = set()
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while pending or running:
+                for stage in [
+                    stage for stage in pending
+                    if set(stage.depends) <= done
+                ]:
+                    pending.remove(stage)
+                    running[stage.name] = executor.submit(
+                        self.run_stage, stage,
+                    )
+                wait(running.values(), return_when=FIRST_COMPLETED)
+                for name, future in list(running.items()):
+                    if future.done():
+                        future.result()
+                        del running[name]
+                        done.add(name)
+
+    def run_copy(self):
+        """Последовательно загружает файлы через COPY и слияние в SQL."""
+        for stage in STAGES:
+            started = time.monotonic()
+            source = self.get_source(stage, stage.filename)
+            if source.unchanged:
+                logger.info(f'Файл {stage.filename} не изменился, пропускаем.')
+                continue
+            staged, inserted = copy_engine.copy_file(stage.name, source)
+            elapsed = time.monotonic() - started
+            logger.info(
+                f'Загружено {stage.description}: {inserted} из {staged} '
+                f'({staged / max(elapsed, 1e-6):.0f} записей/с)'
             )
-        rows = DictReader(open(DATA_DIR / 'comments.csv', encoding='utf-8'))
-        for row in rows:
-            author = User.objects.get(id=row['author'])
-            review = Review.objects.get(id=row['review_id'])
-            if not Comment.objects.filter(
-                author=author, review=review
-            ).exists():
-                comment = Comment(
-                    id=row['id'],
-                    review=review,
-                    text=row['text'],
-                    author=author,
-                    pub_date=row['pub_date'],
-                )
-                Comment.save(comment)
-            else:
-                logging.error(
-                    f'Комментарий пользователя {author.username} '
-                    f'к обзору на произведение {review.title.name} '
-                    f'уже добавлен!'
+            if inserted < staged:
+                logger.error(
+                    f'Пропущено {stage.description}: {staged - inserted} '
+                    '(дубликаты или отсутствующие связи)'
                 )
 
-        logging.debug('Загрузка данных об отзывах прошла успешно!')
+    def reset_sequences(self):
+        """После вставки с явными id сдвигает счётчики первичных ключей."""
+        statements = connection.ops.sequence_reset_sql(
+            no_style(),
+            [stage.model for stage in STAGES],
+        )
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
 
     def handle(self, *args, **options):
-        logger = logging.getLogger(__name__)
         logger.setLevel(logging.DEBUG)
         handler = logging.StreamHandler(stream=sys.stdout)
         logger.addHandler(hdlr=handler)
-        self.fill_category()
-        self.fill_users()
-        self.fill_genre()
-        self.fill_titles()
-        self.fill_genre_title()
-        self.fill_review()
-        self.fill_comments()
+        self.data_dir = options['data_dir']
+        self.batch_size = options['batch_size']
+        self.workers = max(options['workers'], 1)
+        self.shards = max(options['shards'] or self.workers, 1)
+        if connection.vendor == 'sqlite' and (
+            self.workers > 1 or self.shards > 1
+        ):
+            logger.info('SQLite не поддерживает параллельную запись.')
+            self.workers = self.shards = 1
+        self.delta, self.restart = options['delta'], options['restart']
+        started = time.monotonic()
+        if options['copy'] and copy_engine.is_supported():
+            self.run_copy()
+        else:
+            if options['copy']:
+                logger.info('COPY доступен только для PostgreSQL.')
+            with keep_dates(Review, Comment):
+                self.run_pipeline()
+        self.reset_sequences()
+        Title.objects.rebuild_rating()
+        refresh_leaderboards()
+        invalidate()
+        logger.info(f'Импорт завершён за {time.monotonic() - started:.1f} с')
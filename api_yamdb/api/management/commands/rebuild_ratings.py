@@ -0,0 +1,73 @@
+from api.cache import invalidate
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Q, Sum
+from django.db.models.functions import Cast, Coalesce, NullIf
+from reviews.models import SCORES, Title
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчёт или проверка хранимых рейтингов и гистограмм оценок "
+        "произведений"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить рейтинги, ничего не изменяя.',
+        )
+
+    def find_mismatches(self):
+        """Произведения, у которых рейтинг или гистограмма оценок устарели."""
+        histogram = {
+            f'actual_{score}': Count('reviews', filter=Q(reviews__score=score))
+            for score in SCORES
+        }
+        return Title.objects.annotate(
+            actual_sum=Coalesce(Sum('reviews__score'), 0),
+            actual_count=Count('reviews'),
+            **histogram,
+            **{
+                f'stored_{score}': Coalesce(f'scores__score_{score}', 0)
+                for score in SCORES
+            },
+        ).annotate(
+            # Без отзывов рейтинг NULL: сравниваем через Coalesce,
+            # иначе NULL = NULL не считался бы совпадением.
+            stored_rating=Coalesce('rating', -1.0),
+            actual_rating=Coalesce(
+                Cast('actual_sum', FloatField()) / NullIf('actual_count', 0),
+                -1.0,
+            ),
+        ).exclude(
+            score_sum=F('actual_sum'),
+            reviews_count=F('actual_count'),
+            stored_rating=F('actual_rating'),
+            **{f'stored_{score}': F(f'actual_{score}') for score in SCORES},
+        )
+
+    def handle(self, *args, **options):
+        if options['check']:
+            mismatches = self.find_mismatches()
+            for title in mismatches:
+                self.stdout.write(
+                    f'{title.pk} {title.name}: '
+                    f'{title.score_sum}/{title.reviews_count} != '
+                    f'{title.actual_sum}/{title.actual_count}, '
+                    f'рейтинг {title.rating}'
+                )
+            if mismatches:
+                raise CommandError(
+                    'Рейтинги или гистограммы оценок расходятся у '
+                    f'{len(mismatches)} произведений.'
+                )
+            self.stdout.write('Рейтинги актуальны.')
+            return
+        with transaction.atomic():
+            updated = Title.objects.rebuild_rating()
+        invalidate('titles')
+        self.stdout.write(
+            f'Пересчитаны рейтинг и гистограмма {updated} произведений.'
+        )
@@ -0,0 +1,32 @@
+from api.leaderboards import BUILDERS, refresh
+from django.core.management import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Пересчёт материализованных рейтингов произведений"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--board',
+            choices=list(BUILDERS),
+            nargs='+',
+            help='Какие рейтинги пересчитать (по умолчанию все).',
+        )
+        parser.add_argument(
+            '--size',
+            type=int,
+            help='Количество позиций в каждом срезе.',
+        )
+        parser.add_argument(
+            '--window',
+            type=int,
+            help='Окно популярности в часах.',
+        )
+
+    def handle(self, *args, **options):
+        written = refresh(
+            boards=options['board'],
+            size=options['size'],
+            window=options['window'],
+        )
+        self.stdout.write(f'Записано {written} позиций рейтингов.')
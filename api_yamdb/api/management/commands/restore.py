@@ -0,0 +1,51 @@
+import time
+from pathlib import Path
+
+from api.cache import invalidate
+from api.leaderboards import refresh as refresh_leaderboards
+from api.management.snapshot import BATCH_SIZE, SnapshotError, restore
+from django.core.management import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Восстановление таблиц приложения reviews из снимка команды "
+        "snapshot. Текущие данные этих таблиц и ссылающихся на них "
+        "удаляются"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=Path, help='Файл снимка.')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Строк в одном INSERT.',
+        )
+        parser.add_argument(
+            '--no-input',
+            action='store_false',
+            dest='interactive',
+            help='Не спрашивать подтверждения.',
+        )
+
+    def handle(self, *args, **options):
+        if options['interactive'] and input(
+            'Данные пользователей, произведений, отзывов и комментариев '
+            'будут заменены снимком. Продолжить? (yes/no): '
+        ) != 'yes':
+            raise CommandError('Восстановление отменено.')
+        started = time.monotonic()
+        try:
+            with open(options['path'], 'rb') as file:
+                counts = restore(file, batch_size=options['batch_size'])
+        except SnapshotError as error:
+            raise CommandError(error)
+        refresh_leaderboards()
+        invalidate()
+        for label, count in counts.items():
+            self.stdout.write(f'{label}: {count}')
+        self.stdout.write(
+            f'Восстановлено {sum(counts.values())} строк '
+            f'за {time.monotonic() - started:.2f} с'
+        )
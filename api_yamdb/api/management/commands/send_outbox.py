@@ -0,0 +1,70 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from api.outbox import claim, deliver, record
+from django.conf import settings
+from django.core.management import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Отправка писем из очереди OutboxEmail"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Потоков отправки, у каждого своё соединение с почтой.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Писем, захватываемых из очереди за раз.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Пауза в секундах, когда очередь пуста.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Отправить готовые письма и завершиться.',
+        )
+
+    def process_batch(self, executor):
+        started = time.monotonic()
+        emails = claim(self.batch_size, settings.OUTBOX_LEASE)
+        if not emails:
+            return 0
+        chunks = [
+            emails[index::self.workers] for index in range(self.workers)
+        ]
+        results = {}
+        for chunk_results in executor.map(deliver, filter(None, chunks)):
+            results.update(chunk_results)
+        record(
+            emails,
+            results,
+            settings.OUTBOX_MAX_ATTEMPTS,
+            settings.OUTBOX_RETRY_DELAY,
+        )
+        errors = sum(error is not None for error in results.values())
+        self.stdout.write(
+            f'Отправлено {len(emails) - errors}, ошибок {errors} '
+            f'за {time.monotonic() - started:.2f} с'
+        )
+        return len(emails)
+
+    def handle(self, *args, **options):
+        self.workers = max(options['workers'], 1)
+        self.batch_size = options['batch_size']
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while True:
+                if self.process_batch(executor):
+                    continue
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
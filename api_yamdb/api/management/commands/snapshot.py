@@ -0,0 +1,40 @@
+import time
+from pathlib import Path
+
+from api.management.snapshot import BLOCK_ROWS, dump
+from django.core.management import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Снимок таблиц приложения reviews в колоночный бинарный файл "
+        "для быстрого восстановления командой restore"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=Path, help='Файл снимка.')
+        parser.add_argument(
+            '--compress',
+            action='store_true',
+            help='Сжимать колонки zlib.',
+        )
+        parser.add_argument(
+            '--block-rows',
+            type=int,
+            default=BLOCK_ROWS,
+            help='Строк в одном блоке колонок.',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        with open(options['path'], 'wb') as file:
+            counts = dump(
+                file,
+                compress=options['compress'],
+                block_rows=options['block_rows'],
+            )
+        self.stdout.write(
+            f'{options["path"]}: {sum(counts.values())} строк, '
+            f'{options["path"].stat().st_size} байт '
+            f'за {time.monotonic() - started:.2f} с'
+        )
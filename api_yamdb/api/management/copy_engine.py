@@ -0,0 +1,160 @@
+"""Загрузка CSV через COPY FROM STDIN для PostgreSQL.
+
+Каждый файл копируется во временную таблицу с текстовыми колонками,
+после чего одним INSERT ... SELECT переносится в рабочую таблицу:
+внешние ключи проверяются соединением с родительскими таблицами,
+дубликаты отбрасываются через DISTINCT ON, NOT EXISTS и ON CONFLICT.
+"""
+from csv import reader
+
+from django.db import connection, transaction
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
+
+MERGE_SQL = {
+    'category': '''
+        INSERT INTO {category} (id, name, slug)
+        SELECT DISTINCT ON (s.slug) s.id::bigint, s.name, s.slug
+        FROM {staging} s
+        WHERE NOT EXISTS (SELECT 1 FROM {category} c WHERE c.slug = s.slug)
+        ORDER BY s.slug, s.id::bigint
+        ON CONFLICT DO NOTHING
+    ''',
+    'genre': '''
+        INSERT INTO {genre} (id, name, slug)
+        SELECT DISTINCT ON (s.slug) s.id::bigint, s.name, s.slug
+        FROM {staging} s
+        WHERE NOT EXISTS (SELECT 1 FROM {genre} g WHERE g.slug = s.slug)
+        ORDER BY s.slug, s.id::bigint
+        ON CONFLICT DO NOTHING
+    ''',
+    'users': '''
+        INSERT INTO {users} (
+            id, username, email, role, bio, first_name, last_name,
+            password, is_superuser, is_staff, is_active, date_joined,
+            token_version
+        )
+        SELECT
+            s.id::bigint, s.username, s.email, COALESCE(s.role, ''),
+            COALESCE(s.bio, ''), COALESCE(s.first_name, ''),
+            COALESCE(s.last_name, ''), '', false, false, true, now(), 0
+        FROM {staging} s
+        ORDER BY s.id::bigint
+        ON CONFLICT DO NOTHING
+    ''',
+    'titles': '''
+        INSERT INTO {titles} (
+            id, name, year, category_id, reviews_count, score_sum, modified
+        )
+        SELECT DISTINCT ON (s.name, s.year::smallint)
+            s.id::bigint, s.name, s.year::smallint, c.id, 0, 0, now()
+        FROM {staging} s
+        LEFT JOIN {category} c ON c.id = NULLIF(s.category, '')::bigint
+        WHERE (NULLIF(s.category, '') IS NULL OR c.id IS NOT NULL)
+        AND NOT EXISTS (
+            SELECT 1 FROM {titles} t
+            WHERE t.name = s.name AND t.year = s.year::smallint
+        )
+        ORDER BY s.name, s.year::smallint, s.id::bigint
+        ON CONFLICT DO NOTHING
+    ''',
+    'genre_title': '''
+        INSERT INTO {genre_title} (id, title_id_id, genre_id_id)
+        SELECT DISTINCT ON (t.id, g.id) s.id::bigint, t.id, g.id
+        FROM {staging} s
+        JOIN {titles} t ON t.id = s.title_id::bigint
+        JOIN {genre} g ON g.id = s.genre_id::bigint
+        WHERE NOT EXISTS (
+            SELECT 1 FROM {genre_title} gt
+            WHERE gt.title_id_id = t.id AND gt.genre_id_id = g.id
+        )
+        ORDER BY t.id, g.id, s.id::bigint
+        ON CONFLICT DO NOTHING
+    ''',
+    'review': '''
+        INSERT INTO {review} (id, title_id, text, author_id, score, pub_date)
+        SELECT
+            s.id::bigint, t.id, s.text, u.id, s.score::smallint,
+            COALESCE(NULLIF(s.pub_date, '')::timestamptz, now())
+        FROM {staging} s
+        JOIN {titles} t ON t.id = s.title_id::bigint
+        JOIN {users} u ON u.id = s.author::bigint
+        ORDER BY s.id::bigint
+        ON CONFLICT DO NOTHING
+    ''',
+    'comments': '''
+        INSERT INTO {comments} (id, review_id, text, author_id, pub_date)
+        SELECT DISTINCT ON (u.id, r.id)
+            s.id::bigint, r.id, s.text, u.id,
+            COALESCE(NULLIF(s.pub_date, '')::timestamptz, now())
+        FROM {staging} s
+        JOIN {review} r ON r.id = s.review_id::bigint
+        JOIN {users} u ON u.id = s.author::bigint
+        WHERE NOT EXISTS (
+            SELECT 1 FROM {comments} c
+            WHERE c.author_id = u.id AND c.review_id = r.id
+        )
+        ORDER BY u.id, r.id, s.id::bigint
+        ON CONFLICT DO NOTHING
+    ''',
+}
+
+TABLES = {
+    'category': Category,
+    'users': User,
+    'genre': Genre,
+    'titles': Title,
+    'genre_title': GenreTitle,
+    'review': Review,
+    'comments': Comment,
+}
+
+
+def is_supported():
+    return connection.vendor == 'postgresql'
+
+
+def staging_sql(stage_name, header):
+    """Имя временной таблицы и её создание по заголовку csv."""
+    quote = connection.ops.quote_name
+    staging = quote(f'staging_{stage_name}')
+    columns = ', '.join(
+        f'{quote(name)} text'
+        for name in next(reader([header.decode('utf-8')]))
+    )
+    return staging, (
+        f'CREATE TEMPORARY TABLE {staging} ({columns}) ON COMMIT DROP'
+    )
+
+
+def merge_sql(stage_name, staging):
+    """INSERT ... SELECT из временной таблицы в рабочую."""
+    quote = connection.ops.quote_name
+    tables = {
+        name: quote(model._meta.db_table) for name, model in TABLES.items()
+    }
+    return MERGE_SQL[stage_name].format(staging=staging, **tables)
+
+
+def copy_file(stage_name, source):
+    """Копирует файл в staging и переносит его в рабочую таблицу.
+
+    Копирование начинается с контрольной точки source, если она есть.
+    Возвращает пару (строк скопировано, строк добавлено).
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        with open(source.path, 'rb') as file:
+            header = file.readline()
+            staging, create = staging_sql(stage_name, header)
+            cursor.execute(create)
+            file.seek(max(source.start, len(header)))
+            cursor.cursor.copy_expert(
+                f'COPY {staging} FROM STDIN WITH (FORMAT csv)',
+                file,
+            )
+        cursor.execute(f'SELECT count(*) FROM {staging}')
+        staged = cursor.fetchone()[0]
+        cursor.execute(merge_sql(stage_name, staging))
+        inserted = cursor.rowcount
+        source.commit_file(staged)
+    return staged, inserted
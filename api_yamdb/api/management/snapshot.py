@@ -0,0 +1,310 @@
+"""Бинарный снимок таблиц приложения reviews для команд snapshot и restore.
+
+Файл начинается с MAGIC, версии формата и флага сжатия. Дальше для каждой
+таблицы идёт заголовок в JSON (модель, колонки с типами) и блоки по
+BLOCK_ROWS строк. Блок хранит колонки подряд: числа, даты и флаги —
+массивами array в little-endian, строки — массивом длин в байтах и
+склеенным utf-8. Для колонок с null перед значениями идёт байт на строку.
+Каждая колонка блока может быть сжата zlib. Таблица заканчивается блоком
+из нуля строк, файл — пустым заголовком.
+
+Права, группы и журнал админки в снимок не входят. Контрольные точки
+команды load при восстановлении сбрасываются: они описывают прежние данные.
+"""
+import json
+import struct
+import sys
+import zlib
+from array import array
+from datetime import date, datetime, timedelta, timezone
+from itertools import islice
+
+from api.models import ImportCheckpoint
+from django.apps import apps
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+MAGIC = b'YAMDBSNP'
+VERSION = 1
+BLOCK_ROWS = 10000
+BATCH_SIZE = 1000
+LENGTH = struct.Struct('<I')
+HEADER = struct.Struct('<BB')
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+# Внутренний тип поля Django -> код колонки.
+TYPES = {
+    'AutoField': 'i',
+    'BigAutoField': 'i',
+    'BigIntegerField': 'i',
+    'IntegerField': 'i',
+    'PositiveIntegerField': 'i',
+    'PositiveSmallIntegerField': 'i',
+    'SmallIntegerField': 'i',
+    'FloatField': 'f',
+    'BooleanField': 'b',
+    'CharField': 's',
+    'SlugField': 's',
+    'TextField': 's',
+    'DateTimeField': 't',
+    'DateField': 'd',
+}
+# Код колонки -> (тип array, в число, из числа).
+CODECS = {
+    'i': ('q', int, None),
+    'f': ('d', float, None),
+    'b': ('b', int, bool),
+    't': (
+        'q',
+        lambda value: (value - EPOCH) // MICROSECOND,
+        lambda value: EPOCH + value * MICROSECOND,
+    ),
+    'd': ('i', date.toordinal, date.fromordinal),
+}
+# Методы connection.ops, приводящие даты к виду для драйвера базы.
+ADAPTERS = {
+    't': 'adapt_datetimefield_value',
+    'd': 'adapt_datefield_value',
+}
+
+
+class SnapshotError(Exception):
+    """Файл не является снимком или снят с другой схемы."""
+
+
+def ordered_models():
+    """Модели reviews так, чтобы связанные таблицы шли раньше."""
+    pending = list(apps.get_app_config('reviews').get_models())
+    ordered = []
+    while pending:
+        for model in pending:
+            depends = {
+                field.related_model
+                for field in model._meta.concrete_fields
+                if field.is_relation
+            }
+            if not depends & (set(pending) - {model}):
+                break
+        # При цикле берётся последняя модель: внешние ключи в Django
+        # проверяются при фиксации транзакции.
+        pending.remove(model)
+        ordered.append(model)
+    return ordered
+
+
+def column_type(field):
+    while field.is_relation:
+        field = field.target_field
+    internal = field.get_internal_type()
+    if internal not in TYPES:
+        raise SnapshotError(f'Тип поля {internal} не поддерживается.')
+    return TYPES[internal]
+
+
+def get_columns(model):
+    return [
+        [field.attname, column_type(field), field.null]
+        for field in model._meta.concrete_fields
+    ]
+
+
+def little_endian(numbers):
+    if sys.byteorder == 'big':
+        numbers.byteswap()
+    return numbers
+
+
+def encode(values, code, nullable):
+    if code == 's':
+        encoded = [
+            None if value is None else value.encode() for value in values
+        ]
+        lengths = array('i', [
+            -1 if value is None else len(value) for value in encoded
+        ])
+        return little_endian(lengths).tobytes() + b''.join(
+            value for value in encoded if value
+        )
+    typecode, to_number, _ = CODECS[code]
+    numbers = little_endian(array(typecode, [
+        0 if value is None else to_number(value) for value in values
+    ])).tobytes()
+    if not nullable:
+        return numbers
+    return bytes(value is None for value in values) + numbers
+
+
+def decode(data, code, nullable, rows):
+    if code == 's':
+        lengths = array('i')
+        lengths.frombytes(data[:lengths.itemsize * rows])
+        position = lengths.itemsize * rows
+        values = []
+        for length in little_endian(lengths):
+            if length < 0:
+                values.append(None)
+                continue
+            values.append(str(data[position:position + length], 'utf-8'))
+            position += length
+        return values
+    typecode, _, from_number = CODECS[code]
+    mask = data[:rows] if nullable else None
+    numbers = array(typecode)
+    numbers.frombytes(data[rows:] if nullable else data)
+    values = list(little_endian(numbers))
+    if from_number is not None:
+        values = [from_number(value) for value in values]
+    if mask is None:
+        return values
+    return [None if null else value for value, null in zip(values, mask)]
+
+
+def write_part(file, data):
+    file.write(LENGTH.pack(len(data)))
+    file.write(data)
+
+
+def read_part(file):
+    (length,) = LENGTH.unpack(file.read(LENGTH.size))
+    data = file.read(length)
+    if len(data) != length:
+        raise SnapshotError('Снимок обрезан.')
+    return data
+
+
+def dump(file, compress=False, block_rows=BLOCK_ROWS):
+    """Пишет таблицы reviews в открытый бинарный файл; строк по моделям."""
+    file.write(MAGIC + HEADER.pack(VERSION, compress))
+    counts = {}
+    for model in ordered_models():
+        columns = get_columns(model)
+        write_part(file, json.dumps({
+            'model': model._meta.label,
+            'columns': columns,
+        }).encode())
+        rows = model._base_manager.order_by('pk').values_list(
+            *[name for name, _, _ in columns],
+        ).iterator(chunk_size=block_rows)
+        counts[model._meta.label] = 0
+        block = list(islice(rows, block_rows))
+        while block:
+            file.write(LENGTH.pack(len(block)))
+            for (_, code, nullable), values in zip(columns, zip(*block)):
+                data = encode(values, code, nullable)
+                write_part(file, zlib.compress(data) if compress else data)
+            counts[model._meta.label] += len(block)
+            block = list(islice(rows, block_rows))
+        file.write(LENGTH.pack(0))
+    write_part(file, b'')
+    return counts
+
+
+def read_blocks(file, columns, compressed):
+    """Блоки таблицы: списки значений по колонкам снимка."""
+    while True:
+        (rows,) = LENGTH.unpack(file.read(LENGTH.size))
+        if not rows:
+            return
+        values = []
+        for _, code, nullable in columns:
+            data = read_part(file)
+            if compressed:
+                data = zlib.decompress(data)
+            values.append(decode(memoryview(data), code, nullable, rows))
+        yield values
+
+
+def insert(model, rows, batch_size):
+    """Многострочный INSERT: bulk_create перезаписал бы поля auto_now_add."""
+    fields = model._meta.concrete_fields
+    quote = connection.ops.quote_name
+    prefix = 'INSERT INTO {} ({}) VALUES '.format(
+        quote(model._meta.db_table),
+        ', '.join(quote(field.column) for field in fields),
+    )
+    row_sql = '({})'.format(', '.join(['%s'] * len(fields)))
+    batch_size = max(
+        min(batch_size, connection.ops.bulk_batch_size(fields, rows)),
+        1,
+    )
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            cursor.execute(
+                prefix + ', '.join([row_sql] * len(batch)),
+                [value for row in batch for value in row],
+            )
+
+
+def clear():
+    """Очищает таблицы reviews, ссылающиеся на них и контрольные точки.
+
+    Иначе load после restore счёл бы файлы уже загруженными и пропустил их.
+    """
+    tables = [
+        model._meta.db_table
+        for model in apps.get_app_config('reviews').get_models(
+            include_auto_created=True,
+        )
+    ]
+    tables.append(ImportCheckpoint._meta.db_table)
+    statements = connection.ops.sql_flush(
+        no_style(),
+        tables,
+        allow_cascade=True,
+    )
+    connection.ops.execute_sql_flush(statements)
+
+
+def reset_sequences():
+    statements = connection.ops.sequence_reset_sql(
+        no_style(),
+        ordered_models(),
+    )
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def read_header(file):
+    if file.read(len(MAGIC)) != MAGIC:
+        raise SnapshotError('Файл не является снимком базы.')
+    version, compressed = HEADER.unpack(file.read(HEADER.size))
+    if version != VERSION:
+        raise SnapshotError(f'Версия снимка {version} не поддерживается.')
+    return compressed
+
+
+@transaction.atomic
+def restore(file, batch_size=BATCH_SIZE):
+    """Заменяет таблицы reviews данными снимка; строк по моделям."""
+    compressed = read_header(file)
+    clear()
+    counts = {}
+    table = read_part(file)
+    while table:
+        header = json.loads(table)
+        model = apps.get_model(header['model'])
+        if header['columns'] != get_columns(model):
+            raise SnapshotError(
+                f'Колонки {header["model"]} в снимке не совпадают '
+                'с текущей схемой, примените миграции или снимите '
+                'снимок заново.'
+            )
+        adapters = [
+            getattr(connection.ops, ADAPTERS[code]) if code in ADAPTERS
+            else None
+            for _, code, _ in header['columns']
+        ]
+        counts[header['model']] = 0
+        for values in read_blocks(file, header['columns'], compressed):
+            for index, adapt in enumerate(adapters):
+                if adapt is not None:
+                    values[index] = [adapt(value) for value in values[index]]
+            rows = list(zip(*values))
+            insert(model, rows, batch_size)
+            counts[header['model']] += len(rows)
+        table = read_part(file)
+    reset_sequences()
+    return counts
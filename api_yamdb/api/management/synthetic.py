@@ -0,0 +1,192 @@
+"""Синтетические каталоги для команд benchmark_*.
+
+Каталог строится из моделей reviews с явными id, поэтому его можно
+и записать в базу через bulk_create, и выгрузить в csv того же формата,
+что читает команда load.
+"""
+import csv
+from collections import namedtuple
+from datetime import timedelta
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
+
+BATCH_SIZE = 1000
+
+Scale = namedtuple(
+    'Scale',
+    ('titles', 'categories', 'genres', 'users', 'reviews', 'comments'),
+)
+# reviews — отзывов на произведение, comments — комментариев на отзыв.
+SCALES = {
+    'small': Scale(200, 5, 20, 100, 5, 1),
+    'medium': Scale(2000, 10, 50, 500, 10, 2),
+    'large': Scale(20000, 20, 100, 2000, 10, 2),
+}
+
+# Порядок таблиц совпадает с зависимостями между ними.
+MODELS = {
+    'category': Category,
+    'users': User,
+    'genre': Genre,
+    'titles': Title,
+    'genre_title': GenreTitle,
+    'review': Review,
+    'comments': Comment,
+}
+COLUMNS = {
+    'category': lambda obj: {
+        'id': obj.id,
+        'name': obj.name,
+        'slug': obj.slug,
+    },
+    'users': lambda obj: {
+        'id': obj.id,
+        'username': obj.username,
+        'email': obj.email,
+        'role': obj.role,
+        'bio': obj.bio,
+        'first_name': obj.first_name,
+        'last_name': obj.last_name,
+    },
+    'genre': lambda obj: {
+        'id': obj.id,
+        'name': obj.name,
+        'slug': obj.slug,
+    },
+    'titles': lambda obj: {
+        'id': obj.id,
+        'name': obj.name,
+        'year': obj.year,
+        'category': obj.category_id,
+    },
+    'genre_title': lambda obj: {
+        'id': obj.id,
+        'title_id': obj.title_id_id,
+        'genre_id': obj.genre_id_id,
+    },
+    'review': lambda obj: {
+        'id': obj.id,
+        'title_id': obj.title_id,
+        'text': obj.text,
+        'author': obj.author_id,
+        'score': obj.score,
+        'pub_date': obj.pub_date.isoformat(),
+    },
+    'comments': lambda obj: {
+        'id': obj.id,
+        'review_id': obj.review_id,
+        'text': obj.text,
+        'author': obj.author_id,
+        'pub_date': obj.pub_date.isoformat(),
+    },
+}
+
+
+def build(scale, rng):
+    """Объекты каталога по таблицам, без записи в базу."""
+    if scale.users <= scale.reviews + scale.comments:
+        raise ValueError(
+            'Пользователей должно быть больше, чем отзывов на произведение '
+            'и комментариев на отзыв вместе.'
+        )
+    now = timezone.now()
+    categories = [
+        Category(id=i, name=f'Категория {i}', slug=f'category-{i}')
+        for i in range(1, scale.categories + 1)
+    ]
+    genres = [
+        Genre(id=i, name=f'Жанр {i}', slug=f'genre-{i}')
+        for i in range(1, scale.genres + 1)
+    ]
+    users = [
+        User(
+            id=i,
+            username=f'user{i}',
+            email=f'user{i}@yamdb.fake',
+            role='user',
+        )
+        for i in range(1, scale.users + 1)
+    ]
+    titles = [
+        Title(
+            id=i,
+            name=f'Произведение {i}',
+            year=rng.randint(1900, 2020),
+            category_id=rng.randint(1, scale.categories),
+        )
+        for i in range(1, scale.titles + 1)
+    ]
+    genre_titles = []
+    for title in titles:
+        for genre_id in rng.sample(range(1, scale.genres + 1), 2):
+            genre_titles.append(GenreTitle(
+                id=len(genre_titles) + 1,
+                title_id_id=title.id,
+                genre_id_id=genre_id,
+            ))
+    reviews, comments = [], []
+    for title in titles:
+        for offset in range(scale.reviews):
+            reviews.append(Review(
+                id=len(reviews) + 1,
+                title_id=title.id,
+                author_id=(title.id + offset) % scale.users + 1,
+                text=f'Отзыв {len(reviews) + 1}',
+                score=rng.randint(1, 10),
+                pub_date=now - timedelta(minutes=rng.randint(0, 60 * 24 * 30)),
+            ))
+    for review in reviews:
+        for offset in range(1, scale.comments + 1):
+            comments.append(Comment(
+                id=len(comments) + 1,
+                review_id=review.id,
+                author_id=(review.author_id + scale.reviews + offset)
+                % scale.users + 1,
+                text=f'Комментарий {len(comments) + 1}',
+                pub_date=review.pub_date,
+            ))
+    return {
+        'category': categories,
+        'users': users,
+        'genre': genres,
+        'titles': titles,
+        'genre_title': genre_titles,
+        'review': reviews,
+        'comments': comments,
+    }
+
+
+def reset_sequences():
+    """После вставки с явными id сдвигает счётчики первичных ключей."""
+    statements = connection.ops.sequence_reset_sql(
+        no_style(),
+        list(MODELS.values()),
+    )
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+@transaction.atomic
+def seed(catalogue):
+    """Записывает каталог в базу и пересчитывает рейтинги."""
+    for name, model in MODELS.items():
+        model.objects.bulk_create(catalogue[name], batch_size=BATCH_SIZE)
+    reset_sequences()
+    Title.objects.rebuild_rating()
+
+
+def write_csv(catalogue, directory, filenames):
+    """Выгружает каталог в csv-файлы формата команды load."""
+    for name, objects in catalogue.items():
+        with open(
+            directory / filenames[name], 'w', newline='', encoding='utf-8',
+        ) as file:
+            rows = [COLUMNS[name](obj) for obj in objects]
+            writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
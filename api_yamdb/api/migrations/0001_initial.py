@@ -0,0 +1,32 @@
+# Generated by Django 3.2 on 2026-10-18 06:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255, unique=True, verbose_name='Источник')),
+                ('file_hash', models.CharField(max_length=64, verbose_name='SHA-256 файла')),
+                ('prefix_hash', models.CharField(max_length=64, verbose_name='SHA-256 загруженной части')),
+                ('offset', models.PositiveBigIntegerField(default=0, verbose_name='Смещение в байтах')),
+                ('rows', models.PositiveBigIntegerField(default=0, verbose_name='Прочитано строк')),
+                ('completed', models.BooleanField(default=False, verbose_name='Загружен полностью')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Обновлён')),
+            ],
+            options={
+                'verbose_name': 'Контрольная точка загрузки',
+                'verbose_name_plural': 'Контрольные точки загрузки',
+                'ordering': ('source',),
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2 on 2026-10-18 12:40
+
+from django.db import migrations
+
+
+def clear_sent_bodies(apps, schema_editor):
+    OutboxEmail = apps.get_model('api', 'OutboxEmail')
+    OutboxEmail.objects.filter(status='sent').exclude(body='').update(body='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_outboxemail'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_sent_bodies, migrations.RunPython.noop),
+    ]
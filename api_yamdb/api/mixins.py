@@ -1,6 +1,34 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from functools import lru_cache, partial, wraps
+
+from api.cache import generation_time, get_generation
 from api.permissions import IsAdminOrReadOnly
+from api.replicas import (choose_replica, is_pinned, mark_unhealthy, pin,
+                          replica_alias)
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, close_old_connections
+from django.http import Http404
 from rest_framework import mixins, viewsets
 from rest_framework.filters import SearchFilter
+from rest_framework.permissions import SAFE_METHODS
+
+
+def check_id(value):
+    """id из URL вне диапазона BigAutoField — 404, а не OverflowError."""
+    if not str(value).isdigit() or not 0 < int(value) <= settings.MAX_ID:
+        raise Http404
+
+
+class IdLookupMixin:
+    """Объект по id из URL: некорректный id даёт 404."""
+
+    def get_object(self):
+        check_id(self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+        return super().get_object()
 
 
 class DestroyListCreatMixinSet(
@@ -13,3 +41,120 @@ class DestroyListCreatMixinSet(
     filter_backends = (SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
+
+
+class QueryPlanMixin:
+    """Планирование запросов под действие viewset.
+
+    select_related_plan и prefetch_related_plan сопоставляют имени
+    действия набор связей; ключ '*' применяется к остальным действиям.
+    """
+
+    select_related_plan = {}
+    prefetch_related_plan = {}
+
+    def get_plan(self, plan):
+        return plan.get(self.action, plan.get('*', ()))
+
+    def plan_queryset(self, queryset):
+        select_related = self.get_plan(self.select_related_plan)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        return queryset.prefetch_related(
+            *self.get_plan(self.prefetch_related_plan)
+        )
+
+    def get_queryset(self):
+        return self.plan_queryset(super().get_queryset())
+
+
+@lru_cache(maxsize=None)
+def get_read_executor():
+    return ThreadPoolExecutor(
+        max_workers=settings.ASYNC_READ_THREADS,
+        thread_name_prefix='api-read',
+    )
+
+
+def run_read(view, request, *args, **kwargs):
+    """Выполняет чтение в потоке пула и закрывает его соединения."""
+    try:
+        response = view(request, *args, **kwargs)
+        response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_read_view(view):
+    """Корутина поверх синхронного view для ASGI.
+
+    Чтение уходит в пул get_read_executor(), поэтому медленный запрос к
+    базе не блокирует цикл событий и другие чтения. Запись выполняется
+    в общем потоке sync_to_async, как у синхронных view Django.
+    """
+    write = sync_to_async(view)
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS:
+            return await write(request, *args, **kwargs)
+        # Контекст копируется, чтобы в потоке были видны contextvars
+        # запроса (например, профиль из ProfilingMiddleware).
+        return await asyncio.get_running_loop().run_in_executor(
+            get_read_executor(),
+            copy_context().run,
+            partial(run_read, view, request, *args, **kwargs),
+        )
+
+    return wrapper
+
+
+class AsyncReadMixin:
+    """Асинхронный view при ASYNC_READ_VIEWS (запуск под ASGI)."""
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        if settings.ASYNC_READ_VIEWS:
+            return async_read_view(view)
+        return view
+
+
+class ReplicaReadMixin:
+    """Безопасные запросы читают с реплики (см. api.replicas).
+
+    Если реплика недоступна, запрос повторяется на основной базе.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and not is_pinned(request.user):
+            replica_alias.set(choose_replica())
+
+    def dispatch(self, request, *args, **kwargs):
+        token = replica_alias.set(None)
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+        except (OperationalError, InterfaceError):
+            alias = replica_alias.get()
+            if alias is None:
+                raise
+            mark_unhealthy(alias)
+            replica_alias.set(None)
+            response = super().dispatch(request, *args, **kwargs)
+        finally:
+            replica_alias.reset(token)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            pin(request.user)
+        return response
+
+    def can_cache(self):
+        """Свежий сброс кеша реплика могла ещё не догнать."""
+        if replica_alias.get() is not None:
+            generation = get_generation(self.cache_namespace)
+            if time.time() - generation_time(generation) < (
+                settings.REPLICA_PIN_SECONDS
+            ):
+                return False
+        return super().can_cache()
@@ -0,0 +1,171 @@
+from django.db import models
+from django.utils import timezone
+from reviews.models import Title
+
+
+class ImportCheckpoint(models.Model):
+    """Состояние загрузки CSV-файла командой load."""
+
+    source = models.CharField(
+        verbose_name='Источник',
+        max_length=255,
+        unique=True,
+    )
+    file_hash = models.CharField(
+        verbose_name='SHA-256 файла',
+        max_length=64,
+    )
+    prefix_hash = models.CharField(
+        verbose_name='SHA-256 загруженной части',
+        max_length=64,
+    )
+    offset = models.PositiveBigIntegerField(
+        verbose_name='Смещение в байтах',
+        default=0,
+    )
+    rows = models.PositiveBigIntegerField(
+        verbose_name='Прочитано строк',
+        default=0,
+    )
+    completed = models.BooleanField(
+        verbose_name='Загружен полностью',
+        default=False,
+    )
+    updated = models.DateTimeField(
+        verbose_name='Обновлён',
+        auto_now=True,
+    )
+
+    class Meta:
+        verbose_name = 'Контрольная точка загрузки'
+        verbose_name_plural = 'Контрольные точки загрузки'
+        ordering = ('source',)
+
+    def __str__(self):
+        return f'{self.source}: {self.rows}'
+
+
+class LeaderboardEntry(models.Model):
+    """Позиция произведения в материализованном рейтинге.
+
+    Таблицу заполняет команда refresh_leaderboards; scope задаёт срез:
+    'all', 'category:<id>' или 'genre:<id>'.
+    """
+
+    TOP = 'top'
+    TRENDING = 'trending'
+
+    BOARDS = (
+        (TOP, 'Лучшие по рейтингу'),
+        (TRENDING, 'Популярные за период'),
+    )
+
+    board = models.CharField(
+        verbose_name='Рейтинг',
+        max_length=max(len(board) for board, _ in BOARDS),
+        choices=BOARDS,
+    )
+    scope = models.CharField(
+        verbose_name='Срез',
+        max_length=64,
+    )
+    position = models.PositiveIntegerField(
+        verbose_name='Место',
+    )
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Произведение',
+    )
+    score = models.FloatField(
+        verbose_name='Значение',
+    )
+    refreshed = models.DateTimeField(
+        verbose_name='Обновлён',
+    )
+
+    class Meta:
+        verbose_name = 'Позиция в рейтинге'
+        verbose_name_plural = 'Позиции в рейтингах'
+        ordering = ('board', 'scope', 'position')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['board', 'scope', 'position'],
+                name='leaderboard_position_unique',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.board} {self.scope} #{self.position}'
+
+
+class OutboxEmail(models.Model):
+    """Письмо в очереди на отправку командой send_outbox."""
+
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+    STATUSES = (
+        (PENDING, 'Ожидает отправки'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Не доставлено'),
+    )
+
+    subject = models.CharField(
+        verbose_name='Тема',
+        max_length=255,
+    )
+    body = models.TextField(
+        verbose_name='Текст',
+    )
+    from_email = models.CharField(
+        verbose_name='Отправитель',
+        max_length=254,
+    )
+    recipient = models.CharField(
+        verbose_name='Получатель',
+        max_length=254,
+    )
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=max(len(status) for status, _ in STATUSES),
+        choices=STATUSES,
+        default=PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток отправки',
+        default=0,
+    )
+    last_error = models.TextField(
+        verbose_name='Последняя ошибка',
+        blank=True,
+    )
+    available_at = models.DateTimeField(
+        verbose_name='Доступно для отправки с',
+        default=timezone.now,
+    )
+    created = models.DateTimeField(
+        verbose_name='Создано',
+        auto_now_add=True,
+    )
+    sent_at = models.DateTimeField(
+        verbose_name='Отправлено',
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ('id',)
+        indexes = [
+            models.Index(
+                fields=['status', 'available_at'],
+                name='outbox_status_available_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
@@ -0,0 +1,122 @@
+"""Очередь исходящих писем.
+
+Запрос только записывает письмо в OutboxEmail, транспорт почты
+использует команда send_outbox. Пакет писем захватывается сдвигом
+available_at на время аренды, поэтому несколько воркеров не отправят
+одно письмо дважды, а письма упавшего воркера вернутся в очередь.
+"""
+from datetime import timedelta
+
+from api.models import OutboxEmail
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+
+def queue_mail(subject, message, recipient_list, from_email=None):
+    return OutboxEmail.objects.bulk_create(
+        OutboxEmail(
+            subject=subject,
+            body=message,
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+            recipient=recipient,
+        )
+        for recipient in recipient_list
+    )
+
+
+def claim(batch_size, lease):
+    """Захватывает до batch_size писем, готовых к отправке."""
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutboxEmail.objects.select_for_update(
+                skip_locked=True,
+            ).filter(
+                status=OutboxEmail.PENDING,
+                available_at__lte=now,
+            ).order_by('available_at', 'id')[:batch_size]
+        )
+        OutboxEmail.objects.filter(
+            pk__in=[email.pk for email in emails],
+        ).update(available_at=now + timedelta(seconds=lease))
+    return emails
+
+
+def deliver(emails):
+    """Отправляет письма через одно соединение.
+
+    Возвращает {id: текст ошибки или None}.
+    """
+    results = {}
+    try:
+        with get_connection() as connection:
+            for email in emails:
+                try:
+                    EmailMessage(
+                        subject=email.subject,
+                        body=email.body,
+                        from_email=email.from_email,
+                        to=[email.recipient],
+                        connection=connection,
+                    ).send()
+                    results[email.pk] = None
+                except Exception as error:
+                    results[email.pk] = repr(error)
+    except Exception as error:
+        for email in emails:
+            results.setdefault(email.pk, repr(error))
+    return results
+
+
+def record(emails, results, max_attempts, retry_delay):
+    """Сохраняет итоги отправки, неудачные письма откладывает.
+
+    Задержка повтора растёт вдвое с каждой попыткой. У отправленных писем
+    текст стирается: в нём код подтверждения, хранить его незачем.
+    """
+    now = timezone.now()
+    for email in emails:
+        email.attempts += 1
+        error = results[email.pk]
+        if error is None:
+            email.status, email.sent_at, email.last_error, email.body = (
+                OutboxEmail.SENT, now, '', ''
+            )
+            continue
+        email.last_error = error
+        if email.attempts >= max_attempts:
+            email.status = OutboxEmail.FAILED
+        else:
+            email.available_at = now + timedelta(
+                seconds=retry_delay * 2 ** (email.attempts - 1),
+            )
+    OutboxEmail.objects.bulk_update(
+        emails,
+        (
+            'status', 'attempts', 'last_error', 'available_at', 'sent_at',
+            'body',
+        ),
+    )
+
+
+def get_stats():
+    stats = {status: 0 for status, _ in OutboxEmail.STATUSES}
+    stats.update(
+        OutboxEmail.objects.order_by().values_list('status').annotate(
+            Count('id'),
+        )
+    )
+    oldest = OutboxEmail.objects.filter(
+        status=OutboxEmail.PENDING,
+    ).aggregate(created=Min('created'))['created']
+    stats['oldest_pending_seconds'] = (
+        (timezone.now() - oldest).total_seconds() if oldest else 0
+    )
+    stats['retrying'] = OutboxEmail.objects.filter(
+        status=OutboxEmail.PENDING,
+        attempts__gt=0,
+    ).count()
+    return stats
@@ -0,0 +1,181 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(LimitOffsetPagination):
+    """Постраничный вывод по ключу сортировки вместо смещения.
+
+    Страница выбирается условием на поля view.keyset_ordering
+    (последнее из них должно быть уникальным, обычно id), поэтому
+    стоимость запроса не зависит от глубины страницы. Общее
+    количество записей считается только при count=true. Сортировка
+    ordering с курсором не сочетается: поля вроде rating могут быть
+    пустыми, а genre__slug повторяет строки, и ключ по ним ненадёжен.
+    """
+
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    ordering_query_param = api_settings.ORDERING_PARAM
+    invalid_cursor_message = 'Некорректный курсор.'
+    ordering_message = (
+        'Сортировка недоступна при pagination=cursor, '
+        'используйте limit и offset.'
+    )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        if request.query_params.get(self.ordering_query_param):
+            raise ValidationError(
+                {self.ordering_query_param: self.ordering_message}
+            )
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.ordering = view.keyset_ordering
+        self.fields = [
+            queryset.model._meta.get_field(name.lstrip('-'))
+            for name in self.ordering
+        ]
+        self.count = (
+            queryset.count() if self.is_count_requested(request) else None
+        )
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor['reverse']
+        ordering = self.ordering
+        if reverse:
+            ordering = [self.invert(name) for name in ordering]
+        queryset = queryset.order_by(*ordering)
+        if cursor is not None:
+            queryset = queryset.filter(
+                self.get_keyset_filter(ordering, cursor['position'])
+            )
+        results = list(queryset[:self.limit + 1])
+        has_more = len(results) > self.limit
+        results = results[:self.limit]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        payload = [
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]
+        if self.count is not None:
+            payload.insert(0, ('count', self.count))
+        return Response(dict(payload))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def is_count_requested(self, request):
+        value = request.query_params.get(self.count_query_param, '')
+        return value.lower() in ('1', 'true', 'yes')
+
+    @staticmethod
+    def invert(name):
+        return name[1:] if name.startswith('-') else f'-{name}'
+
+    def get_keyset_filter(self, ordering, position):
+        """Лексикографическое условие «строго после position»."""
+        conditions = []
+        for index, name in enumerate(ordering):
+            condition = {
+                field.name: value
+                for field, value in zip(self.fields[:index], position)
+            }
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            field_name = self.fields[index].name
+            condition[f'{field_name}__{lookup}'] = position[index]
+            conditions.append(Q(**condition))
+        return reduce(or_, conditions)
+
+    def encode_cursor(self, instance, reverse):
+        position = [field.value_to_string(instance) for field in self.fields]
+        token = urlsafe_b64encode(
+            json.dumps([position, reverse]).encode()
+        ).decode()
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            token,
+        )
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            position, reverse = json.loads(urlsafe_b64decode(token.encode()))
+            if len(position) != len(self.fields):
+                raise ValueError
+            position = [
+                field.to_python(value)
+                for field, value in zip(self.fields, position)
+            ]
+        except (
+            BinasciiError,
+            DjangoValidationError,
+            TypeError,
+            ValueError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return {'position': position, 'reverse': bool(reverse)}
+
+
+class YamdbPagination(LimitOffsetPagination):
+    """LimitOffset по умолчанию, keyset при pagination=cursor или cursor=…
+
+    Существующие клиенты продолжают получать limit/offset с count,
+    режим по ключу включается отдельным параметром запроса.
+    """
+
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+
+    def is_cursor_mode(self, request, view):
+        if (
+            getattr(view, 'keyset_ordering', None) is None
+            or getattr(view, 'action', None) != 'list'
+        ):
+            return False
+        return (
+            request.query_params.get(self.mode_query_param)
+            == self.cursor_mode
+            or KeysetPagination.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.delegate = None
+        if self.is_cursor_mode(request, view):
+            self.delegate = KeysetPagination()
+            return self.delegate.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.delegate is not None:
+            return self.delegate.get_paginated_response(data)
+        return super().get_paginated_response(data)
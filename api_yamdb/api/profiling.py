@@ -0,0 +1,313 @@
+"""Профилирование запросов к API.
+
+ProfilingMiddleware с вероятностью PROFILING_SAMPLE_RATE замеряет
+запрос к /api/: длительность, число и время SQL-запросов, время
+сериализации и размер ответа. Повторяющиеся формы SQL в пределах
+одного запроса (PROFILING_NPLUSONE_THRESHOLD и больше) отмечаются
+как N+1. Агрегаты по эндпоинтам хранятся в кеше API и отдаются
+в JSON (администратору) и в текстовом формате Prometheus.
+"""
+import asyncio
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from random import random
+
+from api.cache import get_cache
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+ENDPOINTS_KEY = 'api:profiling:endpoints'
+EXCLUDED_VIEWS = ('profiling_stats', 'profiling_metrics')
+IN_LIST_RE = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+
+current_profile = ContextVar('current_profile', default=None)
+record_lock = threading.Lock()
+
+
+class Profile:
+    """Замеры одного запроса."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.query_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+        self.shapes = Counter()
+
+    def add_query(self, sql, duration):
+        self.queries += 1
+        self.query_time += duration
+        self.shapes[IN_LIST_RE.sub('(...)', sql)] += 1
+
+    def repeated_shape(self):
+        """Самая частая форма SQL, если она похожа на N+1."""
+        if not self.shapes:
+            return None
+        shape, repeats = self.shapes.most_common(1)[0]
+        if repeats >= settings.PROFILING_NPLUSONE_THRESHOLD:
+            return shape
+        return None
+
+
+def record_query(execute, sql, params, many, context):
+    profile = current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.add_query(sql, time.perf_counter() - started)
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def install_query_wrappers():
+    """Подключает замер к соединениям текущего потока.
+
+    Новые соединения получают его через сигнал connection_created,
+    а открытые до импорта модуля — здесь.
+    """
+    for connection in connections.all():
+        install_query_wrapper(None, connection)
+
+
+connection_created.connect(install_query_wrapper)
+
+
+class ProfiledSerializerMixin:
+    """Учитывает время сериализации в профиле запроса.
+
+    Время считается только у внешнего вызова, вложенные сериализаторы
+    и элементы списка не суммируются повторно.
+    """
+
+    def to_representation(self, instance):
+        profile = current_profile.get()
+        if profile is None or profile.serializing:
+            return super().to_representation(instance)
+        profile.serializing = True
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            profile.serializing = False
+            profile.serializer_time += time.perf_counter() - started
+
+
+def endpoint_key(endpoint):
+    return f'api:profiling:{endpoint.replace(" ", ":")}'
+
+
+def empty_stats():
+    return {
+        'requests': 0,
+        'errors': 0,
+        'duration': 0.0,
+        'buckets': [0] * (len(BUCKETS) + 1),
+        'queries': 0,
+        'query_time': 0.0,
+        'serializer_time': 0.0,
+        'bytes': 0,
+        'nplusone': 0,
+        'nplusone_sql': '',
+    }
+
+
+def response_size(response):
+    if response.streaming:
+        return int(response.get('Content-Length', 0))
+    return len(response.content)
+
+
+def record(endpoint, profile, response):
+    """Добавляет замеры запроса к агрегатам эндпоинта.
+
+    Чтение и запись агрегата не атомарны между процессами, поэтому при
+    общем кеше одновременные замеры изредка теряются; для выборочной
+    статистики это допустимо.
+    """
+    duration = time.perf_counter() - profile.started
+    cache = get_cache()
+    with record_lock:
+        endpoints = cache.get(ENDPOINTS_KEY, [])
+        if endpoint not in endpoints:
+            cache.set(ENDPOINTS_KEY, endpoints + [endpoint], timeout=None)
+        stats = cache.get(endpoint_key(endpoint)) or empty_stats()
+        stats['requests'] += 1
+        stats['errors'] += response.status_code >= 500
+        stats['duration'] += duration
+        stats['buckets'][
+            next(
+                (index for index, le in enumerate(BUCKETS) if duration <= le),
+                len(BUCKETS),
+            )
+        ] += 1
+        stats['queries'] += profile.queries
+        stats['query_time'] += profile.query_time
+        stats['serializer_time'] += profile.serializer_time
+        stats['bytes'] += response_size(response)
+        shape = profile.repeated_shape()
+        if shape is not None:
+            stats['nplusone'] += 1
+            stats['nplusone_sql'] = shape[:500]
+        cache.set(endpoint_key(endpoint), stats, timeout=None)
+
+
+def get_stats():
+    cache = get_cache()
+    endpoints = cache.get(ENDPOINTS_KEY, [])
+    stored = cache.get_many([endpoint_key(name) for name in endpoints])
+    return {
+        name: stored[endpoint_key(name)]
+        for name in endpoints
+        if endpoint_key(name) in stored
+    }
+
+
+def reset_stats():
+    cache = get_cache()
+    endpoints = cache.get(ENDPOINTS_KEY, [])
+    cache.delete_many(
+        [endpoint_key(name) for name in endpoints] + [ENDPOINTS_KEY]
+    )
+
+
+def summarize(stats):
+    """Средние значения на запрос для JSON-отчёта."""
+    requests = stats['requests'] or 1
+    return {
+        'requests': stats['requests'],
+        'errors': stats['errors'],
+        'avg_ms': stats['duration'] / requests * 1000,
+        'avg_queries': stats['queries'] / requests,
+        'avg_query_ms': stats['query_time'] / requests * 1000,
+        'avg_serializer_ms': stats['serializer_time'] / requests * 1000,
+        'avg_bytes': stats['bytes'] / requests,
+        'histogram': dict(zip(
+            [str(le) for le in BUCKETS] + ['+Inf'],
+            stats['buckets'],
+        )),
+        'nplusone_requests': stats['nplusone'],
+        'nplusone_sql': stats['nplusone_sql'],
+    }
+
+
+def label(endpoint):
+    return endpoint.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def prometheus_metrics():
+    """Агрегаты в текстовом формате Prometheus 0.0.4."""
+    lines = [
+        '# HELP yamdb_profile_sample_rate Доля профилируемых запросов.',
+        '# TYPE yamdb_profile_sample_rate gauge',
+        f'yamdb_profile_sample_rate {settings.PROFILING_SAMPLE_RATE}',
+        '# HELP yamdb_request_duration_seconds Длительность запросов.',
+        '# TYPE yamdb_request_duration_seconds histogram',
+    ]
+    counters = (
+        ('db_queries_total', 'queries', 'SQL-запросов.'),
+        ('db_query_seconds_total', 'query_time', 'Время SQL-запросов.'),
+        ('serializer_seconds_total', 'serializer_time', 'Время сериализации.'),
+        ('response_bytes_total', 'bytes', 'Размер ответов.'),
+        ('nplusone_requests_total', 'nplusone', 'Запросов с N+1.'),
+        ('request_errors_total', 'errors', 'Ответов 5xx.'),
+    )
+    all_stats = get_stats()
+    for endpoint, stats in all_stats.items():
+        name = label(endpoint)
+        cumulative = 0
+        for le, count in zip(
+            [str(le) for le in BUCKETS] + ['+Inf'],
+            stats['buckets'],
+        ):
+            cumulative += count
+            lines.append(
+                'yamdb_request_duration_seconds_bucket'
+                f'{{endpoint="{name}",le="{le}"}} {cumulative}'
+            )
+        lines.append(
+            f'yamdb_request_duration_seconds_sum{{endpoint="{name}"}} '
+            f'{stats["duration"]}'
+        )
+        lines.append(
+            f'yamdb_request_duration_seconds_count{{endpoint="{name}"}} '
+            f'{stats["requests"]}'
+        )
+    for metric, field, help_text in counters:
+        lines.append(f'# HELP yamdb_{metric} {help_text}')
+        lines.append(f'# TYPE yamdb_{metric} counter')
+        for endpoint, stats in all_stats.items():
+            lines.append(
+                f'yamdb_{metric}{{endpoint="{label(endpoint)}"}} '
+                f'{stats[field]}'
+            )
+    return '\n'.join(lines) + '\n'
+
+
+class ProfilingMiddleware:
+    """Выборочно профилирует запросы к API (синхронно и под ASGI)."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Так Django распознаёт асинхронный экземпляр middleware.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def should_profile(self, request):
+        return (
+            request.path.startswith(settings.PROFILING_PATH_PREFIX)
+            and random() < settings.PROFILING_SAMPLE_RATE
+        )
+
+    def get_endpoint(self, request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None or match.view_name in EXCLUDED_VIEWS:
+            return None
+        return f'{request.method} {match.view_name}'
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.should_profile(request):
+            return self.get_response(request)
+        install_query_wrappers()
+        profile = Profile()
+        token = current_profile.set(profile)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        endpoint = self.get_endpoint(request)
+        if endpoint is not None:
+            record(endpoint, profile, response)
+        return response
+
+    async def __acall__(self, request):
+        if not self.should_profile(request):
+            return await self.get_response(request)
+        profile = Profile()
+        token = current_profile.set(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        endpoint = self.get_endpoint(request)
+        if endpoint is not None:
+            await sync_to_async(record)(endpoint, profile, response)
+        return response
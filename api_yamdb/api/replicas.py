@@ -0,0 +1,61 @@
+"""Чтение с реплик базы данных.
+
+ReplicaReadMixin выбирает реплику на время безопасного запроса,
+ReplicaRouter направляет туда чтение. После записи пользователь
+REPLICA_PIN_SECONDS читает с основной базы, чтобы видеть свои
+изменения, а реплика, вернувшая ошибку соединения, на
+REPLICA_RETRY_SECONDS исключается из выбора.
+"""
+import random
+import time
+from contextvars import ContextVar
+
+from api.cache import get_cache
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+replica_alias = ContextVar('replica_alias', default=None)
+unhealthy = {}
+
+
+def pin_key(user):
+    return f'api:pin:{user.pk}'
+
+
+def pin(user):
+    """Отправляет чтение пользователя на основную базу после записи."""
+    if settings.DATABASE_REPLICAS and user.is_authenticated:
+        get_cache().set(pin_key(user), 1, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user):
+    return user.is_authenticated and get_cache().get(pin_key(user)) is not None
+
+
+def mark_unhealthy(alias):
+    unhealthy[alias] = time.monotonic() + settings.REPLICA_RETRY_SECONDS
+
+
+def choose_replica():
+    now = time.monotonic()
+    healthy = [
+        alias for alias in settings.DATABASE_REPLICAS
+        if unhealthy.get(alias, 0) <= now
+    ]
+    return random.choice(healthy) if healthy else None
+
+
+class ReplicaRouter:
+    """Чтение — с выбранной для запроса реплики, запись — в default."""
+
+    def db_for_read(self, model, **hints):
+        return replica_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in settings.DATABASE_REPLICAS
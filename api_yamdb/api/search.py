@@ -0,0 +1,128 @@
+"""Полнотекстовый поиск произведений по названию и описанию.
+
+На PostgreSQL используется to_tsvector с GIN-индексом
+reviews_title_search_idx (см. миграцию reviews 0006) и ранжирование
+ts_rank. На остальных базах запрос обслуживает инвертированный индекс
+в памяти процесса, который перестраивается при смене поколения кеша
+'search' (его сбрасывает запись в Title).
+"""
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+from api.cache import get_generation
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connection
+from reviews.models import Title
+
+SEARCH_CONFIG = 'russian'
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or '').lower())
+
+
+class InvertedIndex:
+    """Инвертированный индекс с ранжированием TF-IDF."""
+
+    def __init__(self, documents):
+        self.postings = defaultdict(dict)
+        self.size = 0
+        for pk, *fields in documents:
+            self.size += 1
+            terms = Counter(tokenize(' '.join(filter(None, fields))))
+            for term, frequency in terms.items():
+                self.postings[term][pk] = frequency
+
+    def search(self, query):
+        """Возвращает [(id, ранг)] для документов со всеми словами."""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        postings = [self.postings.get(term, {}) for term in terms]
+        matches = set.intersection(*(set(posting) for posting in postings))
+        scores = {
+            pk: sum(
+                posting[pk] * math.log(1 + self.size / len(posting))
+                for posting in postings
+            )
+            for pk in matches
+        }
+        return sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+
+
+class RankedResults:
+    """Ленивая выдача локального поиска для постраничного вывода.
+
+    Из базы загружается только запрошенный срез id.
+    """
+
+    def __init__(self, queryset, ranked):
+        self.queryset = queryset
+        self.ranked = ranked
+
+    def __len__(self):
+        return len(self.ranked)
+
+    def __getitem__(self, index):
+        ranked = self.ranked[index]
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        titles = self.queryset.in_bulk([pk for pk, _ in ranked])
+        results = []
+        for pk, rank in ranked:
+            if pk in titles:
+                titles[pk].rank = rank
+                results.append(titles[pk])
+        return results
+
+
+class LocalSearchBackend:
+    _lock = threading.Lock()
+    _index, _generation = None, None
+
+    @classmethod
+    def get_index(cls):
+        generation = get_generation('search')
+        with cls._lock:
+            if cls._generation != generation:
+                cls._index = InvertedIndex(
+                    Title.objects.values_list(
+                        'id',
+                        'name',
+                        'description',
+                    ).iterator()
+                )
+                cls._generation = generation
+            return cls._index
+
+    def search(self, queryset, query):
+        return RankedResults(queryset, self.get_index().search(query))
+
+
+class PostgresSearchBackend:
+
+    def search(self, queryset, query):
+        vector = SearchVector('name', 'description', config=SEARCH_CONFIG)
+        search_query = SearchQuery(query, config=SEARCH_CONFIG)
+        return queryset.alias(
+            search_vector=vector,
+        ).filter(
+            search_vector=search_query,
+        ).annotate(
+            rank=SearchRank(vector, search_query),
+        ).order_by('-rank', '-id')
+
+
+def get_backend():
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    return LocalSearchBackend()
+
+
+def search_titles(queryset, query):
+    """Произведения, подходящие под запрос, по убыванию релевантности."""
+    return get_backend().search(queryset, query)
@@ -1,8 +1,19 @@
+from api.models import LeaderboardEntry
+from api.profiling import ProfiledSerializerMixin
 from django.conf import settings
+from django.db import connection
 from django.utils import timezone
 from rest_framework import serializers
-from reviews.models import Category, Comment, Genre, Review, Title, User
-from reviews.validators import validate_username
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            ScoreHistogram, Title, User)
+from reviews.validators import validate_username, validate_year
+
+
+class ProfiledModelSerializer(
+    ProfiledSerializerMixin,
+    serializers.ModelSerializer,
+):
+    """ModelSerializer с учётом времени сериализации в профиле запроса."""
 
 
 class SignupSerializer(serializers.Serializer):
@@ -39,7 +50,7 @@ class TokenSerializer(serializers.Serializer):
     )
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(ProfiledModelSerializer):
     """Сериализатор модели пользователя"""
 
     class Meta:
@@ -61,7 +72,7 @@ class UserSerializer(serializers.ModelSerializer):
         ]
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(ProfiledModelSerializer):
     slug = serializers.SlugField(
         max_length=settings.SLUG_LENGTH,
         min_length=None,
@@ -82,7 +93,7 @@ class CategorySerializer(serializers.ModelSerializer):
         lookup_field = 'slug'
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(ProfiledModelSerializer):
     slug = serializers.SlugField(
         max_length=settings.SLUG_LENGTH,
         min_length=None,
@@ -103,7 +114,7 @@ class GenreSerializer(serializers.ModelSerializer):
         lookup_field = 'slug'
 
 
-class TitleSerializer(serializers.ModelSerializer):
+class TitleSerializer(ProfiledModelSerializer):
     category = CategorySerializer(read_only=True)
     genre = GenreSerializer(many=True)
     rating = serializers.IntegerField()
@@ -121,7 +132,45 @@ class TitleSerializer(serializers.ModelSerializer):
         model = Title
 
 
-class TitleCreateSerializer(serializers.ModelSerializer):
+class TitleStatsSerializer(ProfiledModelSerializer):
+    median = serializers.SerializerMethodField()
+    histogram = serializers.SerializerMethodField()
+
+    class Meta:
+        fields = (
+            'id',
+            'reviews_count',
+            'rating',
+            'median',
+            'histogram',
+        )
+        model = Title
+
+    def get_histogram_object(self, title):
+        return getattr(title, 'scores', None) or ScoreHistogram(title=title)
+
+    def get_median(self, title):
+        return self.get_histogram_object(title).median()
+
+    def get_histogram(self, title):
+        counts = self.get_histogram_object(title).counts()
+        return {str(score): count for score, count in counts.items()}
+
+
+class LeaderboardEntrySerializer(ProfiledModelSerializer):
+    title = TitleSerializer(read_only=True)
+
+    class Meta:
+        fields = (
+            'position',
+            'score',
+            'title',
+            'refreshed',
+        )
+        model = LeaderboardEntry
+
+
+class TitleCreateSerializer(ProfiledModelSerializer):
     category = serializers.SlugRelatedField(
         slug_field='slug',
         queryset=Category.objects.all(),
@@ -153,11 +202,151 @@ class TitleCreateSerializer(serializers.ModelSerializer):
         return value
 
     def to_representation(self, title):
-        title.rating = 0
         return TitleSerializer(title).data
 
 
-class CommentSerializer(serializers.ModelSerializer):
+def slugs(items, field):
+    values = set()
+    for item in items:
+        value = item.get(field) if isinstance(item, dict) else None
+        if isinstance(value, str):
+            values.add(value)
+        elif isinstance(value, list):
+            values.update(slug for slug in value if isinstance(slug, str))
+    return values
+
+
+class TitleBulkListSerializer(serializers.ListSerializer):
+    """Массовая запись произведений.
+
+    Слаги категорий и жанров всех элементов разрешаются одним запросом
+    на модель, произведения и связи с жанрами пишутся bulk-запросами
+    в одной транзакции. Ошибки возвращаются списком по элементам.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, list) and len(data) > settings.TITLES_BATCH_SIZE:
+            raise serializers.ValidationError(
+                f'Не больше {settings.TITLES_BATCH_SIZE} произведений '
+                'за запрос.'
+            )
+        items = data if isinstance(data, list) else []
+        self.categories = Category.objects.in_bulk(
+            slugs(items, 'category'),
+            field_name='slug',
+        )
+        self.genres = Genre.objects.in_bulk(
+            slugs(items, 'genre'),
+            field_name='slug',
+        )
+        self.titles = {}
+        if self.instance is not None:
+            self.titles = self.instance.in_bulk([
+                pk for pk in (
+                    int(item['id']) for item in items
+                    if isinstance(item, dict)
+                    and str(item.get('id')).isdigit()
+                )
+                if 0 < pk <= settings.MAX_ID
+            ])
+        return super().to_internal_value(data)
+
+    def create(self, validated_data):
+        titles = [
+            Title(**self.title_fields(item)) for item in validated_data
+        ]
+        if connection.features.can_return_rows_from_bulk_insert:
+            Title.objects.bulk_create(titles)
+        else:
+            for title in titles:
+                title.save()
+        self.write_genres(titles, validated_data)
+        return titles
+
+    def update(self, instance, validated_data):
+        titles = []
+        fields = {'modified'}
+        modified = timezone.now()
+        for item in validated_data:
+            title = self.titles[item['id']]
+            for field, value in self.title_fields(item).items():
+                setattr(title, field, value)
+                fields.add(field)
+            title.modified = modified
+            titles.append(title)
+        Title.objects.bulk_update(titles, fields)
+        self.write_genres(titles, validated_data, replace=True)
+        return titles
+
+    @staticmethod
+    def title_fields(item):
+        return {
+            field: value for field, value in item.items()
+            if field not in ('id', 'genre')
+        }
+
+    @staticmethod
+    def write_genres(titles, validated_data, replace=False):
+        changed = [
+            (title, item['genre'])
+            for title, item in zip(titles, validated_data)
+            if 'genre' in item
+        ]
+        if replace:
+            GenreTitle.objects.filter(
+                title_id__in=[title for title, _ in changed],
+            ).delete()
+        GenreTitle.objects.bulk_create(
+            GenreTitle(title_id=title, genre_id=genre)
+            for title, genres in changed
+            for genre in genres
+        )
+
+
+class TitleBulkSerializer(serializers.Serializer):
+    """Элемент массовой записи; при частичном обновлении нужен id."""
+
+    id = serializers.IntegerField(
+        required=False, min_value=1, max_value=settings.MAX_ID,
+    )
+    name = serializers.CharField(max_length=settings.USER_LENGTH)
+    year = serializers.IntegerField(validators=(validate_year,))
+    description = serializers.CharField(
+        required=False,
+        allow_blank=True,
+        allow_null=True,
+    )
+    category = serializers.SlugField()
+    genre = serializers.ListField(child=serializers.SlugField())
+
+    class Meta:
+        list_serializer_class = TitleBulkListSerializer
+
+    def validate_category(self, value):
+        if value not in self.parent.categories:
+            raise serializers.ValidationError(f'Категория {value} не найдена.')
+        return self.parent.categories[value]
+
+    def validate_genre(self, value):
+        missing = [slug for slug in value if slug not in self.parent.genres]
+        if missing:
+            raise serializers.ValidationError(
+                f'Жанры не найдены: {", ".join(missing)}.'
+            )
+        return [self.parent.genres[slug] for slug in dict.fromkeys(value)]
+
+    def validate(self, data):
+        if self.parent.instance is None:
+            data.pop('id', None)
+            return data
+        if data.get('id') not in self.parent.titles:
+            raise serializers.ValidationError(
+                {'id': 'Произведение не найдено.'}
+            )
+        return data
+
+
+class CommentSerializer(ProfiledModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True,
@@ -169,7 +358,7 @@ class CommentSerializer(serializers.ModelSerializer):
         read_only_fields = ('review',)
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(ProfiledModelSerializer):
     author = serializers.SlugRelatedField(
         read_only=True, slug_field='username'
     )
@@ -0,0 +1,83 @@
+from api.authentication import revoke_tokens, versions
+from api.cache import invalidate
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
+
+# Поля, которые попадают в токен или решают, пускать ли пользователя.
+PRIVILEGES = ('role', 'is_staff', 'is_superuser', 'is_active')
+
+CACHE_DEPENDENCIES = {
+    Category: ('categories', 'titles', 'leaderboards'),
+    Genre: ('genres', 'titles', 'leaderboards'),
+    Title: ('titles', 'search', 'leaderboards'),
+    GenreTitle: ('titles',),
+    Review: ('titles',),
+}
+
+
+# Сброс откладывается до фиксации транзакции, иначе параллельный запрос
+# успеет закешировать ещё не обновлённые данные под новым поколением.
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_cached_responses(sender, **kwargs):
+    namespaces = CACHE_DEPENDENCIES.get(sender)
+    if namespaces:
+        transaction.on_commit(lambda: invalidate(*namespaces))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(lambda: invalidate('titles'))
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_title_reviews(sender, instance, **kwargs):
+    namespace = f'reviews:{instance.title_id}'
+    transaction.on_commit(lambda: invalidate(namespace))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_review_comments(sender, instance, **kwargs):
+    namespace = f'comments:{instance.review_id}'
+    transaction.on_commit(lambda: invalidate(namespace))
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_names(sender, created, **kwargs):
+    """Отзывы и комментарии показывают username автора."""
+    if not created:
+        transaction.on_commit(lambda: invalidate('reviews', 'comments'))
+
+
+@receiver(pre_save, sender=User)
+def check_privileges(sender, instance, raw, **kwargs):
+    """Сравнивает права с сохранёнными в базе до записи."""
+    previous = None
+    if instance.pk is not None and not raw:
+        previous = User.objects.filter(pk=instance.pk).values(
+            *PRIVILEGES,
+        ).first()
+    instance._privileges_changed = previous is not None and any(
+        previous[name] != getattr(instance, name) for name in PRIVILEGES
+    )
+
+
+@receiver(post_save, sender=User)
+def revoke_on_privilege_change(sender, instance, **kwargs):
+    """Смена роли или флагов в API, админке или коде отзывает токены."""
+    if getattr(instance, '_privileges_changed', False):
+        instance._privileges_changed = False
+        revoke_tokens(instance)
+        instance.refresh_from_db(fields=('token_version',))
+
+
+@receiver(post_delete, sender=User)
+def forget_token_version(sender, instance, **kwargs):
+    versions.pop(instance.pk, None)
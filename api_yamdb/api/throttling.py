@@ -0,0 +1,157 @@
+"""Ограничение частоты запросов по алгоритму token bucket.
+
+Ведро вмещает столько запросов, сколько указано в частоте
+('5/min' — пять), и пополняется равномерно за период. Состояние вёдер
+хранится в общем кеше API, поэтому лимит действует на все воркеры; если
+кеш недоступен, используется словарь в памяти процесса. Частоты задаются
+в REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], значение None отключает
+ограничение. Ответ 429 содержит заголовок Retry-After.
+"""
+import hashlib
+import logging
+import threading
+import time
+
+from api.cache import get_cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+LOCAL_LIMIT = 10000
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+local_buckets = {}
+local_lock = threading.Lock()
+shared_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+def parse_rate(rate):
+    """'5/min' -> (5, 60), как в SimpleRateThrottle."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+def refill(state, capacity, rate, now):
+    if state is None:
+        return capacity
+    tokens, updated = state
+    return min(capacity, tokens + (now - updated) * rate)
+
+
+def take_shared(key, capacity, rate, now):
+    """Чтение и запись ведра не атомарны между процессами.
+
+    При одновременных запросах из разных воркеров лимит может быть
+    превышен на несколько запросов; для защиты от перебора это допустимо.
+    """
+    cache = get_cache()
+    with shared_lock:
+        tokens = refill(cache.get(key), capacity, rate, now)
+        if tokens < 1:
+            return tokens
+        cache.set(key, (tokens - 1, now), timeout=capacity / rate)
+    return tokens
+
+
+def take_local(key, capacity, rate, now):
+    with local_lock:
+        if len(local_buckets) >= LOCAL_LIMIT:
+            # Полные вёдра не отличаются от отсутствующих.
+            for stale in [
+                name for name, (_, _, full) in local_buckets.items()
+                if full <= now
+            ]:
+                del local_buckets[stale]
+        state = local_buckets.get(key)
+        tokens = refill(state and state[:2], capacity, rate, now)
+        if tokens < 1:
+            return tokens
+        local_buckets[key] = (
+            tokens - 1,
+            now,
+            now + (capacity - tokens + 1) / rate,
+        )
+    return tokens
+
+
+def take(key, capacity, rate):
+    """Забирает жетон; возвращает число жетонов до списания."""
+    now = time.time()
+    try:
+        return take_shared(key, capacity, rate, now)
+    except Exception:
+        logger.warning(
+            'Кеш недоступен, частота запросов ограничивается в процессе.',
+            exc_info=True,
+        )
+        return take_local(key, capacity, rate, now)
+
+
+class BucketThrottle(BaseThrottle):
+    """Ограничение по ведру на ключ, который возвращает get_key."""
+
+    scope = None
+
+    def get_key(self, request, view):
+        raise NotImplementedError('Метод get_key должен быть определён.')
+
+    def get_scope(self, view):
+        return self.scope
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(view)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        key = self.get_key(request, view) if rate else None
+        if key is None:
+            return True
+        capacity, period = parse_rate(rate)
+        self.rate = capacity / period
+        self.tokens = take(
+            f'api:throttle:{scope}:{key}',
+            capacity,
+            self.rate,
+        )
+        return self.tokens >= 1
+
+    def wait(self):
+        return (1 - self.tokens) / self.rate
+
+
+class AuthIPThrottle(BucketThrottle):
+    """Запросы к регистрации и выдаче токена с одного адреса.
+
+    Адрес берётся из X-Forwarded-For на позиции NUM_PROXIES с конца —
+    его дописал доверенный прокси, — поэтому подставленные клиентом
+    значения заголовка не дают нового ведра.
+    """
+
+    scope = 'auth_ip'
+
+    def get_key(self, request, view):
+        return self.get_ident(request)
+
+
+class AuthUsernameThrottle(BucketThrottle):
+    """Попытки для одного имени пользователя с любых адресов."""
+
+    scope = 'auth_username'
+
+    def get_key(self, request, view):
+        data = request.data if isinstance(request.data, dict) else {}
+        username = data.get('username')
+        if not isinstance(username, str) or not username:
+            return None
+        return hashlib.sha256(username.lower().encode()).hexdigest()
+
+
+class UserWriteThrottle(BucketThrottle):
+    """Квота пользователя на создание объектов (scope — throttle_scope)."""
+
+    def get_scope(self, view):
+        return getattr(view, 'throttle_scope', None)
+
+    def get_key(self, request, view):
+        if request.method != 'POST' or not request.user.is_authenticated:
+            return None
+        return request.user.pk
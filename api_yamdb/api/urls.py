@@ -1,7 +1,9 @@
 from api.views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                       ReviewViewSet, TitleViewSet, UserViewSet, get_token,
+                       LeaderboardViewSet, ReviewViewSet, TitleViewSet,
+                       UserViewSet, cache_stats, export_dataset, get_token,
+                       outbox_stats, profiling_metrics, profiling_stats,
                        signup)
-from django.urls import include, path
+from django.urls import include, path, re_path
 from rest_framework.routers import DefaultRouter
 
 v1_router = DefaultRouter()
@@ -21,6 +23,11 @@ v1_router.register(
     'titles',
     TitleViewSet,
 )
+v1_router.register(
+    r"leaderboards/(?P<board>top|trending)",
+    LeaderboardViewSet,
+    basename='leaderboards',
+)
 v1_router.register(
     r"titles/(?P<title_id>\d+)/reviews",
     ReviewViewSet,
@@ -46,6 +53,31 @@ auth_urlpatterns = [
 ]
 
 urlpatterns = [
+    path(
+        'v1/cache/stats/',
+        cache_stats,
+        name='cache_stats',
+    ),
+    path(
+        'v1/outbox/stats/',
+        outbox_stats,
+        name='outbox_stats',
+    ),
+    path(
+        'v1/profiling/',
+        profiling_stats,
+        name='profiling_stats',
+    ),
+    path(
+        'v1/profiling/metrics/',
+        profiling_metrics,
+        name='profiling_metrics',
+    ),
+    re_path(
+        r'^v1/export/(?P<dataset>\w+)\.(?P<file_format>csv|ndjson)$',
+        export_dataset,
+        name='export',
+    ),
     path(
         'v1/auth/',
         include(auth_urlpatterns),
@@ -1,30 +1,53 @@
-from api.filters import TitleFilter
-from api.mixins import DestroyListCreatMixinSet
+import hmac
+from functools import partial
+
+from api.authentication import issue_token, revoke_tokens
+from api.cache import CachedResponseMixin, get_stats, invalidate
+from api.conditional import ConditionalGetMixin
+from api.export import DATASETS, FORMATS, export
+from api.filters import TitleFilter, split_values
+from api.leaderboards import CATEGORY, GENRE, scope_key
+from api.mixins import (AsyncReadMixin, DestroyListCreatMixinSet,
+                        IdLookupMixin, QueryPlanMixin, ReplicaReadMixin,
+                        check_id)
+from api.models import LeaderboardEntry
+from api.outbox import get_stats as get_outbox_stats
+from api.outbox import queue_mail
+from api.pagination import YamdbPagination
 from api.permissions import (IsAdmin, IsAdminOrReadOnly,
                              IsAuthorModeratorAdminOrReadOnly)
+from api.profiling import get_stats as get_profiling_stats
+from api.profiling import prometheus_metrics, reset_stats, summarize
+from api.search import search_titles
 from api.serializers import (CategorySerializer, CommentSerializer,
-                             GenreSerializer, ReviewSerializer,
-                             SignupSerializer, TitleCreateSerializer,
-                             TitleSerializer, TokenSerializer, UserSerializer)
+                             GenreSerializer, LeaderboardEntrySerializer,
+                             ReviewSerializer, SignupSerializer,
+                             TitleBulkSerializer, TitleCreateSerializer,
+                             TitleSerializer, TitleStatsSerializer,
+                             TokenSerializer, UserSerializer)
+from api.throttling import (AuthIPThrottle, AuthUsernameThrottle,
+                            UserWriteThrottle)
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db import IntegrityError
-from django.db.models import Avg
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max, Prefetch
+from django.http import (Http404, HttpResponse, HttpResponseForbidden,
+                         StreamingHttpResponse)
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, status, viewsets
-from rest_framework.decorators import action, api_view
+from rest_framework import filters, mixins, status, viewsets
+from rest_framework.decorators import (action, api_view, permission_classes,
+                                       throttle_classes)
 from rest_framework.exceptions import ValidationError
 from rest_framework.filters import SearchFilter
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
-from reviews.models import Category, Genre, Review, Title, User
+from reviews.models import (Category, Comment, Genre, Review, ScoreHistogram,
+                            Title, User)
 
 
 @api_view(('POST',))
+@throttle_classes((AuthIPThrottle, AuthUsernameThrottle))
 def signup(request):
     """Регистрация и отправка кода на почту."""
     serializer = SignupSerializer(
@@ -49,7 +72,7 @@ def signup(request):
             status.HTTP_400_BAD_REQUEST,
         )
     confirmation_code = default_token_generator.make_token(user)
-    send_mail(
+    queue_mail(
         subject='Регистрация в проекте YaMDb.',
         message=f'Ваш код подтверждения: {confirmation_code}',
         from_email=settings.DEFAULT_FROM_EMAIL,
@@ -62,6 +85,7 @@ def signup(request):
 
 
 @api_view(('POST',))
+@throttle_classes((AuthIPThrottle, AuthUsernameThrottle))
 def get_token(request):
     """Получение токена авторизации."""
     serializer = TokenSerializer(
@@ -82,13 +106,75 @@ def get_token(request):
             'Неверный код подтверждения',
             status=status.HTTP_400_BAD_REQUEST,
         )
-    token = AccessToken.for_user(user)
+    token = issue_token(user)
     return Response(
         {'token': str(token)},
         status=status.HTTP_200_OK,
     )
 
 
+@api_view(('GET',))
+@permission_classes((IsAdmin,))
+def cache_stats(request):
+    """Счётчики попаданий и промахов кеша ответов."""
+    return Response(get_stats())
+
+
+@api_view(('GET',))
+@permission_classes((IsAdmin,))
+def outbox_stats(request):
+    """Состояние очереди исходящих писем."""
+    return Response(get_outbox_stats())
+
+
+@api_view(('GET', 'DELETE'))
+@permission_classes((IsAdmin,))
+def profiling_stats(request):
+    """Агрегаты профилирования по эндпоинтам; DELETE их сбрасывает."""
+    if request.method == 'DELETE':
+        reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response({
+        'sample_rate': settings.PROFILING_SAMPLE_RATE,
+        'endpoints': {
+            endpoint: summarize(stats)
+            for endpoint, stats in get_profiling_stats().items()
+        },
+    })
+
+
+def profiling_metrics(request):
+    """Метрики для Prometheus, доступ по PROFILING_METRICS_TOKEN."""
+    token = settings.PROFILING_METRICS_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if not token or not hmac.compare_digest(header, f'Bearer {token}'):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        prometheus_metrics(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+@api_view(('GET',))
+@permission_classes((IsAdmin,))
+def export_dataset(request, dataset, file_format):
+    """Потоковая выгрузка таблицы; ?gzip=true сжимает ответ."""
+    if dataset not in DATASETS:
+        raise Http404
+    compress = request.query_params.get('gzip', '').lower() in (
+        '1', 'true', 'yes',
+    )
+    filename = f'{dataset}.{file_format}'
+    if compress:
+        filename += '.gz'
+    response = StreamingHttpResponse(
+        export(dataset, file_format, compress=compress),
+        content_type='application/gzip' if compress else FORMATS[file_format],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
 class UserViewSet(viewsets.ModelViewSet):
     """Информация о пользователях."""
 
@@ -105,6 +191,18 @@ class UserViewSet(viewsets.ModelViewSet):
         'delete',
     ]
 
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        revoke_tokens(instance)
+        title_ids = list(
+            Review.objects.filter(author=instance).values_list(
+                'title_id',
+                flat=True,
+            )
+        )
+        instance.delete()
+        Title.objects.filter(pk__in=title_ids).rebuild_rating()
+
     @action(
         detail=False,
         methods=[
@@ -117,7 +215,10 @@ class UserViewSet(viewsets.ModelViewSet):
     def me(self, request, pk=None):
         instance = request.user
         if request.method == 'GET':
-            serializer = self.get_serializer(instance)
+            # Пользователь из токена не содержит полей профиля.
+            serializer = self.get_serializer(
+                get_object_or_404(User, pk=instance.pk),
+            )
             return Response(
                 serializer.data,
             )
@@ -138,23 +239,57 @@ class UserViewSet(viewsets.ModelViewSet):
         )
 
 
-class CategoryViewSet(DestroyListCreatMixinSet):
+class CategoryViewSet(
+    ReplicaReadMixin,
+    CachedResponseMixin,
+    DestroyListCreatMixinSet,
+):
+    cache_namespace = 'categories'
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
 
 
-class GenreViewSet(DestroyListCreatMixinSet):
+class GenreViewSet(
+    ReplicaReadMixin,
+    CachedResponseMixin,
+    DestroyListCreatMixinSet,
+):
+    cache_namespace = 'genres'
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score'),
-    )
+class TitleViewSet(
+    AsyncReadMixin,
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    QueryPlanMixin,
+    IdLookupMixin,
+    viewsets.ModelViewSet,
+):
+    cache_namespace = 'titles'
+    queryset = Title.objects.all()
+    select_related_plan = {
+        'list': ('category',),
+        'retrieve': ('category',),
+        'search': ('category',),
+        'batch': ('category',),
+        'bulk': ('category',),
+        'update': ('category',),
+        'partial_update': ('category',),
+    }
+    prefetch_related_plan = {
+        'list': (Prefetch('genre', queryset=Genre.objects.all()),),
+        'retrieve': (Prefetch('genre', queryset=Genre.objects.all()),),
+        'search': (Prefetch('genre', queryset=Genre.objects.all()),),
+        'batch': (Prefetch('genre', queryset=Genre.objects.all()),),
+        'bulk': (Prefetch('genre', queryset=Genre.objects.all()),),
+    }
     serializer_class = TitleSerializer
     permission_classes = (IsAdminOrReadOnly,)
-    pagination_class = LimitOffsetPagination
+    pagination_class = YamdbPagination
+    keyset_ordering = ('-year', '-id')
     filter_backends = (
         DjangoFilterBackend,
         filters.OrderingFilter,
@@ -164,9 +299,117 @@ class TitleViewSet(viewsets.ModelViewSet):
         'category__slug',
         'genre__slug',
         'name',
+        'rating',
         'year',
     )
 
+    def get_validator_parts(self):
+        return get_rows_validator_parts(
+            self, Title.objects.all(), 'modified', 'titles',
+        )
+
+    @action(detail=False, url_path='search')
+    def search(self, request):
+        """Полнотекстовый поиск по названию и описанию."""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': 'Укажите поисковый запрос.'})
+        page = self.paginate_queryset(
+            search_titles(self.get_queryset(), query),
+        )
+        serializer = TitleSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, url_path='batch')
+    def batch(self, request):
+        """Произведения по списку ids в порядке запроса.
+
+        Отсутствующие id перечисляются в missing.
+        """
+        return self.conditional_response(
+            partial(self.cached_response, self.get_batch),
+            request,
+        )
+
+    def get_batch(self, request):
+        ids = self.parse_ids(request.query_params.get('ids', ''))
+        titles = self.get_queryset().in_bulk(ids)
+        serializer = TitleSerializer(
+            [titles[pk] for pk in ids if pk in titles],
+            many=True,
+        )
+        return Response({
+            'results': serializer.data,
+            'missing': [pk for pk in ids if pk not in titles],
+        })
+
+    @staticmethod
+    def parse_ids(value):
+        try:
+            ids = [int(pk) for pk in split_values(value)]
+        except ValueError:
+            raise ValidationError({'ids': 'Укажите id через запятую.'})
+        if not ids:
+            raise ValidationError({'ids': 'Укажите хотя бы один id.'})
+        if not all(0 < pk <= settings.MAX_ID for pk in ids):
+            raise ValidationError({
+                'ids': f'id должны быть от 1 до {settings.MAX_ID}.'
+            })
+        if len(ids) > settings.TITLES_BATCH_SIZE:
+            raise ValidationError({
+                'ids': f'Не больше {settings.TITLES_BATCH_SIZE} id за запрос.'
+            })
+        return list(dict.fromkeys(ids))
+
+    @action(detail=True, url_path='stats')
+    def stats(self, request, pk=None):
+        """Распределение оценок: счётчики 1–10, среднее, медиана.
+
+        Читается из хранимой гистограммы, а не из таблицы отзывов.
+        """
+        return self.conditional_response(
+            partial(self.cached_response, self.get_stats),
+            request,
+            pk=pk,
+        )
+
+    def get_stats(self, request, pk=None):
+        check_id(pk)
+        title = get_object_or_404(
+            Title.objects.select_related('scores'),
+            pk=pk,
+        )
+        return Response(TitleStatsSerializer(title).data)
+
+    @action(detail=False, methods=['post', 'patch'], url_path='bulk')
+    def bulk(self, request):
+        """Массовое создание (POST) или частичное обновление (PATCH).
+
+        Принимает список произведений, при ошибке хотя бы в одном
+        элементе ничего не записывается.
+        """
+        partial = request.method == 'PATCH'
+        serializer = TitleBulkSerializer(
+            Title.objects.all() if partial else None,
+            data=request.data,
+            many=True,
+            partial=partial,
+        )
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            titles = serializer.save()
+            transaction.on_commit(
+                lambda: invalidate('titles', 'search', 'leaderboards')
+            )
+        saved = self.get_queryset().in_bulk([title.pk for title in titles])
+        return Response(
+            TitleSerializer(
+                [saved[title.pk] for title in titles],
+                many=True,
+            ).data,
+            status=status.HTTP_200_OK if partial else status.HTTP_201_CREATED,
+        )
+
     def get_serializer_class(self):
         if self.action in [
             'list',
@@ -176,16 +419,103 @@ class TitleViewSet(viewsets.ModelViewSet):
         return TitleCreateSerializer
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class LeaderboardViewSet(
+    CachedResponseMixin,
+    mixins.ListModelMixin,
+    viewsets.GenericViewSet,
+):
+    """Материализованные рейтинги top и trending.
+
+    Срез выбирается параметром category или genre со слагом,
+    без параметров возвращается общий рейтинг.
+    """
+
+    cache_namespace = 'leaderboards'
+    serializer_class = LeaderboardEntrySerializer
+    pagination_class = YamdbPagination
+    keyset_ordering = ('position',)
+    filter_backends = ()
+    scope_models = {
+        CATEGORY: Category,
+        GENRE: Genre,
+    }
+
+    def get_scope(self):
+        params = self.request.query_params
+        kinds = [kind for kind in self.scope_models if params.get(kind)]
+        if len(kinds) > 1:
+            raise ValidationError('Укажите только category или только genre.')
+        if not kinds:
+            return scope_key()
+        kind = kinds[0]
+        instance = get_object_or_404(
+            self.scope_models[kind],
+            slug=params[kind],
+        )
+        return scope_key(kind, instance.pk)
+
+    def get_queryset(self):
+        return LeaderboardEntry.objects.filter(
+            board=self.kwargs['board'],
+            scope=self.get_scope(),
+        ).select_related(
+            'title__category',
+        ).prefetch_related(
+            Prefetch('title__genre', queryset=Genre.objects.all()),
+        )
+
+
+def get_rows_validator_parts(view, queryset, date_field, *namespaces):
+    """Части валидатора: поколения кеша, число строк и последняя дата.
+
+    Агрегат по базе замечает записи других процессов (load, restore,
+    shell), до которых не доходит сброс поколений в кеше процесса.
+    """
+    generations, timestamps = view.get_generation_parts(*namespaces)
+    stats = queryset.order_by().aggregate(
+        count=Count('id'),
+        last=Max(date_field),
+    )
+    if stats['last'] is not None:
+        timestamps.append(stats['last'].timestamp())
+    return generations + [stats['count'], stats['last']], timestamps
+
+
+class CommentViewSet(
+    AsyncReadMixin,
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    QueryPlanMixin,
+    IdLookupMixin,
+    viewsets.ModelViewSet,
+):
     permission_classes = (IsAuthorModeratorAdminOrReadOnly,)
+    throttle_classes = (UserWriteThrottle,)
+    throttle_scope = 'comments'
     serializer_class = CommentSerializer
-    pagination_class = LimitOffsetPagination
+    pagination_class = YamdbPagination
+    keyset_ordering = ('-pub_date', '-id')
+    select_related_plan = {'*': ('author',)}
 
     def get_review(self, model, value):
+        check_id(self.kwargs.get(value))
         return get_object_or_404(model, id=self.kwargs.get(value))
 
     def get_queryset(self):
-        return self.get_review(Review, 'review_id').comments.all()
+        return self.plan_queryset(
+            self.get_review(Review, 'review_id').comments.all()
+        )
+
+    def get_validator_parts(self):
+        review_id = self.kwargs.get('review_id')
+        check_id(review_id)
+        return get_rows_validator_parts(
+            self,
+            Comment.objects.filter(review_id=review_id),
+            'pub_date',
+            'comments',
+            f'comments:{review_id}',
+        )
 
     def perform_create(self, serializer):
         serializer.save(
@@ -194,19 +524,72 @@ class CommentViewSet(viewsets.ModelViewSet):
         )
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
-    pagination_class = LimitOffsetPagination
+class ReviewViewSet(
+    AsyncReadMixin,
+    ReplicaReadMixin,
+    ConditionalGetMixin,
+    QueryPlanMixin,
+    IdLookupMixin,
+    viewsets.ModelViewSet,
+):
+    pagination_class = YamdbPagination
+    keyset_ordering = ('-pub_date', '-id')
     permission_classes = (IsAuthorModeratorAdminOrReadOnly,)
+    throttle_classes = (UserWriteThrottle,)
+    throttle_scope = 'reviews'
     serializer_class = ReviewSerializer
+    select_related_plan = {'*': ('author',)}
 
     def get_title(self, model, value):
+        check_id(self.kwargs.get(value))
         return get_object_or_404(model, pk=self.kwargs.get(value))
 
     def get_queryset(self):
-        return self.get_title(Title, 'title_id').reviews.all()
+        return self.plan_queryset(
+            self.get_title(Title, 'title_id').reviews.all()
+        )
+
+    def get_validator_parts(self):
+        title_id = self.kwargs.get('title_id')
+        check_id(title_id)
+        return get_rows_validator_parts(
+            self,
+            Review.objects.filter(title_id=title_id),
+            'pub_date',
+            'reviews',
+            f'reviews:{title_id}',
+        )
 
+    @transaction.atomic
     def perform_create(self, serializer):
-        serializer.save(
+        review = serializer.save(
             author=self.request.user,
             title=self.get_title(Title, 'title_id'),
         )
+        Title.objects.filter(pk=review.title_id).update_rating(
+            score_delta=review.score,
+            count_delta=1,
+        )
+        ScoreHistogram.objects.shift(review.title_id, added=review.score)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        old_score = serializer.instance.score
+        review = serializer.save()
+        Title.objects.filter(pk=review.title_id).update_rating(
+            score_delta=review.score - old_score,
+        )
+        ScoreHistogram.objects.shift(
+            review.title_id,
+            added=review.score,
+            removed=old_score,
+        )
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+        Title.objects.filter(pk=instance.title_id).update_rating(
+            score_delta=-instance.score,
+            count_delta=-1,
+        )
+        ScoreHistogram.objects.shift(instance.title_id, removed=instance.score)
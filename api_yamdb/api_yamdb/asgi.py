@@ -9,8 +9,66 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from django.conf import settings
 from django.core.asgi import get_asgi_application
+from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
 
-application = get_asgi_application()
+
+class ThreadedWsgiInstance(WsgiToAsgiInstance):
+    """Запрос целиком обрабатывается в отдельном потоке пула.
+
+    Django 3.2 перебирает потоковый ответ прямо в цикле событий, и каждое
+    чтение базы останавливало бы все запросы воркера. Здесь ответ
+    перебирается в потоке пула (не в общем потоке sync_to_async
+    с thread_sensitive), а части отправляются через цикл событий.
+    """
+
+    @sync_to_async(thread_sensitive=False)
+    def run_wsgi_app(self, body):
+        environ = self.build_environ(self.scope, body)
+        response = self.wsgi_application(environ, self.start_response)
+        try:
+            for output in response:
+                if not self.response_started:
+                    self.response_started = True
+                    self.sync_send(self.response_start)
+                self.sync_send({
+                    'type': 'http.response.body',
+                    'body': output,
+                    'more_body': True,
+                })
+        finally:
+            # close() отправляет request_finished: соединения с базой
+            # потока возвращаются, как после обычного запроса.
+            if hasattr(response, 'close'):
+                response.close()
+        if not self.response_started:
+            self.response_started = True
+            self.sync_send(self.response_start)
+        self.sync_send({'type': 'http.response.body'})
+
+
+class ThreadedWsgi(WsgiToAsgi):
+
+    async def __call__(self, scope, receive, send):
+        await ThreadedWsgiInstance(self.wsgi_application)(
+            scope, receive, send,
+        )
+
+
+django_application = get_asgi_application()
+streaming_application = ThreadedWsgi(get_wsgi_application())
+
+
+async def application(scope, receive, send):
+    """Длинные потоковые ответы (выгрузки) идут мимо цикла событий."""
+    if scope['type'] == 'http' and scope['path'].startswith(
+        settings.STREAMING_PATH_PREFIXES,
+    ):
+        await streaming_application(scope, receive, send)
+        return
+    await django_application(scope, receive, send)
@@ -0,0 +1,61 @@
+"""PostgreSQL с пулом соединений на процесс.
+
+ENGINE = 'api_yamdb.postgresql_pool'. Закрытие соединения Django
+(в конце запроса или по CONN_MAX_AGE) возвращает его в пул вместо
+разрыва, поэтому запрос не платит за установку TCP-соединения и
+аутентификацию. Параметры пула задаются ключом POOL в DATABASES.
+"""
+import threading
+
+from django.db.backends.postgresql import base
+
+from api_yamdb.postgresql_pool.pool import ConnectionPool
+
+POOL_DEFAULTS = {
+    'MIN_SIZE': 0,
+    'MAX_SIZE': 10,
+    'TIMEOUT': 10,
+    'CHECK_INTERVAL': 30,
+}
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+def get_pool(alias, settings_dict, connect):
+    with pools_lock:
+        if alias not in pools:
+            options = {**POOL_DEFAULTS, **settings_dict.get('POOL', {})}
+            pools[alias] = ConnectionPool(
+                connect,
+                min_size=options['MIN_SIZE'],
+                max_size=options['MAX_SIZE'],
+                timeout=options['TIMEOUT'],
+                check_interval=options['CHECK_INTERVAL'],
+            )
+        return pools[alias]
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_new_connection(self, conn_params):
+        connect = super().get_new_connection
+        connection = get_pool(
+            self.alias,
+            self.settings_dict,
+            lambda: connect(conn_params),
+        ).acquire()
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level',
+            connection.isolation_level,
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                get_pool(
+                    self.alias,
+                    self.settings_dict,
+                    None,
+                ).release(self.connection)
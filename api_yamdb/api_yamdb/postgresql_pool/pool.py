@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import deque
+
+from psycopg2 import Error as DatabaseError
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+
+class PoolTimeout(DatabaseError):
+    """Свободное соединение не появилось за отведённое время."""
+
+
+class ConnectionPool:
+    """Потокобезопасный пул соединений psycopg2.
+
+    Держит не больше max_size соединений, при исчерпании ждёт
+    освобождения не дольше timeout секунд. Соединение, пролежавшее
+    в пуле дольше check_interval секунд, перед выдачей проверяется
+    запросом SELECT 1, разорванные соединения заменяются новыми.
+    """
+
+    def __init__(self, connect, min_size, max_size, timeout, check_interval):
+        self.connect = connect
+        self.max_size = max(max_size, 1)
+        self.timeout = timeout
+        self.check_interval = check_interval
+        self.idle = deque()
+        self.size = 0
+        self.condition = threading.Condition()
+        for _ in range(min(min_size, self.max_size)):
+            self.size += 1
+            self.idle.append((self.create(), time.monotonic()))
+
+    def create(self):
+        try:
+            return self.connect()
+        except Exception:
+            with self.condition:
+                self.size -= 1
+                self.condition.notify()
+            raise
+
+    def checkout(self, deadline):
+        """Свободное соединение или None, если можно открыть новое."""
+        with self.condition:
+            while True:
+                if self.idle:
+                    return self.idle.pop()
+                if self.size < self.max_size:
+                    self.size += 1
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(
+                        f'Все {self.max_size} соединений заняты дольше '
+                        f'{self.timeout} с.'
+                    )
+                self.condition.wait(remaining)
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            entry = self.checkout(deadline)
+            if entry is None:
+                return self.create()
+            connection, released = entry
+            if self.is_healthy(connection, released):
+                return connection
+            self.discard(connection)
+
+    @staticmethod
+    def rollback(connection):
+        """Закрыть незавершённую транзакцию соединения."""
+        if connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+            connection.rollback()
+
+    def release(self, connection):
+        if not connection.closed:
+            try:
+                self.rollback(connection)
+                # Django ждёт от нового соединения autocommit, как
+                # у свежего psycopg2: иначе проверка SELECT 1 открыла бы
+                # транзакцию, и set_autocommit(True) не прошёл бы.
+                connection.autocommit = True
+            except DatabaseError:
+                pass
+        if connection.closed:
+            self.discard(connection)
+            return
+        with self.condition:
+            self.idle.append((connection, time.monotonic()))
+            self.condition.notify()
+
+    def discard(self, connection):
+        try:
+            connection.close()
+        except DatabaseError:
+            pass
+        with self.condition:
+            self.size -= 1
+            self.condition.notify()
+
+    def is_healthy(self, connection, released):
+        if connection.closed:
+            return False
+        if time.monotonic() - released < self.check_interval:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            self.rollback(connection)
+        except DatabaseError:
+            return False
+        return True
+
+    def close(self):
+        with self.condition:
+            idle, self.idle = list(self.idle), deque()
+        for connection, _ in idle:
+            self.discard(connection)
@@ -33,6 +33,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'api_yamdb.urls'
@@ -64,10 +65,55 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', default='USERNAME'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='PASSWORD'),
         'HOST': os.getenv('DB_HOST', default='db'),
-        'PORT': os.getenv('DB_PORT', default=1234)
+        'PORT': os.getenv('DB_PORT', default=1234),
+        # Для ENGINE=api_yamdb.postgresql_pool оставьте CONN_MAX_AGE=0:
+        # закрытие соединения в конце запроса возвращает его в пул.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=0)),
+        'POOL': {
+            'MIN_SIZE': int(os.getenv('DB_POOL_MIN_SIZE', default=0)),
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', default=10)),
+            'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', default=10)),
+            'CHECK_INTERVAL': float(os.getenv('DB_POOL_CHECK_INTERVAL', default=30)),
+        },
     }
 }
 
+# Реплики для чтения: значения DB_REPLICAS подставляются в HOST
+# (для SQLite — в NAME) настроек основной базы.
+DATABASE_REPLICAS = []
+for index, value in enumerate(filter(None, os.getenv('DB_REPLICAS', default='').split(',')), start=1):
+    alias = f'replica{index}'
+    key = 'NAME' if DATABASES['default']['ENGINE'].endswith('sqlite3') else 'HOST'
+    DATABASES[alias] = {**DATABASES['default'], key: value, 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+
+REPLICA_PIN_SECONDS = int(os.getenv('DB_REPLICA_PIN_SECONDS', default=5))
+
+REPLICA_RETRY_SECONDS = int(os.getenv('DB_REPLICA_RETRY_SECONDS', default=30))
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='yamdb'),
+    }
+}
+
+API_CACHE_ALIAS = 'default'
+
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', default=300))
+
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', default='false').lower() == 'true'
+
+ASYNC_READ_THREADS = int(os.getenv('ASYNC_READ_THREADS', default=32))
+
+LEADERBOARD_SIZE = int(os.getenv('LEADERBOARD_SIZE', default=100))
+
+LEADERBOARD_TRENDING_HOURS = int(
+    os.getenv('LEADERBOARD_TRENDING_HOURS', default=7 * 24)
+)
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -115,15 +161,46 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 DEFAULT_FROM_EMAIL = 'admin@yamdb.com'
 
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', default=5))
+
+OUTBOX_RETRY_DELAY = int(os.getenv('OUTBOX_RETRY_DELAY', default=60))
+
+OUTBOX_LEASE = int(os.getenv('OUTBOX_LEASE', default=300))
+
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', default=0.05))
+
+PROFILING_PATH_PREFIX = '/api/'
+
+PROFILING_NPLUSONE_THRESHOLD = int(
+    os.getenv('PROFILING_NPLUSONE_THRESHOLD', default=5)
+)
+
+PROFILING_METRICS_TOKEN = os.getenv('PROFILING_METRICS_TOKEN', default='')
+
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', default=2000))
+
+# Под ASGI эти пути обслуживаются синхронно в потоке пула (api_yamdb.asgi).
+STREAMING_PATH_PREFIXES = ('/api/v1/export/',)
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'
     ],
+    # Сколько прокси перед приложением дописывают X-Forwarded-For;
+    # адрес клиента берётся у последнего из них. По умолчанию заголовку
+    # не доверяем: nginx из infra задаёт NUM_PROXIES=1 в docker-compose.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', default=0)),
+    'DEFAULT_THROTTLE_RATES': {
+        'auth_ip': os.getenv('THROTTLE_AUTH_IP', default='20/min'),
+        'auth_username': os.getenv('THROTTLE_AUTH_USERNAME', default='5/min'),
+        'reviews': os.getenv('THROTTLE_REVIEWS', default='30/hour'),
+        'comments': os.getenv('THROTTLE_COMMENTS', default='60/hour'),
+    },
 }
 
 
@@ -132,9 +209,14 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+JWT_VERSION_CACHE_SECONDS = int(os.getenv('JWT_VERSION_CACHE_SECONDS', default=30))
+
 NAME_LENGTH = 150
 SLUG_LENGTH = 50
 USER_LENGTH = 256
 EMAIL_LENGTH = 254
+TITLES_BATCH_SIZE = 200
+# Верхняя граница BigAutoField: большие id база не примет.
+MAX_ID = 2 ** 63 - 1
 USERNAME_ERROR = 'Имя пользователя уже используется'
 EMAIL_ERROR = 'Электронная почта уже используется'
@@ -0,0 +1,23 @@
+import os
+
+LOCMEM_CACHE = 'django.core.cache.backends.locmem.LocMemCache'
+
+bind = '0:8000'
+worker_class = os.getenv(
+    'GUNICORN_WORKER_CLASS',
+    default='uvicorn.workers.UvicornWorker',
+)
+workers = int(os.getenv('WEB_CONCURRENCY', default=1))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', default=30))
+
+# Поколения кеша ответов, ETag, закрепление за репликой, вёдра лимитов и
+# счётчики профилирования живут в кеше: в памяти процесса каждый воркер
+# видел бы своё состояние.
+if workers > 1 and os.getenv(
+    'CACHE_BACKEND',
+    default=LOCMEM_CACHE,
+) == LOCMEM_CACHE:
+    raise RuntimeError(
+        'Несколько воркеров требуют общего кеша: задайте CACHE_BACKEND '
+        '(например, FileBasedCache или Redis) или WEB_CONCURRENCY=1.'
+    )
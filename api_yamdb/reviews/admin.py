@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.db import transaction
 from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
                             Title, User)
 
@@ -17,15 +18,53 @@ class TitleAdmin(admin.ModelAdmin):
         'description',
         'category',
         'display_genre',
+        'rating',
     )
     search_fields = ('name',)
     exclude = ('genre',)
     list_filter = ('year', 'category')
     list_editable = ('category',)
+    readonly_fields = ('rating', 'reviews_count')
     empty_value_display = '-пусто-'
 
 
+class ReviewAdmin(admin.ModelAdmin):
+    """Отзывы; любая запись пересчитывает рейтинг затронутых произведений."""
+
+    list_display = (
+        'pk',
+        'title',
+        'author',
+        'score',
+        'pub_date',
+    )
+    search_fields = ('text',)
+    list_filter = ('score',)
+    empty_value_display = '-пусто-'
+
+    @transaction.atomic
+    def save_model(self, request, obj, form, change):
+        title_ids = {obj.title_id}
+        if change and 'title' in form.changed_data:
+            title_ids.add(form.initial['title'])
+        super().save_model(request, obj, form, change)
+        Title.objects.filter(pk__in=title_ids).rebuild_rating()
+
+    @transaction.atomic
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        Title.objects.filter(pk=obj.title_id).rebuild_rating()
+
+    @transaction.atomic
+    def delete_queryset(self, request, queryset):
+        title_ids = set(queryset.values_list('title_id', flat=True))
+        super().delete_queryset(request, queryset)
+        Title.objects.filter(pk__in=title_ids).rebuild_rating()
+
+
 class UserAdmin(admin.ModelAdmin):
+    """Удаление пользователя удаляет его отзывы и пересчитывает рейтинги."""
+
     list_display = (
         'username',
         'first_name',
@@ -38,10 +77,24 @@ class UserAdmin(admin.ModelAdmin):
     list_editable = ('role',)
     empty_value_display = '-пусто-'
 
+    @transaction.atomic
+    def delete_model(self, request, obj):
+        title_ids = set(obj.reviews.values_list('title_id', flat=True))
+        super().delete_model(request, obj)
+        Title.objects.filter(pk__in=title_ids).rebuild_rating()
+
+    @transaction.atomic
+    def delete_queryset(self, request, queryset):
+        title_ids = set(Review.objects.filter(
+            author__in=queryset,
+        ).values_list('title_id', flat=True))
+        super().delete_queryset(request, queryset)
+        Title.objects.filter(pk__in=title_ids).rebuild_rating()
+
 
 admin.site.register(User, UserAdmin)
 admin.site.register(Title, TitleAdmin)
 admin.site.register(Genre)
 admin.site.register(Category)
-admin.site.register(Review)
+admin.site.register(Review, ReviewAdmin)
 admin.site.register(Comment)
@@ -0,0 +1,57 @@
+# Generated by Django 3.2 on 2026-10-18 06:25
+
+from django.db import migrations, models
+from django.db.models import Count, FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+
+def fill_rating(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    reviews = Review.objects.filter(
+        title=OuterRef('pk'),
+    ).order_by().values('title')
+    score_sum = Coalesce(
+        Subquery(reviews.annotate(total=Sum('score')).values('total')),
+        0,
+    )
+    reviews_count = Coalesce(
+        Subquery(reviews.annotate(total=Count('pk')).values('total')),
+        0,
+    )
+    Title.objects.update(
+        score_sum=score_sum,
+        reviews_count=reviews_count,
+        rating=Cast(score_sum, FloatField()) / NullIf(reviews_count, 0),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('reviews', '0004_auto_20230310_1112'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating',
+            field=models.FloatField(
+                blank=True, editable=False, null=True, verbose_name='Рейтинг'
+            ),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='reviews_count',
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name='Количество отзывов'
+            ),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_sum',
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name='Сумма оценок'
+            ),
+        ),
+        migrations.RunPython(fill_rating, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.2 on 2026-10-18 07:10
+
+from django.db import migrations
+
+INDEX_NAME = 'reviews_title_search_idx'
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON reviews_title '
+        "USING gin (to_tsvector('russian'::regconfig, "
+        "COALESCE(name, '') || ' ' || COALESCE(description, '')))"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('reviews', '0005_title_rating'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
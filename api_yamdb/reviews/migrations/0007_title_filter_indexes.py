@@ -0,0 +1,26 @@
+# Generated by Django 3.2 on 2026-10-18 07:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('reviews', '0006_title_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='genretitle',
+            index=models.Index(
+                fields=['genre_id', 'title_id'],
+                name='genretitle_genre_title_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(
+                fields=['category', 'year'],
+                name='title_category_year_idx',
+            ),
+        ),
+    ]
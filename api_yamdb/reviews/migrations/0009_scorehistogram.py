@@ -0,0 +1,88 @@
+# Generated by Django 3.2 on 2026-10-18 13:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_histograms(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    ScoreHistogram = apps.get_model('reviews', 'ScoreHistogram')
+    histograms = {}
+    for title_id, score, total in Review.objects.filter(
+        score__in=range(1, 11),
+    ).order_by().values('title_id', 'score').annotate(
+        total=models.Count('pk'),
+    ).values_list('title_id', 'score', 'total'):
+        histogram = histograms.setdefault(
+            title_id,
+            ScoreHistogram(title_id=title_id),
+        )
+        setattr(histogram, f'score_{score}', total)
+    ScoreHistogram.objects.bulk_create(histograms.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('reviews', '0008_user_token_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreHistogram',
+            fields=[
+                ('title', models.OneToOneField(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    primary_key=True,
+                    related_name='scores',
+                    serialize=False,
+                    to='reviews.title',
+                    verbose_name='Произведение',
+                )),
+                ('score_1', models.PositiveIntegerField(
+                    default=0,
+                    verbose_name='Оценка 1',
+                )),
+                ('score_2', models.PositiveIntegerField(
+                    default=0,
+                    verbose_name='Оценка 2',
+                )),
+                ('score_3', models.PositiveIntegerField(
+                    default=0,
+                    verbose_name='Оценка 3',
+                )),
+                ('score_4', models.PositiveIntegerField(
+                    default=0,
+                    verbose_name='Оценка 4',
+                )),
+                ('score_5', models.PositiveIntegerField(
+                    default=0,
+                    verbose_name='Оценка 5',
+                )),
+                ('score_6', models.PositiveIntegerField(
+                    default=0,
+                    verbose_name='Оценка 6',
+                )),
+                ('score_7', models.PositiveIntegerField(
+                    default=0,
+                    verbose_name='Оценка 7',
+                )),
+                ('score_8', models.PositiveIntegerField(
+                    default=0,
+                    verbose_name='Оценка 8',
+                )),
+                ('score_9', models.PositiveIntegerField(
+                    default=0,
+                    verbose_name='Оценка 9',
+                )),
+                ('score_10', models.PositiveIntegerField(
+                    default=0,
+                    verbose_name='Оценка 10',
+                )),
+            ],
+            options={
+                'verbose_name': 'Гистограмма оценок',
+                'verbose_name_plural': 'Гистограммы оценок',
+            },
+        ),
+        migrations.RunPython(build_histograms, migrations.RunPython.noop),
+    ]
@@ -3,8 +3,13 @@ from django.contrib.auth.models import AbstractUser
 from django.core.validators import (MaxValueValidator, MinValueValidator,
                                     RegexValidator)
 from django.db import models
+from django.db.models import Count, F, FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
 from reviews.validators import validate_username, validate_year
 
+SCORES = range(1, 11)
+
 
 class User(AbstractUser):
     """Модель пользователя."""
@@ -52,6 +57,11 @@ class User(AbstractUser):
         default=USER,
         blank=True,
     )
+    token_version = models.PositiveIntegerField(
+        verbose_name='Версия токенов',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         ordering = ('id',)
@@ -120,6 +130,46 @@ class Genre(AbstractModel):
         verbose_name_plural = 'Жанры'
 
 
+class TitleQuerySet(models.QuerySet):
+    """Запросы к произведениям с поддержкой хранимого рейтинга."""
+
+    def update_rating(self, score_delta=0, count_delta=0):
+        """Инкрементально сдвигает сумму и количество оценок.
+
+        Все правые части UPDATE читают значения строки до изменения,
+        поэтому рейтинг пересчитывается в том же запросе.
+        """
+        score_sum = F('score_sum') + score_delta
+        reviews_count = F('reviews_count') + count_delta
+        return self.update(
+            score_sum=score_sum,
+            reviews_count=reviews_count,
+            rating=Cast(score_sum, FloatField()) / NullIf(reviews_count, 0),
+            modified=timezone.now(),
+        )
+
+    def rebuild_rating(self):
+        """Пересчитывает рейтинг и гистограмму оценок по таблице отзывов."""
+        reviews = Review.objects.filter(
+            title=OuterRef('pk'),
+        ).order_by().values('title')
+        score_sum = Coalesce(
+            Subquery(reviews.annotate(total=Sum('score')).values('total')),
+            0,
+        )
+        reviews_count = Coalesce(
+            Subquery(reviews.annotate(total=Count('pk')).values('total')),
+            0,
+        )
+        ScoreHistogram.objects.rebuild(self)
+        return self.update(
+            score_sum=score_sum,
+            reviews_count=reviews_count,
+            rating=Cast(score_sum, FloatField()) / NullIf(reviews_count, 0),
+            modified=timezone.now(),
+        )
+
+
 class Title(models.Model):
     """Произведения."""
 
@@ -151,11 +201,42 @@ class Title(models.Model):
         null=True,
         blank=True,
     )
+    rating = models.FloatField(
+        verbose_name='Рейтинг',
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    reviews_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов',
+        default=0,
+        editable=False,
+    )
+    score_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False,
+    )
+    # Вместе с количеством строк даёт валидатор списка произведений;
+    # UPDATE в обход save() должен выставлять его сам.
+    modified = models.DateTimeField(
+        verbose_name='Изменено',
+        auto_now=True,
+        db_index=True,
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
         ordering = ('-year',)
+        indexes = [
+            models.Index(
+                fields=['category', 'year'],
+                name='title_category_year_idx',
+            ),
+        ]
 
     def display_genre(self):
         return ', '.join([genre.name for genre in self.genre.all()[:3]])
@@ -179,6 +260,12 @@ class GenreTitle(models.Model):
     class Meta:
         verbose_name = 'Жанр-Произведения'
         verbose_name_plural = 'Жанры-Произведений'
+        indexes = [
+            models.Index(
+                fields=['genre_id', 'title_id'],
+                name='genretitle_genre_title_idx',
+            ),
+        ]
 
     def __str__(self) -> str:
         return f'{self.title_id} - {self.genre_id}'
@@ -249,3 +336,123 @@ class Comment(AbstractForReviewComments):
         default_related_name = 'comments'
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+
+
+class ScoreHistogramQuerySet(models.QuerySet):
+
+    def shift(self, title_id, added=None, removed=None):
+        """Переносит отзыв между счётчиками оценок одним UPDATE.
+
+        added — новая оценка отзыва, removed — прежняя; строка
+        гистограммы создаётся при первом отзыве на произведение.
+        """
+        if added == removed:
+            return
+        changes = {}
+        if added is not None:
+            changes[f'score_{added}'] = F(f'score_{added}') + 1
+        if removed is not None:
+            changes[f'score_{removed}'] = F(f'score_{removed}') - 1
+        if not self.filter(title_id=title_id).update(**changes):
+            self.get_or_create(title_id=title_id)
+            self.filter(title_id=title_id).update(**changes)
+
+    def rebuild(self, titles):
+        """Пересобирает гистограммы произведений из titles по отзывам."""
+        title_ids = titles.values('pk')
+        self.filter(title__in=title_ids).delete()
+        histograms = {}
+        for title_id, score, total in Review.objects.filter(
+            title__in=title_ids,
+            score__in=SCORES,
+        ).order_by().values('title_id', 'score').annotate(
+            total=Count('pk'),
+        ).values_list('title_id', 'score', 'total'):
+            histograms.setdefault(
+                title_id,
+                ScoreHistogram(title_id=title_id),
+            ).set_count(score, total)
+        self.bulk_create(histograms.values(), batch_size=1000)
+
+
+class ScoreHistogram(models.Model):
+    """Количество отзывов на произведение с каждой оценкой."""
+
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='scores',
+        verbose_name='Произведение',
+    )
+    # По полю на оценку, чтобы отзыв менял гистограмму одним UPDATE
+    # строки произведения.
+    score_1 = models.PositiveIntegerField(
+        verbose_name='Оценка 1',
+        default=0,
+    )
+    score_2 = models.PositiveIntegerField(
+        verbose_name='Оценка 2',
+        default=0,
+    )
+    score_3 = models.PositiveIntegerField(
+        verbose_name='Оценка 3',
+        default=0,
+    )
+    score_4 = models.PositiveIntegerField(
+        verbose_name='Оценка 4',
+        default=0,
+    )
+    score_5 = models.PositiveIntegerField(
+        verbose_name='Оценка 5',
+        default=0,
+    )
+    score_6 = models.PositiveIntegerField(
+        verbose_name='Оценка 6',
+        default=0,
+    )
+    score_7 = models.PositiveIntegerField(
+        verbose_name='Оценка 7',
+        default=0,
+    )
+    score_8 = models.PositiveIntegerField(
+        verbose_name='Оценка 8',
+        default=0,
+    )
+    score_9 = models.PositiveIntegerField(
+        verbose_name='Оценка 9',
+        default=0,
+    )
+    score_10 = models.PositiveIntegerField(
+        verbose_name='Оценка 10',
+        default=0,
+    )
+
+    objects = ScoreHistogramQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Гистограмма оценок'
+        verbose_name_plural = 'Гистограммы оценок'
+
+    def __str__(self):
+        return f'{self.title_id}: {self.counts()}'
+
+    def set_count(self, score, total):
+        setattr(self, f'score_{score}', total)
+
+    def counts(self):
+        return {score: getattr(self, f'score_{score}') for score in SCORES}
+
+    def median(self):
+        """Медиана оценок по счётчикам, без чтения отзывов."""
+        counts = self.counts()
+        total = sum(counts.values())
+        if not total:
+            return None
+        positions = ((total + 1) // 2, total // 2 + 1)
+        middle, seen = [], 0
+        for score, count in counts.items():
+            seen += count
+            while len(middle) < 2 and seen >= positions[len(middle)]:
+                middle.append(score)
+        return sum(middle) / 2
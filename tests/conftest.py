@@ -1,9 +1,41 @@
 import sys
 from os.path import abspath, dirname, join
 
+import pytest
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 infra_dir_path = join(root_dir, 'infra')
 
 pytest_plugins = [
+    'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings():
+    """Тесты с базой запускаются на SQLite в памяти, без PostgreSQL."""
+    from django.db import connections
+
+    connections.settings = connections.configure_settings({
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        },
+    })
+    for alias in connections.settings:
+        try:
+            del connections[alias]
+        except AttributeError:
+            pass
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Откат транзакции теста не сбрасывает кеш ответов и версий токенов."""
+    from django.core.cache import cache
+
+    from api.authentication import versions
+
+    cache.clear()
+    versions.clear()
@@ -0,0 +1,89 @@
+import pytest
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create(
+        username='TestUser',
+        email='testuser@yamdb.fake',
+    )
+
+
+@pytest.fixture
+def admin_api_client(django_user_model):
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    admin = django_user_model.objects.create(
+        username='admin',
+        email='admin@yamdb.fake',
+        role='admin',
+    )
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}'
+    )
+    return client
+
+
+@pytest.fixture
+def catalogue(user, django_user_model):
+    """Каталог из 30 произведений с жанрами, отзывами и комментариями."""
+    from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                                Title)
+
+    categories = [
+        Category.objects.create(name=f'Категория {i}', slug=f'category-{i}')
+        for i in range(3)
+    ]
+    genres = [
+        Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+        for i in range(4)
+    ]
+    authors = [
+        django_user_model.objects.create(
+            username=f'author{i}',
+            email=f'author{i}@yamdb.fake',
+        )
+        for i in range(30)
+    ]
+    titles = []
+    for i in range(30):
+        title = Title.objects.create(
+            name=f'Произведение {i}',
+            year=1990 + i,
+            category=categories[i % len(categories)],
+        )
+        GenreTitle.objects.create(title_id=title, genre_id=genres[i % 4])
+        GenreTitle.objects.create(
+            title_id=title,
+            genre_id=genres[(i + 1) % 4],
+        )
+        titles.append(title)
+    title = titles[0]
+    for i, author in enumerate(authors):
+        Review.objects.create(
+            title=title,
+            author=author,
+            text=f'Отзыв {i}',
+            score=i % 10 + 1,
+        )
+    review = title.reviews.first()
+    for i, author in enumerate(authors):
+        Comment.objects.create(
+            review=review,
+            author=author,
+            text=f'Комментарий {i}',
+        )
+    Title.objects.rebuild_rating()
+    return {'titles': titles, 'title': title, 'review': review}
+
+
+@pytest.fixture
+def csv_dir(tmp_path, settings):
+    """Копия static/data: тесты load дописывают и меняют файлы."""
+    import shutil
+
+    data_dir = tmp_path / 'data'
+    shutil.copytree(settings.BASE_DIR / 'static/data', data_dir)
+    return data_dir
@@ -0,0 +1,32 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestUserAdmin:
+
+    def get_admin(self):
+        from django.contrib import admin
+        from reviews.models import User
+
+        return admin.site._registry[User]
+
+    def test_delete_model_rebuilds_rating(self, catalogue):
+        from reviews.models import ScoreHistogram, Title
+
+        title = catalogue['title']
+        author = title.reviews.filter(score=1).first().author
+        self.get_admin().delete_model(None, author)
+        title = Title.objects.get(pk=title.pk)
+        assert title.reviews_count == 29
+        assert title.rating == pytest.approx((165 - 1) / 29)
+        assert ScoreHistogram.objects.get(title=title).counts()[1] == 2
+
+    def test_delete_queryset_rebuilds_rating(self, catalogue):
+        from reviews.models import Title, User
+
+        title = catalogue['title']
+        self.get_admin().delete_queryset(
+            None,
+            User.objects.filter(username__in=('author0', 'author1')),
+        )
+        assert Title.objects.get(pk=title.pk).reviews_count == 28
@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAsyncReadViews:
+
+    def test_views_are_coroutines(self, settings):
+        from api.views import CategoryViewSet, TitleViewSet
+
+        settings.ASYNC_READ_VIEWS = True
+        view = TitleViewSet.as_view({'get': 'list'})
+        assert asyncio.iscoroutinefunction(view)
+        assert view.cls is TitleViewSet
+        assert not asyncio.iscoroutinefunction(
+            CategoryViewSet.as_view({'get': 'list'}),
+        )
+        settings.ASYNC_READ_VIEWS = False
+        assert not asyncio.iscoroutinefunction(
+            TitleViewSet.as_view({'get': 'list'}),
+        )
+
+    def test_read_runs_in_pool(self, settings, catalogue):
+        from django.test import RequestFactory
+
+        from api.views import TitleViewSet
+
+        settings.ASYNC_READ_VIEWS = True
+        view = TitleViewSet.as_view({'get': 'list'})
+        response = asyncio.run(view(RequestFactory().get('/api/v1/titles/')))
+        assert response.status_code == 200
+        assert response.data['count'] == 30
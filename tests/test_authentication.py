@@ -0,0 +1,116 @@
+import pytest
+
+
+@pytest.fixture
+def admin(django_user_model):
+    return django_user_model.objects.create(
+        username='claims_admin',
+        email='claims_admin@yamdb.fake',
+        role='admin',
+    )
+
+
+def get_token(client, user):
+    from django.contrib.auth.tokens import default_token_generator
+
+    response = client.post('/api/v1/auth/token/', {
+        'username': user.username,
+        'confirmation_code': default_token_generator.make_token(user),
+    })
+    assert response.status_code == 200
+    return response.json()['token']
+
+
+def authenticate(method, token):
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    from api.authentication import ClaimsJWTAuthentication
+
+    request = Request(getattr(APIRequestFactory(), method)(
+        '/', HTTP_AUTHORIZATION=f'Bearer {token}',
+    ))
+    return ClaimsJWTAuthentication().authenticate(request)[0]
+
+
+@pytest.mark.django_db
+class TestClaimsAuthentication:
+
+    def test_token_has_claims(self, client, admin):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        token = AccessToken(get_token(client, admin))
+        assert token['role'] == 'admin'
+        assert token['username'] == 'claims_admin'
+        assert token['ver'] == 0
+
+    def test_reads_skip_user_lookup(
+        self, client, admin, django_assert_num_queries,
+    ):
+        from api.authentication import ClaimsUser
+
+        token = get_token(client, admin)
+        with django_assert_num_queries(1):
+            user = authenticate('get', token)
+        with django_assert_num_queries(0):
+            user = authenticate('get', token)
+        assert isinstance(user, ClaimsUser)
+        assert user.pk == admin.pk
+        assert user.is_admin
+
+    def test_writes_load_user(self, client, admin):
+        token = get_token(client, admin)
+        assert authenticate('post', token) == admin
+        assert type(authenticate('post', token)) is type(admin)
+
+    def test_role_change_revokes_tokens(self, client, admin, user):
+        from rest_framework.test import APIClient
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        token = get_token(client, user)
+        user_client = APIClient()
+        user_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        assert user_client.get('/api/v1/users/me/').status_code == 200
+        admin_client = APIClient()
+        admin_client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {get_token(client, admin)}',
+        )
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/',
+            {'role': 'moderator'},
+        )
+        assert response.status_code == 200
+        assert user_client.get('/api/v1/users/me/').status_code == 401
+        assert user_client.post(
+            '/api/v1/categories/',
+            {'name': 'Категория', 'slug': 'category'},
+        ).status_code == 401
+        user.refresh_from_db()
+        assert AccessToken(get_token(client, user))['ver'] == 1
+
+    @pytest.mark.parametrize('change', (
+        {'role': 'user'},
+        {'is_staff': True},
+        {'is_superuser': True},
+        {'is_active': False},
+    ))
+    def test_privilege_change_outside_api_revokes_tokens(
+        self, client, admin, change,
+    ):
+        """Админка и код меняют права через save(), минуя UserViewSet."""
+        from rest_framework.exceptions import AuthenticationFailed
+
+        token = get_token(client, admin)
+        assert authenticate('get', token).is_admin
+        for name, value in change.items():
+            setattr(admin, name, value)
+        admin.save()
+        assert admin.token_version == 1
+        with pytest.raises(AuthenticationFailed):
+            authenticate('get', token)
+
+    def test_profile_change_keeps_tokens(self, client, admin):
+        token = get_token(client, admin)
+        admin.bio = 'Новое описание'
+        admin.save()
+        assert authenticate('get', token).is_admin
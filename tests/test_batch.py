@@ -0,0 +1,40 @@
+import pytest
+
+from tests.test_query_count import count_queries
+
+
+@pytest.mark.django_db
+class TestTitleBatch:
+
+    def test_order_and_missing(self, client, catalogue):
+        titles = catalogue['titles']
+        ids = [titles[5].pk, 999999, titles[0].pk, titles[5].pk]
+        response = client.get(
+            f'/api/v1/titles/batch/?ids={",".join(map(str, ids))}',
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert [item['id'] for item in data['results']] == [
+            titles[5].pk,
+            titles[0].pk,
+        ], 'Проверьте, что произведения возвращаются в порядке запроса'
+        assert data['missing'] == [999999]
+        assert len(data['results'][0]['genre']) == 2
+
+    def test_constant_queries(self, client, catalogue):
+        ids = [title.pk for title in catalogue['titles']]
+        counts = {
+            count_queries(
+                client,
+                f'/api/v1/titles/batch/?ids={",".join(map(str, ids[:size]))}',
+            )
+            for size in (1, 10, 30)
+        }
+        assert len(counts) == 1, counts
+
+    @pytest.mark.parametrize('ids', [
+        '', 'a,b', ','.join(['1'] * 201), '1,99999999999999999999999', '0',
+    ])
+    def test_invalid_ids(self, client, catalogue, ids):
+        response = client.get(f'/api/v1/titles/batch/?ids={ids}')
+        assert response.status_code == 400
@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+SCALE = (12, 2, 4, 8, 3, 2)
+
+
+@pytest.mark.django_db
+class TestSyntheticCatalogue:
+
+    def test_seed(self):
+        from api.management.synthetic import Scale, build, seed
+        from reviews.models import Comment, Review, Title
+
+        seed(build(Scale(*SCALE), random.Random(0)))
+        assert Title.objects.count() == 12
+        assert Review.objects.count() == 12 * 3
+        assert Comment.objects.count() == 12 * 3 * 2
+        assert not Title.objects.filter(rating__isnull=True).exists()
+
+    def test_users_must_cover_authors(self):
+        from api.management.synthetic import Scale, build
+
+        with pytest.raises(ValueError):
+            build(Scale(12, 2, 4, 4, 3, 1), random.Random(0))
+
+
+@pytest.mark.django_db(transaction=True)
+class TestBenchmarkApi:
+    """Команда load пишет из своего потока, мимо транзакции теста."""
+
+    @pytest.mark.parametrize('scenarios', (
+        ('load', 'titles_list', 'comments_list'),
+        ('reviews_list', 'review_create', 'signup', 'token'),
+    ))
+    def test_scenarios(self, scenarios):
+        from api.management.commands.benchmark_api import Command
+        from api.management.synthetic import Scale
+        from reviews.models import Comment
+
+        results = Command().run_scale(
+            Scale(*SCALE), scenarios, 5, random.Random(0),
+        )
+        assert set(results) == set(scenarios)
+        if 'load' in scenarios:
+            assert results['load']['rows'] > 0
+            assert Comment.objects.count() == 12 * 3 * 2, (
+                'Проверьте, что load загружает весь синтетический каталог'
+            )
+        for name in set(scenarios) - {'load'}:
+            assert results[name]['errors'] == 0, name
+            assert results[name]['queries'] > 0
+
+    def test_compare(self):
+        from api.management.commands.benchmark_api import compare
+
+        baseline = {'scales': {'small': {'scenarios': {
+            'titles_list': {'p95': 10.0, 'queries': 3.0},
+            'load': {'seconds': 1.0},
+        }}}}
+        report = {'scales': {'small': {'scenarios': {
+            'titles_list': {'p95': 11.0, 'queries': 4.0},
+            'load': {'seconds': 1.5},
+        }}}}
+        regressions = compare(report, baseline, tolerance=20)
+        assert len(regressions) == 2
+        assert any('запросов' in line for line in regressions)
+        assert any('load' in line for line in regressions)
@@ -0,0 +1,85 @@
+import pytest
+
+URL = '/api/v1/titles/bulk/'
+
+
+@pytest.mark.django_db
+class TestTitleBulk:
+
+    def test_create(self, admin_api_client, catalogue):
+        from reviews.models import GenreTitle, Title
+
+        before = Title.objects.count()
+        response = admin_api_client.post(URL, [
+            {
+                'name': f'Новинка {i}',
+                'year': 2000 + i,
+                'category': 'category-1',
+                'genre': ['genre-0', 'genre-3'],
+            }
+            for i in range(5)
+        ], format='json')
+        assert response.status_code == 201, response.json()
+        data = response.json()
+        assert [item['name'] for item in data] == [
+            f'Новинка {i}' for i in range(5)
+        ]
+        assert Title.objects.count() == before + 5
+        assert GenreTitle.objects.filter(
+            title_id__in=[item['id'] for item in data],
+        ).count() == 10
+
+    def test_errors_are_per_item(self, admin_api_client, catalogue):
+        from reviews.models import Title
+
+        before = Title.objects.count()
+        response = admin_api_client.post(URL, [
+            {
+                'name': 'Верное',
+                'year': 2000,
+                'category': 'category-1',
+                'genre': ['genre-0'],
+            },
+            {
+                'name': 'Из будущего',
+                'year': 3000,
+                'category': 'missing',
+                'genre': ['genre-0', 'missing'],
+            },
+        ], format='json')
+        assert response.status_code == 400
+        errors = response.json()
+        assert errors[0] == {}
+        assert set(errors[1]) == {'year', 'category', 'genre'}
+        assert Title.objects.count() == before, (
+            'Проверьте, что при ошибке ничего не записывается'
+        )
+
+    def test_partial_update(self, admin_api_client, catalogue):
+        first, second = catalogue['titles'][:2]
+        response = admin_api_client.patch(URL, [
+            {'id': first.pk, 'name': 'Переименовано'},
+            {'id': second.pk, 'genre': ['genre-3']},
+        ], format='json')
+        assert response.status_code == 200, response.json()
+        first.refresh_from_db()
+        assert first.name == 'Переименовано'
+        assert first.genre.count() == 2
+        assert list(second.genre.values_list('slug', flat=True)) == [
+            'genre-3'
+        ]
+        response = admin_api_client.patch(
+            URL,
+            [
+                {'name': 'Без id'},
+                {'id': 999999, 'name': 'Нет такого'},
+                {'id': 10 ** 23, 'name': 'Вне диапазона'},
+            ],
+            format='json',
+        )
+        assert response.status_code == 400
+        assert all('id' in item for item in response.json())
+
+    def test_admin_only(self, client, catalogue):
+        response = client.post(URL, [], content_type='application/json')
+        assert response.status_code == 401
@@ -0,0 +1,54 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+
+    def test_repeated_get_is_served_from_cache(self, client, catalogue):
+        first = client.get('/api/v1/titles/?limit=5&offset=0')
+        second = client.get('/api/v1/titles/?offset=0&limit=5&name=')
+        assert first['X-Cache'] == 'MISS'
+        assert second['X-Cache'] == 'HIT', (
+            'Проверьте, что порядок и пустые параметры не меняют ключ кеша'
+        )
+        assert first.json() == second.json()
+
+    def test_write_invalidates_dependent_lists(
+        self,
+        client,
+        catalogue,
+        django_capture_on_commit_callbacks,
+    ):
+        from reviews.models import Category
+
+        client.get('/api/v1/categories/')
+        client.get('/api/v1/titles/')
+        category = Category.objects.get(slug='category-0')
+        category.name = 'Новое имя'
+        with django_capture_on_commit_callbacks(execute=True):
+            category.save()
+        response = client.get('/api/v1/categories/')
+        assert response['X-Cache'] == 'MISS'
+        assert 'Новое имя' in [item['name'] for item in response.json()['results']]
+        assert client.get('/api/v1/titles/')['X-Cache'] == 'MISS', (
+            'Проверьте, что изменение категории сбрасывает кеш произведений'
+        )
+
+    def test_stats_are_admin_only(self, client, catalogue, django_user_model):
+        from rest_framework.test import APIClient
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        assert client.get('/api/v1/cache/stats/').status_code == 401
+        client.get('/api/v1/genres/')
+        client.get('/api/v1/genres/')
+        admin = django_user_model.objects.create(
+            username='admin',
+            email='admin@yamdb.fake',
+            role='admin',
+        )
+        admin_client = APIClient()
+        admin_client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}'
+        )
+        stats = admin_client.get('/api/v1/cache/stats/').json()
+        assert stats['genres'] == {'hit': 1, 'miss': 1}
@@ -0,0 +1,62 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+
+    def test_matching_etag_returns_304(self, client, catalogue):
+        url = f'/api/v1/titles/{catalogue["title"].pk}/reviews/'
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.has_header('ETag')
+        assert response.has_header('Last-Modified')
+        cached = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert cached.status_code == 304, (
+            'Проверьте, что совпадающий If-None-Match возвращает 304'
+        )
+        assert cached.content == b''
+
+    def test_review_change_updates_etag(
+        self,
+        client,
+        catalogue,
+        django_capture_on_commit_callbacks,
+    ):
+        review = catalogue['review']
+        url = f'/api/v1/titles/{catalogue["title"].pk}/reviews/'
+        etag = client.get(url)['ETag']
+        review.text = 'Исправленный отзыв'
+        with django_capture_on_commit_callbacks(execute=True):
+            review.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что правка отзыва меняет ETag списка отзывов'
+        )
+
+    def test_etag_depends_on_query(self, client, catalogue):
+        first = client.get('/api/v1/titles/?limit=1')
+        second = client.get('/api/v1/titles/?limit=2')
+        assert first['ETag'] != second['ETag']
+
+    @pytest.mark.parametrize('write', ['save', 'rebuild', 'delete'])
+    def test_title_write_elsewhere_updates_etag(
+        self, client, catalogue, write,
+    ):
+        """Запись вне запроса не сбрасывает поколение в кеше процесса."""
+        from reviews.models import Title
+
+        title = catalogue['titles'][1]
+        urls = ('/api/v1/titles/', f'/api/v1/titles/{catalogue["title"].pk}/')
+        etags = [client.get(url)['ETag'] for url in urls]
+        if write == 'save':
+            title.name = 'Переименовано в shell'
+            title.save()
+        elif write == 'rebuild':
+            Title.objects.filter(pk=title.pk).rebuild_rating()
+        else:
+            Title.objects.filter(pk=title.pk).delete()
+        for url, etag in zip(urls, etags):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == 200, (
+                'Проверьте, что ETag произведений строится по базе'
+            )
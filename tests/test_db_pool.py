@@ -0,0 +1,112 @@
+import pytest
+from psycopg2 import OperationalError
+from psycopg2.extensions import (TRANSACTION_STATUS_IDLE,
+                                 TRANSACTION_STATUS_INTRANS)
+
+from api_yamdb.postgresql_pool.pool import ConnectionPool, PoolTimeout
+
+
+class FakeCursor:
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, sql):
+        if self.connection.broken:
+            raise OperationalError('server closed the connection')
+        if not self.connection.autocommit:
+            self.connection.status = TRANSACTION_STATUS_INTRANS
+
+
+class FakeConnection:
+
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.status = TRANSACTION_STATUS_IDLE
+        self.rollbacks = 0
+        self.autocommit = True
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = TRANSACTION_STATUS_IDLE
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        self.closed = 1
+
+
+def make_pool(**options):
+    created = []
+
+    def connect():
+        created.append(FakeConnection())
+        return created[-1]
+
+    defaults = {
+        'min_size': 0,
+        'max_size': 2,
+        'timeout': 0.05,
+        'check_interval': 0,
+    }
+    return ConnectionPool(connect, **{**defaults, **options}), created
+
+
+class TestConnectionPool:
+
+    def test_reuses_released_connections(self):
+        pool, created = make_pool(min_size=1)
+        assert len(created) == 1
+        connection = pool.acquire()
+        pool.release(connection)
+        assert pool.acquire() is connection
+        assert len(created) == 1
+
+    def test_waits_then_times_out(self):
+        pool, _ = make_pool()
+        pool.acquire()
+        pool.acquire()
+        with pytest.raises(PoolTimeout):
+            pool.acquire()
+
+    def test_replaces_broken_connections(self):
+        pool, created = make_pool()
+        connection = pool.acquire()
+        pool.release(connection)
+        connection.broken = True
+        fresh = pool.acquire()
+        assert fresh is not connection
+        assert connection.closed
+        assert pool.size == 1
+
+    def test_rolls_back_on_release(self):
+        pool, _ = make_pool()
+        connection = pool.acquire()
+        connection.status = TRANSACTION_STATUS_INTRANS
+        pool.release(connection)
+        assert connection.rollbacks == 1
+
+    def test_health_check_leaves_connection_idle(self):
+        pool, _ = make_pool()
+        connection = pool.acquire()
+        connection.autocommit = False
+        pool.release(connection)
+        assert connection.autocommit, (
+            'Проверьте, что пул возвращает соединению autocommit'
+        )
+        connection.autocommit = False
+        assert pool.acquire() is connection
+        assert connection.status == TRANSACTION_STATUS_IDLE, (
+            'Проверьте, что проверка SELECT 1 не оставляет открытую транзакцию'
+        )
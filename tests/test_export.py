@@ -0,0 +1,179 @@
+import asyncio
+import csv
+import gzip
+import json
+import threading
+from contextlib import redirect_stdout
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+def read_csv(content):
+    return list(csv.DictReader(StringIO(content.decode())))
+
+
+def read_ndjson(content):
+    return [json.loads(line) for line in content.decode().splitlines()]
+
+
+async def call_asgi(application, path, authorization=''):
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [(b'authorization', authorization.encode())],
+        'client': ('127.0.0.1', 50000),
+        'server': ('testserver', 80),
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await application(scope, receive, send)
+    return messages
+
+
+@pytest.mark.django_db
+class TestExport:
+
+    def test_csv_matches_load_format(self, catalogue):
+        from api.export import export
+
+        rows = read_csv(b''.join(export('titles', 'csv', chunk_size=7)))
+        assert len(rows) == 30
+        assert list(rows[0]) == ['id', 'name', 'year', 'category']
+        title = catalogue['title']
+        assert rows[0] == {
+            'id': str(title.pk),
+            'name': title.name,
+            'year': str(title.year),
+            'category': str(title.category_id),
+        }
+        assert len(read_csv(b''.join(export('genre_title', 'csv')))) == 60
+
+    def test_empty_table_has_header(self):
+        from api.export import export
+
+        assert b''.join(export('review', 'csv')).decode().strip() == (
+            'id,title_id,text,author,score,pub_date'
+        )
+
+    def test_ndjson_titles_with_genres(self, catalogue):
+        from api.export import export
+
+        titles = read_ndjson(b''.join(export('titles', 'ndjson', chunk_size=4)))
+        assert len(titles) == 30
+        assert titles[0]['rating'] == 5.5
+        assert titles[0]['category']['slug'] == 'category-0'
+        assert [genre['slug'] for genre in titles[0]['genre']] == [
+            'genre-0', 'genre-1',
+        ]
+        comments = read_ndjson(b''.join(export('comments', 'ndjson')))
+        assert comments[0]['review_id'] == catalogue['review'].pk
+
+    def test_gzip(self, catalogue):
+        from api.export import export
+
+        assert gzip.decompress(
+            b''.join(export('review', 'ndjson', compress=True)),
+        ) == b''.join(export('review', 'ndjson'))
+
+    def test_endpoint(self, admin_api_client, catalogue):
+        response = admin_api_client.get('/api/v1/export/review.csv')
+        assert response.status_code == 200
+        assert response.streaming
+        assert response['Content-Type'].startswith('text/csv')
+        assert len(read_csv(b''.join(response.streaming_content))) == 30
+        response = admin_api_client.get(
+            '/api/v1/export/titles.ndjson?gzip=true',
+        )
+        assert response['Content-Type'] == 'application/gzip'
+        assert 'titles.ndjson.gz' in response['Content-Disposition']
+        assert len(read_ndjson(
+            gzip.decompress(b''.join(response.streaming_content)),
+        )) == 30
+        assert admin_api_client.get(
+            '/api/v1/export/outbox.csv',
+        ).status_code == 404
+
+    def test_endpoint_is_admin_only(self, client, user):
+        from rest_framework.test import APIClient
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        assert client.get('/api/v1/export/titles.csv').status_code == 401
+        api_client = APIClient()
+        api_client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}',
+        )
+        assert api_client.get('/api/v1/export/titles.csv').status_code == 403
+
+
+@pytest.mark.django_db(transaction=True)
+class TestExportRoundTrip:
+    """load и поток выгрузки под ASGI работают в своих потоках."""
+
+    def test_load_reads_exported_csv(self, catalogue, tmp_path):
+        from reviews.models import (Category, Comment, Genre, GenreTitle,
+                                    Review, Title, User)
+
+        models = (Comment, Review, GenreTitle, Title, Genre, Category, User)
+        Review.objects.update(pub_date='2001-02-03T04:05:06+00:00')
+        with redirect_stdout(StringIO()):
+            call_command('export', output=tmp_path)
+        counts = [model.objects.count() for model in models]
+        for model in models:
+            model.objects.all().delete()
+        with redirect_stdout(StringIO()):
+            call_command('load', data_dir=tmp_path, restart=True)
+        assert [model.objects.count() for model in models] == counts
+        assert set(
+            Review.objects.values_list('pub_date__year', flat=True),
+        ) == {2001}, 'Проверьте, что load сохраняет даты публикации из csv'
+
+    def test_asgi_loop_is_free_while_exporting(
+        self, admin_api_client, catalogue, monkeypatch,
+    ):
+        from api import views
+
+        from api_yamdb.asgi import application
+
+        release = threading.Event()
+        released = []
+
+        def slow_export(dataset, file_format, compress=False):
+            yield b'id\n'
+            released.append(release.wait(5))
+            yield b'1\n'
+
+        monkeypatch.setattr(views, 'export', slow_export)
+        authorization = admin_api_client._credentials['HTTP_AUTHORIZATION']
+
+        async def read():
+            exporting = asyncio.ensure_future(call_asgi(
+                application, '/api/v1/export/review.csv', authorization,
+            ))
+            other = await call_asgi(application, '/api/v1/categories/')
+            release.set()
+            return await exporting, other
+
+        exported, other = asyncio.run(read())
+        assert other[0]['status'] == 200
+        assert released == [True], (
+            'Проверьте, что выгрузка не останавливает цикл событий ASGI'
+        )
+        assert exported[0]['status'] == 200
+        assert b''.join(
+            message.get('body', b'') for message in exported[1:]
+        ) == b'id\n1\n'
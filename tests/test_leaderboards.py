@@ -0,0 +1,63 @@
+import pytest
+from django.core.management import call_command
+
+from tests.test_query_count import assert_constant_queries
+
+
+@pytest.fixture
+def rated(catalogue, django_user_model):
+    from reviews.models import Review, Title
+
+    titles = catalogue['titles']
+    critic = django_user_model.objects.create(
+        username='critic',
+        email='critic@yamdb.fake',
+    )
+    for title, score in zip(titles[1:4], (9, 3, 7)):
+        Review.objects.create(
+            title=title,
+            author=critic,
+            text='Оценка',
+            score=score,
+        )
+    Title.objects.rebuild_rating()
+    call_command('refresh_leaderboards')
+    return titles
+
+
+def result_ids(response):
+    assert response.status_code == 200, response.json()
+    return [item['title']['id'] for item in response.json()['results']]
+
+
+@pytest.mark.django_db
+class TestLeaderboards:
+
+    def test_top_rated(self, client, rated):
+        response = client.get('/api/v1/leaderboards/top/')
+        assert result_ids(response) == [
+            rated[1].pk,
+            rated[3].pk,
+            rated[0].pk,
+            rated[2].pk,
+        ]
+        assert response.json()['results'][0]['score'] == 9
+
+    def test_scopes(self, client, rated):
+        # Произведения 1 и 2 относятся к жанру genre-2.
+        response = client.get('/api/v1/leaderboards/top/?genre=genre-2')
+        assert result_ids(response) == [rated[1].pk, rated[2].pk]
+        response = client.get('/api/v1/leaderboards/top/?category=category-0')
+        assert result_ids(response) == [rated[3].pk, rated[0].pk]
+        response = client.get(
+            '/api/v1/leaderboards/top/?category=category-0&genre=genre-2',
+        )
+        assert response.status_code == 400
+
+    def test_trending(self, client, rated):
+        response = client.get('/api/v1/leaderboards/trending/')
+        assert result_ids(response)[0] == rated[0].pk
+        assert response.json()['results'][0]['score'] == 30
+
+    def test_constant_queries(self, client, rated):
+        assert_constant_queries(client, '/api/v1/leaderboards/top/')
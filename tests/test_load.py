@@ -0,0 +1,275 @@
+import logging
+from contextlib import redirect_stdout
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+VOLATILE_FIELDS = ('date_joined', 'modified', 'password', 'last_login')
+
+
+def load(data_dir, **options):
+    with redirect_stdout(StringIO()):
+        call_command('load', data_dir=data_dir, **options)
+
+
+def loaded_models():
+    from api.models import ImportCheckpoint
+    from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                                Title, User)
+
+    return (
+        Comment, Review, GenreTitle, Title, Genre, Category, User,
+        ImportCheckpoint,
+    )
+
+
+def dump():
+    """Строки загружаемых таблиц без полей, зависящих от времени загрузки."""
+    rows = {}
+    for model in loaded_models()[:-1]:
+        fields = [
+            field.attname for field in model._meta.concrete_fields
+            if field.attname not in VOLATILE_FIELDS
+        ]
+        rows[model.__name__] = list(
+            model.objects.order_by('pk').values_list(*fields)
+        )
+    return rows
+
+
+def wipe():
+    for model in loaded_models():
+        model.objects.all().delete()
+
+
+@pytest.mark.django_db
+class TestSharedCsvSource:
+
+    def test_resumes_each_shard_from_its_checkpoint(self, tmp_path):
+        from api.management.checkpoints import CsvSource, SharedCsvSource
+
+        path = tmp_path / 'review.csv'
+        path.write_text('id,key\n' + ''.join(
+            f'{index},{index % 2}\n' for index in range(6)
+        ))
+
+        def shard_sources():
+            return [
+                CsvSource(path, f'review.csv [{index + 1}/2]')
+                for index in range(2)
+            ]
+
+        reader = SharedCsvSource(shard_sources(), lambda row: int(row['key']))
+        rows = []
+        for row in reader:
+            rows.append((reader.shard, row['id']))
+            if row['id'] == '3':
+                # Шард 1 записал строки 1 и 3, шард 0 — ничего.
+                reader.sources[1].save_checkpoint(
+                    *reader.position(), completed=False,
+                )
+        assert rows == [
+            (0, '0'), (1, '1'), (0, '2'), (1, '3'), (0, '4'), (1, '5'),
+        ]
+        reader = SharedCsvSource(shard_sources(), lambda row: int(row['key']))
+        assert [row['id'] for row in reader] == ['0', '2', '4', '5'], (
+            'Проверьте, что строки, уже записанные шардом, не читаются снова'
+        )
+
+
+class TestCopyEngine:
+
+    def test_staging_sql(self):
+        from api.management import copy_engine
+
+        staging, create = copy_engine.staging_sql(
+            'review', 'id,title_id,text,author,score,pub_date\r\n'.encode(),
+        )
+        assert staging == '"staging_review"'
+        assert create == (
+            'CREATE TEMPORARY TABLE "staging_review" ("id" text, '
+            '"title_id" text, "text" text, "author" text, "score" text, '
+            '"pub_date" text) ON COMMIT DROP'
+        )
+
+    def test_merge_sql(self):
+        from api.management import copy_engine
+
+        for name, model in copy_engine.TABLES.items():
+            sql = copy_engine.merge_sql(name, '"staging"')
+            assert f'INSERT INTO "{model._meta.db_table}"' in sql
+            assert 'FROM "staging" s' in sql
+            assert '{' not in sql
+        for name in ('review', 'comments'):
+            assert (
+                "COALESCE(NULLIF(s.pub_date, '')::timestamptz, now())"
+                in copy_engine.merge_sql(name, '"staging"')
+            ), 'Проверьте, что COPY сохраняет даты публикации из csv'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_sqlite_falls_back_to_default_path(self, csv_dir, caplog):
+        load(csv_dir)
+        expected = dump()
+        assert expected['Review'] and expected['Comment']
+        wipe()
+        with caplog.at_level(logging.INFO):
+            load(csv_dir, copy=True)
+        assert 'COPY доступен только для PostgreSQL.' in caplog.messages
+        assert dump() == expected, (
+            'Проверьте, что без PostgreSQL load --copy загружает те же строки'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCheckpoints:
+
+    def test_unchanged_files_are_skipped(self, csv_dir, caplog):
+        load(csv_dir)
+        expected = dump()
+        with caplog.at_level(logging.INFO):
+            load(csv_dir)
+        for path in csv_dir.iterdir():
+            assert f'Файл {path.name} не изменился, пропускаем.' in (
+                caplog.messages
+            ), 'Проверьте, что загруженный файл не читается повторно'
+        assert dump() == expected
+
+    def test_resume_after_failure(self, csv_dir, caplog, monkeypatch):
+        from reviews.models import Review
+
+        load(csv_dir)
+        expected = dump()
+        wipe()
+        bulk_create = Review.objects.bulk_create
+        calls = []
+
+        def failing_bulk_create(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 3:
+                raise RuntimeError('Сбой на третьей пачке')
+            return bulk_create(*args, **kwargs)
+
+        monkeypatch.setattr(Review.objects, 'bulk_create', failing_bulk_create)
+        with pytest.raises(RuntimeError):
+            load(csv_dir, batch_size=10)
+        assert Review.objects.count() == 20
+        monkeypatch.undo()
+        with caplog.at_level(logging.INFO):
+            load(csv_dir, batch_size=10)
+        assert not [
+            message for message in caplog.messages
+            if 'уже существует' in message
+        ], 'Проверьте, что загрузка продолжается с контрольной точки'
+        assert dump() == expected
+
+    def test_delta_loads_appended_rows(self, csv_dir, caplog):
+        from reviews.models import Review, Title, User
+
+        load(csv_dir)
+        title_id, author_id = next(
+            (title_id, author_id)
+            for title_id in Title.objects.values_list('id', flat=True)
+            for author_id in User.objects.values_list('id', flat=True)
+            if not Review.objects.filter(
+                title_id=title_id, author_id=author_id,
+            ).exists()
+        )
+        count = Review.objects.count()
+        with open(csv_dir / 'review.csv', 'a', encoding='utf-8') as file:
+            file.write(
+                f'\n1000,{title_id},Дописанный отзыв,{author_id},7,'
+                '2021-01-01T00:00:00Z\n'
+            )
+        with caplog.at_level(logging.INFO):
+            load(csv_dir, delta=True)
+        assert Review.objects.count() == count + 1
+        assert Review.objects.get(pk=1000).pub_date.year == 2021
+        assert not [
+            message for message in caplog.messages
+            if 'уже существует' in message
+        ], 'Проверьте, что --delta читает только дописанные строки'
+
+    def test_restart_rereads_files(self, csv_dir, caplog):
+        load(csv_dir)
+        expected = dump()
+        with caplog.at_level(logging.INFO):
+            load(csv_dir, restart=True)
+        assert not [
+            message for message in caplog.messages
+            if 'не изменился' in message
+        ], 'Проверьте, что --restart игнорирует контрольные точки'
+        assert any('уже существует' in message for message in caplog.messages)
+        assert dump() == expected
+
+
+@pytest.mark.django_db(transaction=True)
+class TestBatchedLoad:
+
+    def test_batch_size(self, csv_dir, monkeypatch):
+        from reviews.models import Review
+
+        bulk_create = Review.objects.bulk_create
+        sizes = []
+
+        def recording_bulk_create(objs, *args, **kwargs):
+            sizes.append(len(objs))
+            return bulk_create(objs, *args, **kwargs)
+
+        monkeypatch.setattr(
+            Review.objects, 'bulk_create', recording_bulk_create,
+        )
+        load(csv_dir, batch_size=25)
+        total = Review.objects.count()
+        assert sum(sizes) == total
+        assert sizes == [25] * (total // 25) + (
+            [total % 25] if total % 25 else []
+        ), 'Проверьте, что записи вставляются пачками по --batch-size'
+
+    def test_duplicates_and_dangling_links_are_skipped(
+        self, csv_dir, caplog,
+    ):
+        from reviews.models import Category, Comment, Review, Title
+
+        load(csv_dir)
+        counts = [
+            model.objects.count()
+            for model in (Category, Title, Review, Comment)
+        ]
+        review = Review.objects.order_by('pk').first()
+        wipe()
+        rows = {
+            'category.csv': '3,Фильм снова,movie',
+            'titles.csv': '900,Без категории,2000,999',
+            'review.csv': (
+                f'901,{review.title_id},Второй отзыв,{review.author_id},5,'
+                '2020-01-01T00:00:00Z\n'
+                f'902,999,Отзыв без произведения,{review.author_id},5,'
+                '2020-01-01T00:00:00Z'
+            ),
+            'comments.csv': (
+                f'903,999,Комментарий без отзыва,{review.author_id},'
+                '2020-01-01T00:00:00Z'
+            ),
+        }
+        for name, lines in rows.items():
+            with open(csv_dir / name, 'a', encoding='utf-8') as file:
+                file.write(f'\n{lines}\n')
+        with caplog.at_level(logging.INFO):
+            load(csv_dir)
+        assert [
+            model.objects.count()
+            for model in (Category, Title, Review, Comment)
+        ] == counts, 'Проверьте, что дубликаты и строки без связей пропущены'
+        errors = [
+            record.getMessage() for record in caplog.records
+            if record.levelno == logging.ERROR
+        ]
+        assert 'Категория movie уже существует!' in errors
+        assert 'Не найдена категория 999!' in errors
+        assert (
+            f'Отзыв на произведение {review.title_id} '
+            f'от автора {review.author_id} уже существует!'
+        ) in errors
+        assert any(error.startswith('Отзыв 902') for error in errors)
+        assert any(error.startswith('Комментарий 903') for error in errors)
@@ -0,0 +1,62 @@
+import pytest
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+
+
+class BrokenBackend(BaseEmailBackend):
+
+    def send_messages(self, messages):
+        raise ConnectionError('relay is down')
+
+
+@pytest.mark.django_db
+class TestOutbox:
+
+    def signup(self, client):
+        response = client.post(
+            '/api/v1/auth/signup/',
+            {'username': 'newbie', 'email': 'newbie@yamdb.fake'},
+        )
+        assert response.status_code == 200, response.json()
+
+    def test_signup_only_queues(self, client):
+        from api.models import OutboxEmail
+
+        self.signup(client)
+        assert mail.outbox == [], (
+            'Проверьте, что регистрация не отправляет письмо сама'
+        )
+        email = OutboxEmail.objects.get()
+        assert email.recipient == 'newbie@yamdb.fake'
+        assert email.status == OutboxEmail.PENDING
+
+    def test_worker_delivers(self, client):
+        from api.models import OutboxEmail
+
+        self.signup(client)
+        call_command('send_outbox', '--once', '--workers=2')
+        assert len(mail.outbox) == 1
+        assert 'код подтверждения' in mail.outbox[0].body
+        email = OutboxEmail.objects.get()
+        assert email.status == OutboxEmail.SENT
+        assert email.body == '', (
+            'Проверьте, что у отправленного письма стёрт код подтверждения'
+        )
+
+    def test_retries_then_fails(self, client, settings):
+        from api.models import OutboxEmail
+
+        self.signup(client)
+        settings.EMAIL_BACKEND = 'tests.test_outbox.BrokenBackend'
+        settings.OUTBOX_MAX_ATTEMPTS = 2
+        call_command('send_outbox', '--once')
+        email = OutboxEmail.objects.get()
+        assert email.status == OutboxEmail.PENDING
+        assert email.attempts == 1
+        assert 'relay is down' in email.last_error
+        OutboxEmail.objects.update(available_at=email.created)
+        call_command('send_outbox', '--once')
+        email.refresh_from_db()
+        assert email.status == OutboxEmail.FAILED
+        assert email.attempts == 2
@@ -0,0 +1,69 @@
+import pytest
+
+
+def walk(client, url, link):
+    ids, pages = [], 0
+    while url:
+        data = client.get(url).json()
+        ids.extend(item['id'] for item in data['results'])
+        url = data[link]
+        pages += 1
+    return ids, pages
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+
+    def test_legacy_mode_is_default(self, client, catalogue):
+        data = client.get('/api/v1/titles/?limit=5&offset=5').json()
+        assert data['count'] == 30, (
+            'Проверьте, что без pagination=cursor ответ содержит count'
+        )
+        assert len(data['results']) == 5
+
+    def test_cursor_walk_matches_offset_order(self, client, catalogue):
+        title = catalogue['title']
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        expected = [
+            item['id'] for item in client.get(f'{url}?limit=100').json()[
+                'results'
+            ]
+        ]
+        forward, pages = walk(
+            client,
+            f'{url}?pagination=cursor&limit=7',
+            'next',
+        )
+        assert forward == expected, (
+            'Проверьте, что курсорная пагинация сохраняет порядок выдачи'
+        )
+        assert pages == 5
+
+    def test_cursor_mode_skips_count(self, client, catalogue):
+        data = client.get('/api/v1/titles/?pagination=cursor').json()
+        assert 'count' not in data
+        assert data['previous'] is None
+        data = client.get('/api/v1/titles/?pagination=cursor&count=true').json()
+        assert data['count'] == 30
+
+    def test_previous_link(self, client, catalogue):
+        first = client.get('/api/v1/titles/?pagination=cursor&limit=4').json()
+        second = client.get(first['next']).json()
+        back = client.get(second['previous']).json()
+        assert back['results'] == first['results'], (
+            'Проверьте, что ссылка previous возвращает предыдущую страницу'
+        )
+
+    def test_invalid_cursor(self, client, catalogue):
+        response = client.get('/api/v1/titles/?cursor=broken')
+        assert response.status_code == 404
+
+    def test_cursor_rejects_ordering(self, client, catalogue):
+        response = client.get('/api/v1/titles/?pagination=cursor&ordering=name')
+        assert response.status_code == 400, (
+            'Проверьте, что курсорная пагинация не игнорирует ordering молча'
+        )
+        assert 'ordering' in response.json()
+        assert client.get(
+            '/api/v1/titles/?limit=3&ordering=name',
+        ).status_code == 200
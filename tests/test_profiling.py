@@ -0,0 +1,100 @@
+import pytest
+
+
+@pytest.fixture
+def profile_all(settings):
+    settings.PROFILING_SAMPLE_RATE = 1.0
+    settings.PROFILING_METRICS_TOKEN = 'secret'
+
+
+class TestProfile:
+
+    def test_repeated_shapes_flagged(self, settings):
+        from api.profiling import Profile
+
+        settings.PROFILING_NPLUSONE_THRESHOLD = 3
+        profile = Profile()
+        for ids in ('%s', '%s, %s', '%s,%s,%s'):
+            profile.add_query(
+                f'SELECT * FROM "reviews_genre" WHERE "id" IN ({ids})', 0.001,
+            )
+        assert profile.queries == 3
+        assert profile.repeated_shape() == (
+            'SELECT * FROM "reviews_genre" WHERE "id" IN (...)'
+        ), 'Проверьте, что списки IN с разной длиной дают одну форму SQL'
+
+    def test_distinct_queries_not_flagged(self, settings):
+        from api.profiling import Profile
+
+        settings.PROFILING_NPLUSONE_THRESHOLD = 3
+        profile = Profile()
+        profile.add_query('SELECT 1', 0.001)
+        profile.add_query('SELECT 2', 0.001)
+        assert profile.repeated_shape() is None
+
+
+@pytest.mark.django_db
+class TestProfilingMiddleware:
+
+    def test_records_sampled_requests(
+        self, client, admin_api_client, catalogue, profile_all,
+    ):
+        assert client.get('/api/v1/titles/').status_code == 200
+        assert client.get('/api/v1/titles/?limit=5').status_code == 200
+        response = admin_api_client.get('/api/v1/profiling/')
+        assert response.status_code == 200
+        stats = response.json()['endpoints']['GET title-list']
+        assert stats['requests'] == 2
+        assert stats['avg_queries'] > 0
+        assert stats['avg_serializer_ms'] > 0
+        assert stats['avg_bytes'] > 0
+        assert sum(stats['histogram'].values()) == 2
+
+    def test_not_sampled(self, client, admin_api_client, catalogue, settings):
+        from api.profiling import get_stats
+
+        settings.PROFILING_SAMPLE_RATE = 0
+        assert client.get('/api/v1/titles/').status_code == 200
+        assert get_stats() == {}
+
+    def test_stats_admin_only(self, client, user, profile_all):
+        from rest_framework.test import APIClient
+
+        assert client.get('/api/v1/profiling/').status_code == 401
+        user_client = APIClient()
+        user_client.force_authenticate(user)
+        assert user_client.get('/api/v1/profiling/').status_code == 403
+
+    def test_reset(self, client, admin_api_client, catalogue, profile_all):
+        from api.profiling import get_stats
+
+        client.get('/api/v1/titles/')
+        assert admin_api_client.delete('/api/v1/profiling/').status_code == 204
+        assert get_stats() == {}
+
+    def test_prometheus_metrics(self, client, catalogue, profile_all):
+        client.get('/api/v1/titles/')
+        assert client.get('/api/v1/profiling/metrics/').status_code == 403
+        response = client.get(
+            '/api/v1/profiling/metrics/',
+            HTTP_AUTHORIZATION='Bearer secret',
+        )
+        assert response.status_code == 200
+        body = response.content.decode()
+        assert (
+            'yamdb_request_duration_seconds_count'
+            '{endpoint="GET title-list"} 1'
+        ) in body
+        assert 'yamdb_db_queries_total{endpoint="GET title-list"}' in body
+
+    def test_records_asgi_requests(self, catalogue, profile_all):
+        from asgiref.sync import async_to_sync
+        from django.test import AsyncClient
+
+        from api.profiling import get_stats
+
+        response = async_to_sync(AsyncClient().get)('/api/v1/titles/')
+        assert response.status_code == 200
+        stats = get_stats()['GET title-list']
+        assert stats['requests'] == 1
+        assert stats['queries'] > 0
@@ -0,0 +1,41 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что GET-запрос к {url} возвращает статус 200'
+    )
+    return len(context.captured_queries)
+
+
+def assert_constant_queries(client, url, page_sizes=(1, 5, 25)):
+    counts = {
+        size: count_queries(client, f'{url}?limit={size}')
+        for size in page_sizes
+    }
+    assert len(set(counts.values())) == 1, (
+        f'Проверьте, что число запросов к {url} не зависит от размера '
+        f'страницы: {counts}'
+    )
+
+
+@pytest.mark.django_db
+class TestQueryCount:
+
+    def test_titles_list(self, client, catalogue):
+        assert_constant_queries(client, '/api/v1/titles/')
+
+    def test_reviews_list(self, client, catalogue):
+        title = catalogue['title']
+        assert_constant_queries(client, f'/api/v1/titles/{title.pk}/reviews/')
+
+    def test_comments_list(self, client, catalogue):
+        title, review = catalogue['title'], catalogue['review']
+        assert_constant_queries(
+            client,
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/',
+        )
@@ -0,0 +1,50 @@
+import pytest
+
+
+@pytest.fixture
+def broken_replica(db, settings):
+    """Реплика, к которой нельзя подключиться."""
+    from django.db import connections
+
+    from api.replicas import unhealthy
+
+    connections.settings['broken'] = {
+        **connections['default'].settings_dict,
+        'NAME': '/nonexistent/replica.sqlite3',
+    }
+    settings.DATABASE_REPLICAS = ['broken']
+    yield 'broken'
+    del connections['broken']
+    del connections.settings['broken']
+    unhealthy.clear()
+
+
+@pytest.mark.django_db
+class TestReplicaRouting:
+
+    def test_falls_back_to_primary(self, client, catalogue, broken_replica):
+        from api.replicas import unhealthy
+
+        response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert response.json()['count'] == 30
+        assert broken_replica in unhealthy, (
+            'Проверьте, что недоступная реплика исключается из выбора'
+        )
+
+    def test_reads_pinned_after_write(
+        self, admin_api_client, client, catalogue, broken_replica,
+    ):
+        from api.replicas import unhealthy
+
+        response = admin_api_client.post(
+            '/api/v1/genres/',
+            {'name': 'Новый жанр', 'slug': 'new-genre'},
+        )
+        assert response.status_code == 201
+        assert admin_api_client.get('/api/v1/genres/').status_code == 200
+        assert unhealthy == {}, (
+            'Проверьте, что после записи пользователь читает с основной базы'
+        )
+        assert client.get('/api/v1/genres/?limit=5').status_code == 200
+        assert broken_replica in unhealthy
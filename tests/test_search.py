@@ -0,0 +1,21 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestTitleSearch:
+
+    def test_search_matches_all_words(self, client, catalogue):
+        response = client.get('/api/v1/titles/search/?q=произведение 29')
+        assert response.status_code == 200
+        names = [item['name'] for item in response.json()['results']]
+        assert names == ['Произведение 29'], (
+            'Проверьте, что поиск возвращает произведения со всеми словами'
+        )
+
+    def test_search_paginates(self, client, catalogue):
+        data = client.get('/api/v1/titles/search/?q=Произведение&limit=5').json()
+        assert data['count'] == 30
+        assert len(data['results']) == 5
+
+    def test_empty_query(self, client, catalogue):
+        assert client.get('/api/v1/titles/search/').status_code == 400
@@ -1,3 +1,7 @@
+import runpy
+
+import pytest
+
 from api_yamdb import settings
 
 
@@ -9,3 +13,25 @@ class TestSettings:
         assert settings.DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql', (
             'Проверьте, что используете базу данных postgresql'
         )
+
+
+class TestGunicornConfig:
+
+    def load(self, monkeypatch, **env):
+        for name in ('WEB_CONCURRENCY', 'CACHE_BACKEND'):
+            monkeypatch.delenv(name, raising=False)
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        return runpy.run_path(str(settings.BASE_DIR / 'gunicorn.conf.py'))
+
+    def test_single_worker_by_default(self, monkeypatch):
+        assert self.load(monkeypatch)['workers'] == 1
+
+    def test_workers_require_shared_cache(self, monkeypatch):
+        with pytest.raises(RuntimeError):
+            self.load(monkeypatch, WEB_CONCURRENCY='2')
+        assert self.load(
+            monkeypatch,
+            WEB_CONCURRENCY='2',
+            CACHE_BACKEND='django.core.cache.backends.filebased.FileBasedCache',
+        )['workers'] == 2
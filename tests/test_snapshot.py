@@ -0,0 +1,108 @@
+import random
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+
+def take_snapshot(**kwargs):
+    from api.management.snapshot import dump
+
+    file = BytesIO()
+    dump(file, **kwargs)
+    file.seek(0)
+    return file
+
+
+@pytest.mark.django_db
+class TestSnapshot:
+
+    def test_round_trip(self, catalogue):
+        from api.management.snapshot import restore
+        from reviews.models import Comment, Review, ScoreHistogram, Title
+
+        title = catalogue['title']
+        dates = list(Review.objects.order_by('id').values_list(
+            'id', 'pub_date',
+        ))
+        file = take_snapshot(block_rows=7)
+        Review.objects.filter(pk=dates[0][0]).delete()
+        Title.objects.create(name='Лишнее', year=2000)
+        counts = restore(file, batch_size=5)
+        assert counts['reviews.Review'] == 30
+        assert counts['reviews.Title'] == 30
+        assert list(Review.objects.order_by('id').values_list(
+            'id', 'pub_date',
+        )) == dates
+        assert Comment.objects.count() == 30
+        assert Title.objects.get(pk=title.pk).rating == 5.5
+        assert ScoreHistogram.objects.get(title=title).counts()[1] == 3
+        assert Title.objects.create(name='Новое', year=2001).pk > max(
+            obj.pk for obj in catalogue['titles']
+        )
+
+    def test_resets_load_checkpoints(self, catalogue):
+        from api.management.snapshot import restore
+        from api.models import ImportCheckpoint
+
+        file = take_snapshot()
+        ImportCheckpoint.objects.create(source='review.csv', completed=True)
+        restore(file)
+        assert not ImportCheckpoint.objects.exists(), (
+            'Проверьте, что restore сбрасывает контрольные точки load'
+        )
+
+    def test_compress(self, catalogue):
+        from api.management.snapshot import restore
+        from reviews.models import Review
+
+        plain = take_snapshot().getvalue()
+        compressed = take_snapshot(compress=True)
+        assert len(compressed.getvalue()) < len(plain)
+        Review.objects.all().delete()
+        restore(compressed)
+        assert Review.objects.count() == 30
+        assert take_snapshot().getvalue() == plain
+
+    def test_rejects_foreign_file(self):
+        from api.management.snapshot import SnapshotError, restore
+
+        with pytest.raises(SnapshotError):
+            restore(BytesIO(b'{"model": "reviews.Title"}'))
+
+    def test_rejects_other_schema(self, catalogue, monkeypatch):
+        from api.management import snapshot
+
+        file = take_snapshot()
+        monkeypatch.setattr(snapshot, 'get_columns', lambda model: [])
+        with pytest.raises(snapshot.SnapshotError):
+            snapshot.restore(file)
+
+    def test_commands(self, catalogue, tmp_path):
+        from reviews.models import Comment
+
+        path = tmp_path / 'yamdb.snapshot'
+        call_command('snapshot', path, compress=True, stdout=StringIO())
+        Comment.objects.all().delete()
+        call_command('restore', path, interactive=False, stdout=StringIO())
+        assert Comment.objects.count() == 30
+        path.write_bytes(b'not a snapshot')
+        with pytest.raises(CommandError):
+            call_command('restore', path, interactive=False)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_benchmark_snapshot():
+    """Команда load пишет из своего потока, мимо транзакции теста."""
+    from api.management.commands.benchmark_snapshot import METHODS, Command
+    from api.management.synthetic import Scale
+
+    result = Command().run_scale(
+        Scale(6, 2, 3, 6, 2, 1), METHODS, random.Random(0),
+    )
+    assert set(result['methods']) == set(METHODS)
+    assert result['rows'] > 0
+    assert all(
+        method['bytes'] > 0 and method['seconds'] > 0
+        for method in result['methods'].values()
+    )
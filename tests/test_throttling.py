@@ -0,0 +1,124 @@
+import pytest
+
+
+@pytest.fixture
+def rates(settings):
+    settings.REST_FRAMEWORK = {
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {
+            'auth_ip': '3/min',
+            'auth_username': '2/min',
+            'reviews': '1/hour',
+        },
+    }
+
+
+@pytest.fixture
+def behind_proxy(settings, rates):
+    settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}
+
+
+def signup(client, username, address='10.0.0.1'):
+    return client.post(
+        '/api/v1/auth/signup/',
+        {'username': username, 'email': f'{username}@yamdb.fake'},
+        REMOTE_ADDR=address,
+    )
+
+
+@pytest.mark.django_db
+class TestThrottling:
+
+    def test_auth_ip_bucket(self, client, rates):
+        for index in range(3):
+            assert signup(client, f'user{index}').status_code == 200
+        response = signup(client, 'user3')
+        assert response.status_code == 429
+        assert 0 < int(response['Retry-After']) <= 20, (
+            'Проверьте, что Retry-After равен времени до нового жетона'
+        )
+        assert signup(client, 'user3', '10.0.0.2').status_code == 200
+
+    def test_forwarded_for_ignored_by_default(self, client, rates):
+        for index in range(4):
+            response = client.post(
+                '/api/v1/auth/signup/',
+                {'username': f'user{index}', 'email': f'u{index}@yamdb.fake'},
+                HTTP_X_FORWARDED_FOR=f'192.0.2.{index}',
+                REMOTE_ADDR='10.0.0.1',
+            )
+        assert response.status_code == 429, (
+            'Проверьте, что без NUM_PROXIES X-Forwarded-For не учитывается'
+        )
+
+    def test_auth_ip_behind_proxy(self, client, behind_proxy):
+        for index in range(3):
+            assert client.post(
+                '/api/v1/auth/signup/',
+                {'username': f'user{index}', 'email': f'u{index}@yamdb.fake'},
+                HTTP_X_FORWARDED_FOR=f'192.0.2.{index}, 10.0.0.1',
+                REMOTE_ADDR='172.18.0.5',
+            ).status_code == 200
+        assert client.post(
+            '/api/v1/auth/signup/',
+            {'username': 'user3', 'email': 'u3@yamdb.fake'},
+            HTTP_X_FORWARDED_FOR='192.0.2.3, 10.0.0.1',
+            REMOTE_ADDR='172.18.0.5',
+        ).status_code == 429, (
+            'Проверьте, что подменённый X-Forwarded-For не обходит лимит'
+        )
+        assert client.post(
+            '/api/v1/auth/signup/',
+            {'username': 'user3', 'email': 'u3@yamdb.fake'},
+            HTTP_X_FORWARDED_FOR='10.0.0.2',
+            REMOTE_ADDR='172.18.0.5',
+        ).status_code == 200
+
+    def test_auth_username_bucket(self, client, rates):
+        for address in ('10.0.0.1', '10.0.0.2'):
+            assert client.post(
+                '/api/v1/auth/token/',
+                {'username': 'Victim', 'confirmation_code': 'x'},
+                REMOTE_ADDR=address,
+            ).status_code == 404
+        response = client.post(
+            '/api/v1/auth/token/',
+            {'username': 'victim', 'confirmation_code': 'x'},
+            REMOTE_ADDR='10.0.0.3',
+        )
+        assert response.status_code == 429
+
+    def test_review_quota(self, admin_api_client, catalogue, rates):
+        titles = catalogue['titles']
+        assert admin_api_client.get(
+            f'/api/v1/titles/{titles[1].pk}/reviews/',
+        ).status_code == 200
+        for title, expected in ((titles[1], 201), (titles[2], 429)):
+            response = admin_api_client.post(
+                f'/api/v1/titles/{title.pk}/reviews/',
+                {'text': 'Отзыв', 'score': 5},
+            )
+            assert response.status_code == expected
+        assert admin_api_client.get(
+            f'/api/v1/titles/{titles[2].pk}/reviews/',
+        ).status_code == 200, 'Проверьте, что квота не ограничивает чтение'
+
+    def test_local_fallback(self, client, rates, monkeypatch):
+        from api import throttling
+
+        def broken_cache():
+            raise ConnectionError('cache is down')
+
+        monkeypatch.setattr(throttling, 'get_cache', broken_cache)
+        monkeypatch.setattr(throttling, 'local_buckets', {})
+        for index in range(3):
+            assert signup(client, f'user{index}').status_code == 200
+        assert signup(client, 'user3').status_code == 429
+
+
+def test_bucket_refills():
+    from api.throttling import refill
+
+    assert refill(None, 5, 1, 100.0) == 5
+    assert refill((0, 100.0), 5, 0.5, 104.0) == 2
+    assert refill((4, 100.0), 5, 1, 110.0) == 5
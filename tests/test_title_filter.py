@@ -0,0 +1,38 @@
+import pytest
+
+
+def names(client, query):
+    response = client.get(f'/api/v1/titles/?limit=100&{query}')
+    assert response.status_code == 200, response.json()
+    return sorted(item['name'] for item in response.json()['results'])
+
+
+@pytest.mark.django_db
+class TestTitleFilter:
+
+    def test_category_is_exact_and_accepts_lists(self, client, catalogue):
+        assert len(names(client, 'category=category-0')) == 10
+        assert len(names(client, 'category=category-0,category-1')) == 20
+        assert names(client, 'category=category') == [], (
+            'Проверьте, что без match=fuzzy слаг категории сравнивается точно'
+        )
+
+    def test_legacy_fuzzy_mode(self, client, catalogue):
+        assert len(names(client, 'category=category&match=fuzzy')) == 30
+        assert len(names(client, 'year=199&match=fuzzy')) == 10
+
+    def test_year_range(self, client, catalogue):
+        assert names(client, 'year_min=2017&year_max=2018') == [
+            'Произведение 27',
+            'Произведение 28',
+        ]
+
+    def test_genre_any_and_all(self, client, catalogue):
+        # Произведение i относится к жанрам i % 4 и (i + 1) % 4.
+        assert len(names(client, 'genre=genre-0,genre-1')) == 23
+        all_genres = names(client, 'genre=genre-0,genre-1&genre_mode=all')
+        assert len(all_genres) == 8, (
+            'Проверьте, что genre_mode=all оставляет произведения со всеми '
+            'указанными жанрами'
+        )
+        assert names(client, 'genre=genre-0,missing&genre_mode=all') == []
@@ -0,0 +1,141 @@
+import pytest
+from django.core.management import CommandError, call_command
+
+
+@pytest.mark.django_db
+class TestTitleStats:
+
+    def test_stats(self, client, catalogue, django_assert_max_num_queries):
+        title = catalogue['title']
+        # Агрегат для ETag и сама гистограмма.
+        with django_assert_max_num_queries(2):
+            response = client.get(f'/api/v1/titles/{title.pk}/stats/')
+        assert response.status_code == 200
+        assert response.json() == {
+            'id': title.pk,
+            'reviews_count': 30,
+            'rating': 5.5,
+            'median': 5.5,
+            'histogram': {str(score): 3 for score in range(1, 11)},
+        }
+
+    def test_stats_without_reviews(self, client, catalogue):
+        title = catalogue['titles'][1]
+        response = client.get(f'/api/v1/titles/{title.pk}/stats/')
+        assert response.status_code == 200
+        assert response.json()['median'] is None
+        assert set(response.json()['histogram'].values()) == {0}
+        assert client.get('/api/v1/titles/0/stats/').status_code == 404
+
+    @pytest.mark.parametrize('pk', ['abc', '99999999999999999999999'])
+    @pytest.mark.parametrize('suffix', ['', 'stats/', 'reviews/'])
+    def test_invalid_id_is_not_found(self, client, catalogue, pk, suffix):
+        response = client.get(f'/api/v1/titles/{pk}/{suffix}')
+        assert response.status_code == 404, (
+            'Проверьте, что некорректный id произведения даёт 404, а не 500'
+        )
+
+    def test_review_changes_update_histogram(
+        self, admin_api_client, catalogue,
+    ):
+        from reviews.models import ScoreHistogram
+
+        title = catalogue['titles'][1]
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        response = admin_api_client.post(url, {'text': 'Отзыв', 'score': 4})
+        assert response.status_code == 201
+        assert ScoreHistogram.objects.get(title=title).counts()[4] == 1
+        review_url = f'{url}{response.json()["id"]}/'
+        assert admin_api_client.patch(
+            review_url,
+            {'score': 9},
+        ).status_code == 200
+        counts = ScoreHistogram.objects.get(title=title).counts()
+        assert (counts[4], counts[9]) == (0, 1)
+        assert admin_api_client.delete(review_url).status_code == 204
+        assert sum(ScoreHistogram.objects.get(title=title).counts().values()) == 0
+        call_command('rebuild_ratings', check=True)
+
+    def test_check_detects_stale_histogram(self, catalogue):
+        from reviews.models import ScoreHistogram
+
+        ScoreHistogram.objects.filter(title=catalogue['title']).update(
+            score_1=0,
+        )
+        with pytest.raises(CommandError):
+            call_command('rebuild_ratings', check=True)
+        call_command('rebuild_ratings')
+        call_command('rebuild_ratings', check=True)
+
+    def test_check_detects_stale_rating(self, catalogue):
+        from reviews.models import Title
+
+        Title.objects.filter(pk=catalogue['title'].pk).update(rating=1.0)
+        with pytest.raises(CommandError):
+            call_command('rebuild_ratings', check=True)
+        call_command('rebuild_ratings')
+        call_command('rebuild_ratings', check=True)
+        assert Title.objects.get(pk=catalogue['title'].pk).rating == 5.5
+
+
+@pytest.mark.django_db
+class TestStoredRating:
+    """Отзывы через API сдвигают хранимые сумму, число отзывов и рейтинг."""
+
+    def assert_rating(self, title, score_sum, reviews_count):
+        from reviews.models import Title
+
+        title = Title.objects.get(pk=title.pk)
+        assert (title.score_sum, title.reviews_count) == (
+            score_sum, reviews_count,
+        )
+        assert title.rating == pytest.approx(score_sum / reviews_count)
+        response = self.client.get(f'/api/v1/titles/{title.pk}/')
+        assert response.json()['rating'] == int(title.rating)
+
+    def test_create_update_destroy(self, admin_api_client, catalogue):
+        self.client = admin_api_client
+        title = catalogue['title']
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        response = admin_api_client.post(url, {'text': 'Отзыв', 'score': 10})
+        assert response.status_code == 201
+        self.assert_rating(title, 175, 31)
+        review_url = f'{url}{response.json()["id"]}/'
+        assert admin_api_client.patch(
+            review_url,
+            {'score': 1},
+        ).status_code == 200
+        self.assert_rating(title, 166, 31)
+        assert admin_api_client.patch(
+            review_url,
+            {'text': 'Без оценки'},
+        ).status_code == 200
+        self.assert_rating(title, 166, 31)
+        assert admin_api_client.delete(review_url).status_code == 204
+        self.assert_rating(title, 165, 30)
+        call_command('rebuild_ratings', check=True)
+
+    def test_last_review_destroyed(self, admin_api_client, catalogue):
+        from reviews.models import Title
+
+        title = catalogue['titles'][1]
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        response = admin_api_client.post(url, {'text': 'Отзыв', 'score': 3})
+        assert response.status_code == 201
+        assert Title.objects.get(pk=title.pk).rating == 3
+        assert admin_api_client.delete(
+            f'{url}{response.json()["id"]}/',
+        ).status_code == 204
+        title = Title.objects.get(pk=title.pk)
+        assert (title.score_sum, title.reviews_count, title.rating) == (
+            0, 0, None,
+        ), 'Проверьте, что без отзывов рейтинг произведения пуст'
+
+
+def test_median():
+    from reviews.models import ScoreHistogram
+
+    histogram = ScoreHistogram(score_2=1, score_7=2)
+    assert histogram.median() == 7
+    histogram.score_3 = 1
+    assert histogram.median() == 5